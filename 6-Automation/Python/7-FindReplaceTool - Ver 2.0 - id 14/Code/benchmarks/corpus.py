@@ -0,0 +1,174 @@
+import json
+import os
+import random
+import textwrap
+
+import fitz  # PyMuPDF for PDFs
+from docx import Document
+
+
+# -----------------------------
+# Settings
+# -----------------------------
+NEEDLE = "Zephyrine"          # the word every benchmark searches for (never drawn from WORDS)
+
+WORDS = (
+    "standard requirement shall section clause table figure note scope "
+    "system value limit test method report review design safety quality "
+    "material process control document record approval change revision "
+    "annex reference level check item unit data range format option"
+).split()
+
+PDF_LINES_PER_PAGE = 55
+PDF_LINE_CHARS = 95
+
+
+class CorpusShape:
+    """
+    Size and shape of a synthetic corpus (every knob of the generator).
+
+        files          files per type
+        paragraphs     body paragraphs per file (lines for TXT / PDF)
+        words          words per paragraph
+        runs           runs per DOCX paragraph (run fragmentation)
+        tables         tables per DOCX, each rows x cols
+        table_depth    nesting: 1 = plain tables, 2 = a table in the first cell, ...
+        match_density  share of paragraphs / cells holding the needle
+        heading_every  every n-th DOCX paragraph is a Heading 1..3 (0 = none)
+        blank_every    every n-th TXT line is followed by a blank line (0 = none)
+    """
+    def __init__(self, files=20, paragraphs=300, words=14, runs=4, tables=2, rows=4, cols=3,
+                 table_depth=2, match_density=0.05, heading_every=12, blank_every=6,
+                 types=("txt", "docx", "pdf"), seed=1):
+        self.files = files
+        self.paragraphs = paragraphs
+        self.words = words
+        self.runs = runs
+        self.tables = tables
+        self.rows = rows
+        self.cols = cols
+        self.table_depth = table_depth
+        self.match_density = match_density
+        self.heading_every = heading_every
+        self.blank_every = blank_every
+        self.types = tuple(types)
+        self.seed = seed
+
+    def as_dict(self):
+        return dict(self.__dict__, types=list(self.types))
+
+
+# -----------------------------
+# Text
+# -----------------------------
+def _sentence(rng, shape):
+    """
+    One paragraph of text; holds the needle with probability match_density.
+    """
+    words = [rng.choice(WORDS) for _ in range(shape.words)]
+    if rng.random() < shape.match_density:
+        words[rng.randrange(len(words))] = NEEDLE
+    text = " ".join(words)
+    return text[0].upper() + text[1:] + "."
+
+
+def _split_runs(text, runs, rng):
+    """
+    Cut a paragraph into `runs` pieces at random points (mid-word too,
+    as Word does after edits and spell checks).
+    """
+    if runs <= 1 or len(text) < runs:
+        return [text]
+    cuts = sorted(rng.sample(range(1, len(text)), runs - 1))
+    return [text[a:b] for a, b in zip([0] + cuts, cuts + [len(text)])]
+
+
+# -----------------------------
+# Writers
+# -----------------------------
+def _add_runs(paragraph, text, shape, rng):
+    for i, piece in enumerate(_split_runs(text, shape.runs, rng)):
+        run = paragraph.add_run(piece)
+        run.bold = (i % 3 == 1) or None
+        run.italic = (i % 4 == 2) or None
+
+
+def _fill_table(table, depth, shape, rng):
+    for r, row in enumerate(table.rows):
+        for c, cell in enumerate(row.cells):
+            _add_runs(cell.paragraphs[0], _sentence(rng, shape), shape, rng)
+            if depth > 1 and r == 0 and c == 0:
+                _fill_table(cell.add_table(shape.rows, shape.cols), depth - 1, shape, rng)
+
+
+def write_docx(path, shape, rng):
+    doc = Document()
+    table_at = set(rng.sample(range(shape.paragraphs), min(shape.tables, shape.paragraphs)))
+    for i in range(shape.paragraphs):
+        text = _sentence(rng, shape)
+        if shape.heading_every and i % shape.heading_every == 0:
+            _add_runs(doc.add_heading("", level=1 + (i // shape.heading_every) % 3), text, shape, rng)
+        else:
+            _add_runs(doc.add_paragraph(), text, shape, rng)
+        if i in table_at:
+            _fill_table(doc.add_table(shape.rows, shape.cols), shape.table_depth, shape, rng)
+    doc.save(path)
+
+
+def write_txt(path, shape, rng):
+    lines = []
+    for i in range(shape.paragraphs):
+        lines.append(_sentence(rng, shape))
+        if shape.blank_every and i % shape.blank_every == shape.blank_every - 1:
+            lines.append("")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+def write_pdf(path, shape, rng):
+    lines = []
+    for _ in range(shape.paragraphs):
+        # Wrapped so no line runs off the page (the needle is never cut)
+        lines.extend(textwrap.wrap(_sentence(rng, shape), PDF_LINE_CHARS, break_long_words=False))
+    with fitz.open() as doc:
+        for start in range(0, len(lines), PDF_LINES_PER_PAGE):
+            page = doc.new_page()
+            y = 40
+            for line in lines[start:start + PDF_LINES_PER_PAGE]:
+                page.insert_text((36, y), line, fontsize=9)
+                y += 13
+        doc.save(path)
+
+
+WRITERS = {"txt": write_txt, "docx": write_docx, "pdf": write_pdf}
+
+
+# -----------------------------
+# Corpus
+# -----------------------------
+def generate_corpus(folder, shape):
+    """
+    Write a deterministic corpus (same shape and seed -> same files) into
+    folder and a manifest.json describing it.
+    Returns {type: [file paths]}.
+    """
+    os.makedirs(folder, exist_ok=True)
+    files = {}
+    for ext in shape.types:
+        # One generator per type: leaving a type out does not change the others
+        rng = random.Random(f"{shape.seed}-{ext}")
+        files[ext] = []
+        for n in range(shape.files):
+            path = os.path.join(folder, f"doc_{n:04d}.{ext}")
+            WRITERS[ext](path, shape, rng)
+            files[ext].append(path)
+
+    manifest = {
+        "shape": shape.as_dict(),
+        "needle": NEEDLE,
+        "files": {ext: len(paths) for ext, paths in files.items()},
+        "bytes": {ext: sum(os.path.getsize(p) for p in paths) for ext, paths in files.items()},
+    }
+    with open(os.path.join(folder, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return files
@@ -0,0 +1,197 @@
+"""
+Benchmark the find / replace / insert code paths on a synthetic corpus.
+
+    python -m benchmarks.run_benchmarks                     (from the Code folder)
+    python -m benchmarks.run_benchmarks --paragraphs 2000 --runs 12 --table-depth 3
+    python -m benchmarks.run_benchmarks --save-baseline     (after a deliberate change)
+
+A corpus of the requested shape is generated in a temp folder, then every
+stage runs in its own process, once per file type, one file at a time.
+Results are printed as JSON: per stage and type the files, MB, seconds,
+files/sec, MB/sec, peak RSS and the number of hits / edits, plus the
+ratio to the saved baseline (> 1 is faster). With --max-slowdown the
+exit code is 1 when a stage got slower than that factor.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+from benchmarks.corpus import CorpusShape, generate_corpus
+from benchmarks.stages import STAGES, run_stage
+
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+
+# -----------------------------
+# Running
+# -----------------------------
+def _in_fresh_process(name, files, scratch):
+    # spawn everywhere: a forked child would start with the parent's memory (and RSS)
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as executor:
+        return executor.submit(run_stage, name, files, scratch).result()
+
+
+def run_benchmarks(shape, stages, work_dir):
+    """
+    Generate the corpus and run the stages. Returns the list of result records.
+    """
+    corpus = generate_corpus(os.path.join(work_dir, "corpus"), shape)
+
+    # Workers use a text cache of their own, empty at the start of the run
+    os.environ["FINDAPPLY_CACHE_DIR"] = os.path.join(work_dir, "cache")
+
+    records = []
+    for name in stages:
+        _, types, edits = STAGES[name]
+        for ext in types:
+            files = corpus.get(ext)
+            if not files:
+                continue
+            scratch = os.path.join(work_dir, name, ext)
+            os.makedirs(scratch, exist_ok=True)
+            if edits:
+                files = [shutil.copy(path, scratch) for path in files]
+
+            size_mb = sum(os.path.getsize(path) for path in files) / (1024 * 1024)
+            record = {"stage": name, "type": ext, "files": len(files), "mb": round(size_mb, 3)}
+            try:
+                result = _in_fresh_process(name, files, scratch)
+            except ImportError as e:
+                record["skipped"] = str(e)
+                records.append(record)
+                print(f"{name:16} {ext:5} skipped ({e})", file=sys.stderr)
+                continue
+
+            seconds = result["seconds"]
+            record.update({
+                "seconds": round(seconds, 4),
+                "files_per_sec": round(len(files) / seconds, 2) if seconds else None,
+                "mb_per_sec": round(size_mb / seconds, 3) if seconds else None,
+                "peak_rss_mb": result["peak_rss_mb"],
+                "count": result["count"],
+            })
+            records.append(record)
+            print(f"{name:16} {ext:5} {record['files_per_sec']:>9} files/s {record['mb_per_sec']:>9} MB/s "
+                  f"{record['peak_rss_mb']} MB peak ({result['count']} hits)", file=sys.stderr)
+    return records
+
+
+# -----------------------------
+# Baseline
+# -----------------------------
+def load_baseline(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compare(records, baseline, shape):
+    """
+    Add 'vs_baseline' (files/sec now / files/sec in the baseline) to every
+    record the baseline has. Baselines of another corpus shape are not
+    compared (the file types may differ: each type is generated on its own).
+    """
+    if not baseline:
+        return False
+    same_shape = dict(baseline.get("shape", {}), types=None) == dict(shape.as_dict(), types=None)
+    if not same_shape:
+        print("Baseline was measured on another corpus shape; not compared.", file=sys.stderr)
+        return False
+    before = {(r["stage"], r["type"]): r for r in baseline["results"]}
+    for record in records:
+        old = before.get((record["stage"], record["type"]))
+        if old and old.get("files_per_sec") and record.get("files_per_sec"):
+            record["vs_baseline"] = round(record["files_per_sec"] / old["files_per_sec"], 3)
+    return True
+
+
+def machine_info():
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpus": os.cpu_count(),
+    }
+
+
+# -----------------------------
+# Command line
+# -----------------------------
+def build_parser():
+    defaults = CorpusShape()
+    parser = argparse.ArgumentParser(description="Benchmark FindReplaceTool on a synthetic corpus.")
+    parser.add_argument("--files", type=int, default=defaults.files, help="files per type")
+    parser.add_argument("--paragraphs", type=int, default=defaults.paragraphs)
+    parser.add_argument("--words", type=int, default=defaults.words, help="words per paragraph")
+    parser.add_argument("--runs", type=int, default=defaults.runs, help="runs per DOCX paragraph")
+    parser.add_argument("--tables", type=int, default=defaults.tables, help="tables per DOCX")
+    parser.add_argument("--rows", type=int, default=defaults.rows)
+    parser.add_argument("--cols", type=int, default=defaults.cols)
+    parser.add_argument("--table-depth", type=int, default=defaults.table_depth, help="1 = no nested tables")
+    parser.add_argument("--match-density", type=float, default=defaults.match_density,
+                        help="share of paragraphs holding the search word")
+    parser.add_argument("--types", default=",".join(defaults.types), help="comma separated: txt,docx,pdf")
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--stages", default=",".join(STAGES), help="comma separated, in run order")
+    parser.add_argument("--output", help="also write the JSON result here")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="baseline JSON to compare with")
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the baseline")
+    parser.add_argument("--max-slowdown", type=float, default=None,
+                        help="exit 1 when a stage is this many times slower than the baseline")
+    parser.add_argument("--keep", action="store_true", help="keep the corpus / work folder")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    shape = CorpusShape(files=args.files, paragraphs=args.paragraphs, words=args.words, runs=args.runs,
+                        tables=args.tables, rows=args.rows, cols=args.cols, table_depth=args.table_depth,
+                        match_density=args.match_density, types=args.types.split(","), seed=args.seed)
+    stages = [s for s in args.stages.split(",") if s]
+    unknown = [s for s in stages if s not in STAGES]
+    if unknown:
+        print(f"Unknown stage(s): {', '.join(unknown)} (choose from {', '.join(STAGES)})", file=sys.stderr)
+        return 2
+
+    work_dir = tempfile.mkdtemp(prefix="findapply_bench_")
+    try:
+        records = run_benchmarks(shape, stages, work_dir)
+    finally:
+        if args.keep:
+            print(f"Work folder kept: {work_dir}", file=sys.stderr)
+        else:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = {"machine": machine_info(), "shape": shape.as_dict(), "results": records}
+    compared = compare(records, None if args.save_baseline else load_baseline(args.baseline), shape)
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+        print(f"Baseline saved: {args.baseline}", file=sys.stderr)
+
+    if compared and args.max_slowdown:
+        slower = [r for r in records if r.get("vs_baseline") and r["vs_baseline"] < 1 / args.max_slowdown]
+        for r in slower:
+            print(f"Slower than baseline: {r['stage']} {r['type']} ({r['vs_baseline']}x)", file=sys.stderr)
+        if slower:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -0,0 +1,150 @@
+import os
+import re
+import sys
+import time
+
+from docx import Document
+
+from benchmarks.corpus import NEEDLE
+from utils.bulk_replace import ReplaceJob, prepare_file
+from utils.docx_replace import plain_replacement_runs
+from utils.edit_pipeline import EditJob, edit_file, ACTION_INSERT
+from utils.file_search import find_in_file
+
+
+REPLACEMENT = "Replaced"
+
+
+# -----------------------------
+# Peak memory of this process
+# -----------------------------
+def _windows_peak_rss():
+    import ctypes
+    from ctypes import wintypes
+
+    class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+        _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD),
+                    ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t),
+                    ("QuotaPeakPagedPoolUsage", ctypes.c_size_t), ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t), ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                    ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t)]
+
+    counters = PROCESS_MEMORY_COUNTERS()
+    counters.cb = ctypes.sizeof(counters)
+    kernel32, psapi = ctypes.windll.kernel32, ctypes.windll.psapi
+    kernel32.GetCurrentProcess.restype = wintypes.HANDLE
+    psapi.GetProcessMemoryInfo.argtypes = [wintypes.HANDLE, ctypes.POINTER(PROCESS_MEMORY_COUNTERS), wintypes.DWORD]
+    if not psapi.GetProcessMemoryInfo(kernel32.GetCurrentProcess(), ctypes.byref(counters), counters.cb):
+        return None
+    return counters.PeakWorkingSetSize
+
+
+def peak_rss_mb():
+    """
+    Peak resident memory of this process in MB (None when unknown).
+    """
+    try:
+        import resource
+    except ImportError:
+        peak = _windows_peak_rss() if sys.platform == "win32" else None
+        return round(peak / (1024 * 1024), 1) if peak else None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # KB on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+# -----------------------------
+# Stages (one file at a time, in this process)
+# -----------------------------
+def stage_search(files, scratch):
+    """
+    find_in_file(); run twice over the same cache for cold / cached timings.
+    """
+    return sum(find_in_file(path, NEEDLE)["file_find_count"] for path in files)
+
+
+def stage_replace(files, scratch):
+    """
+    Bulk-replace worker (prepare_file): DOCX through replace_in_docx, TXT
+    through the regex path. The new versions go to temp files that are
+    deleted again, so the corpus is not changed.
+    """
+    job = ReplaceJob(NEEDLE, REPLACEMENT, templates=plain_replacement_runs(REPLACEMENT))
+    job.backup_dir = os.path.join(scratch, "backups")
+    os.makedirs(job.backup_dir, exist_ok=True)
+
+    count = 0
+    for path in files:
+        entry = prepare_file(path, job)
+        if entry["error"]:
+            raise RuntimeError(f"{path}: {entry['error']}")
+        if entry["temp_path"]:
+            os.remove(entry["temp_path"])
+        count += entry["count"]
+    return count
+
+
+def stage_replace_inplace(files, scratch):
+    """
+    The python-docx replace of the Replace button before replace_in_docx
+    (replace_paragraph_safe_inplace over every paragraph and table cell).
+    """
+    # Imported here: file_replace needs tkinter, which a server may not have
+    from utils.file_replace import build_plain_char_formats, process_tables, replace_paragraph_safe_inplace
+
+    pattern = re.compile(re.escape(NEEDLE), re.IGNORECASE)
+    char_formats = build_plain_char_formats(REPLACEMENT)
+    out_path = os.path.join(scratch, "inplace.docx")
+
+    count = 0
+    for path in files:
+        doc = Document(path)
+        found = [0]
+
+        def handler(p):
+            found[0] += replace_paragraph_safe_inplace(p, pattern, char_formats)
+
+        for p in doc.paragraphs:
+            handler(p)
+        process_tables(doc.tables, handler)
+        if found[0]:
+            doc.save(out_path)
+        count += found[0]
+    return count
+
+
+def stage_insert(files, scratch):
+    """
+    Search + insert in one open per file (edit_file); edits the files.
+    """
+    job = EditJob(ACTION_INSERT, NEEDLE, insert_type="content", content="[*]",
+                  insert_reference="matched_content", position="before")
+    count = 0
+    for path in files:
+        entry = edit_file(path, job)
+        if entry["error"]:
+            raise RuntimeError(f"{path}: {entry['error']}")
+        count += entry["count"]
+    return count
+
+
+# name -> (function, file types it runs on, edits the files)
+STAGES = {
+    "search": (stage_search, ("txt", "docx", "pdf"), False),
+    "search_cached": (stage_search, ("txt", "docx", "pdf"), False),
+    "replace": (stage_replace, ("txt", "docx"), False),
+    "replace_inplace": (stage_replace_inplace, ("docx",), False),
+    "insert": (stage_insert, ("txt", "docx"), True),
+}
+
+
+def run_stage(name, files, scratch):
+    """
+    Time one stage over files. Runs in a fresh process, so the peak RSS
+    is that of this stage alone.
+    """
+    func = STAGES[name][0]
+    started = time.perf_counter()
+    count = func(files, scratch)
+    seconds = time.perf_counter() - started
+    return {"seconds": seconds, "count": count, "peak_rss_mb": peak_rss_mb()}
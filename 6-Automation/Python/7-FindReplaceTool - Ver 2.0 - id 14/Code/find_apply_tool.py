@@ -1,25 +1,35 @@
+import multiprocessing
 import tkinter as tk
 from tkinter import ttk
 from tabs.find_tab import FindTab  # Import the FindTab class from the other file
 
-# Create main window
-root = tk.Tk()
-root.title("FindApplyTool")
-root.geometry("600x400")
 
-# Create a tab control
-tab_control = ttk.Notebook(root)
+def main():
+    # Create main window
+    root = tk.Tk()
+    root.title("FindApplyTool")
+    root.geometry("600x400")
 
-## Start Find tab_control ##
-# Tab 1 (Find tab using the class)
-tab1 = ttk.Frame(tab_control)
-tab_control.add(tab1, text="FindApply")
-# Initialize FindTab GUI in tab1
-find_tab_gui = FindTab(tab1)
-## end Find tab_control##
+    # Create a tab control
+    tab_control = ttk.Notebook(root)
 
-# Pack the tab control
-tab_control.pack(expand=1, fill="both")
+    ## Start Find tab_control ##
+    # Tab 1 (Find tab using the class)
+    tab1 = ttk.Frame(tab_control)
+    tab_control.add(tab1, text="FindApply")
+    # Initialize FindTab GUI in tab1
+    find_tab_gui = FindTab(tab1)
+    ## end Find tab_control##
 
-# Run the app
-root.mainloop()
+    # Pack the tab control
+    tab_control.pack(expand=1, fill="both")
+
+    # Run the app
+    root.mainloop()
+
+
+# The search process pool re-imports this module in every worker (Windows spawn),
+# so the window must only be built in the main process.
+if __name__ == "__main__":
+    multiprocessing.freeze_support()  # needed for the pyinstaller .exe
+    main()
@@ -0,0 +1,241 @@
+"""
+Headless FindReplaceTool: search / replace / insert / remove-blank-lines
+from the command line, with the same options as the Find tab.
+
+Every result is written as one JSON object per line (JSON Lines):
+one "file" record per file (or "error" / "locked"), then a "summary"
+record with totals and throughput. Folders are processed in parallel
+(one worker per core unless --workers is given).
+
+Examples:
+    python find_replace_cli.py search  D:/Standards "shall" --subfolders --docx
+    python find_replace_cli.py search  D:/Standards "shall" --pdf --pdf-boxes
+    python find_replace_cli.py replace D:/Standards "colour" "color" --subfolders
+    python find_replace_cli.py insert  D:/Standards "NOTE" --insert-type newline --position after
+    python find_replace_cli.py remove-blank-lines D:/Standards "Table" --position before --all
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+from utils.engine import list_files, search, replace, insert, remove_blank_lines
+from utils.search_query import load_terms
+
+
+CONTENT_TYPES = ("all", "text", "tables", "headings", "tables_headings")
+
+
+# -----------------------------
+# Output
+# -----------------------------
+class JsonLinesWriter:
+    def __init__(self, out):
+        self.out = out
+
+    def write(self, record):
+        self.out.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.out.flush()
+
+
+def _file_bytes(files):
+    total = 0
+    for file_path in files:
+        try:
+            total += os.path.getsize(file_path)
+        except OSError:
+            pass
+    return total
+
+
+def _summary(command, files, started, **totals):
+    seconds = time.perf_counter() - started
+    size_mb = _file_bytes(files) / (1024 * 1024)
+    record = {"type": "summary", "command": command, "files": len(files)}
+    record.update(totals)
+    record.update({
+        "seconds": round(seconds, 3),
+        "files_per_sec": round(len(files) / seconds, 2) if seconds else None,
+        "mb_per_sec": round(size_mb / seconds, 2) if seconds else None,
+    })
+    return record
+
+
+# -----------------------------
+# Commands
+# -----------------------------
+def run_search(args, writer):
+    terms = load_terms(args.terms_file) if args.terms_file else None
+    files = list_files(args.path, args.subfolders, args.txt, args.docx, args.pdf)
+    started = time.perf_counter()
+
+    files_with_matches = matches = errors = 0
+    for result in search(args.path, args.find, args.case_sensitive, args.regex, args.subfolders,
+                         args.txt, args.docx, args.pdf, args.content_type, args.workers, terms,
+                         pdf_boxes=args.pdf_boxes):
+        if result["error"]:
+            errors += 1
+            writer.write({"type": "error", "path": result["file_path"], "error": result["error"]})
+            continue
+        if not result["file_find_count"]:
+            continue
+
+        files_with_matches += 1
+        matches += result["file_find_count"]
+        record = {"type": "file", "path": result["file_path"], "count": result["file_find_count"]}
+        if "term_counts" in result:
+            record["term_counts"] = result["term_counts"]
+        if not args.paths_only:
+            pages = result.get("pages")
+            rects = result.get("rects")
+            record["matches"] = []
+            for i, (line_no, line_text, spans) in enumerate(result["matches"]):
+                match = {"line": line_no, "text": line_text, "spans": [list(s) for s in spans]}
+                if pages:
+                    match["page"], match["line_in_page"] = pages[i]
+                if rects:
+                    # One [x0, y0, x1, y1] (PDF points) or null per span
+                    match["rects"] = rects[i]
+                record["matches"].append(match)
+        writer.write(record)
+
+    writer.write(_summary("search", files, started, files_with_matches=files_with_matches,
+                          matches=matches, errors=errors))
+    return 1 if errors else 0
+
+
+def _write_edit_summary(command, summary, files, started, writer):
+    for file_path, count in summary["results"]:
+        writer.write({"type": "file", "path": file_path, "count": count})
+    for locked in summary["locked"]:
+        # bulk_replace reports (path, reason), the edit pipeline paths only
+        file_path = locked[0] if isinstance(locked, tuple) else locked
+        writer.write({"type": "locked", "path": file_path})
+    for file_path, error in summary["errors"]:
+        writer.write({"type": "error", "path": file_path, "error": error})
+
+    totals = {
+        "files_changed": len(summary["results"]),
+        "changes": sum(count for _, count in summary["results"]),
+        "locked": len(summary["locked"]),
+        "errors": len(summary["errors"]),
+    }
+    if "skipped" in summary:
+        totals["skipped"] = len(summary["skipped"])
+        totals["journal"] = summary["journal"]
+    writer.write(_summary(command, files, started, **totals))
+    return 1 if summary["locked"] or summary["errors"] else 0
+
+
+def run_replace(args, writer):
+    files = list_files(args.path, args.subfolders, args.txt, args.docx, args.pdf)
+    started = time.perf_counter()
+    summary = replace(files, args.find, args.replace, args.case_sensitive, args.regex, args.content_type,
+                      apply_heading_format=args.apply_heading_format, workers=args.workers)
+    return _write_edit_summary("replace", summary, files, started, writer)
+
+
+def run_insert(args, writer):
+    files = list_files(args.path, args.subfolders, args.txt, args.docx, args.pdf)
+    started = time.perf_counter()
+    summary = insert(files, args.find, args.case_sensitive, args.regex, args.content_type,
+                     insert_type=args.insert_type, content=args.content, repeat=args.repeat,
+                     position=args.position, line_offset=args.line_offset,
+                     insert_reference=args.reference, workers=args.workers)
+    return _write_edit_summary("insert", summary, files, started, writer)
+
+
+def run_remove_blank_lines(args, writer):
+    files = list_files(args.path, args.subfolders, args.txt, args.docx, args.pdf)
+    started = time.perf_counter()
+    summary = remove_blank_lines(files, args.find, args.case_sensitive, args.regex, args.content_type,
+                                 position=args.position, remove_all=args.all, workers=args.workers)
+    return _write_edit_summary("remove-blank-lines", summary, files, started, writer)
+
+
+# -----------------------------
+# Arguments
+# -----------------------------
+def build_parser():
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("path", help="file or folder")
+    common.add_argument("--subfolders", action="store_true", help="include subfolders")
+    common.add_argument("--txt", action="store_true", help="only .txt files (combinable with --docx / --pdf)")
+    common.add_argument("--docx", action="store_true", help="only .docx files")
+    common.add_argument("--pdf", action="store_true", help="only .pdf files")
+    common.add_argument("--case-sensitive", action="store_true")
+    common.add_argument("--regex", action="store_true", help="Find text is a regular expression")
+    common.add_argument("--content-type", choices=CONTENT_TYPES, default="all",
+                        help="DOCX content to work on (default: all)")
+    common.add_argument("--workers", type=int, default=None,
+                        help="worker processes (default: one per CPU core)")
+    common.add_argument("--output", help="write the JSON Lines here instead of stdout")
+
+    parser = argparse.ArgumentParser(description="FindReplaceTool without the GUI (JSON Lines output).")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    p = commands.add_parser("search", parents=[common], help="search files")
+    p.add_argument("find", nargs="?", default="", help="text to find")
+    p.add_argument("--terms-file", help="search every term of this file (one per line) in one pass")
+    p.add_argument("--paths-only", action="store_true", help="only paths and counts, no matched lines")
+    p.add_argument("--pdf-boxes", action="store_true",
+                   help="PDF matches also get the box of each hit on its page (\"rects\")")
+    p.set_defaults(run=run_search)
+
+    p = commands.add_parser("replace", parents=[common], help="replace in TXT / DOCX files (journaled)")
+    p.add_argument("find")
+    p.add_argument("replace", help="replacement text (may be empty)")
+    p.add_argument("--apply-heading-format", action="store_true",
+                   help="give replaced headings Word's Heading formatting")
+    p.set_defaults(run=run_replace)
+
+    p = commands.add_parser("insert", parents=[common], help="insert at every match")
+    p.add_argument("find")
+    p.add_argument("--insert-type", choices=("space", "newline", "content"), default="space")
+    p.add_argument("--content", default="", help="text inserted with --insert-type content")
+    p.add_argument("--repeat", type=int, default=1)
+    p.add_argument("--position", choices=("before", "after"), default="before")
+    p.add_argument("--line-offset", type=int, default=0, help="TXT: insert this many lines from the match")
+    p.add_argument("--reference", choices=("matched_line", "matched_content"), default="matched_line",
+                   help="DOCX: insert at the paragraph start/end or at each match")
+    p.set_defaults(run=run_insert)
+
+    p = commands.add_parser("remove-blank-lines", parents=[common], help="remove blank lines next to matches")
+    p.add_argument("find")
+    p.add_argument("--position", choices=("before", "after"), default="before")
+    p.add_argument("--all", action="store_true", help="remove every blank line there, not just one")
+    p.set_defaults(run=run_remove_blank_lines)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if not os.path.exists(args.path):
+        print(f"Path not found: {args.path}", file=sys.stderr)
+        return 2
+
+    if args.output:
+        out = open(args.output, "w", encoding="utf-8")
+    else:
+        out = sys.stdout
+        if hasattr(out, "reconfigure"):
+            out.reconfigure(encoding="utf-8")   # Windows consoles default to a code page
+    try:
+        return args.run(args, JsonLinesWriter(out))
+    except ValueError as e:
+        # Empty / invalid Find pattern
+        print(e, file=sys.stderr)
+        return 2
+    finally:
+        if args.output:
+            out.close()
+
+
+# Worker processes re-import this module (Windows spawn), so only the
+# main process parses arguments.
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -1,5 +1,6 @@
+import os
 import tkinter as tk
-from tkinter import colorchooser, font
+from tkinter import colorchooser, font, ttk
 
 class FindTabGUI:
     """
@@ -16,7 +17,14 @@ class FindTabGUI:
                 paths_only_callback=None,
                 insert_callback=None,
                 remove_line_callback=None,
-                remove_all_line_callback=None):
+                remove_all_line_callback=None,
+                build_index_callback=None,
+                cancel_callback=None,
+                prev_file_callback=None,
+                next_file_callback=None,
+                jump_file_callback=None,
+                bulk_replace_callback=None,
+                rollback_callback=None):
         
         self.parent = parent
         self.browse_callback = browse_callback
@@ -29,6 +37,13 @@ class FindTabGUI:
         self.insert_callback = insert_callback
         self.remove_line_callback = remove_line_callback
         self.remove_all_line_callback = remove_all_line_callback
+        self.build_index_callback = build_index_callback
+        self.cancel_callback = cancel_callback
+        self.prev_file_callback = prev_file_callback
+        self.next_file_callback = next_file_callback
+        self.jump_file_callback = jump_file_callback
+        self.bulk_replace_callback = bulk_replace_callback
+        self.rollback_callback = rollback_callback
 
 
         # ------------------ Variables ------------------
@@ -40,6 +55,7 @@ class FindTabGUI:
         self.doc_var = tk.BooleanVar()
         self.txt_var = tk.BooleanVar()
         self.pdf_var = tk.BooleanVar()
+        self.workers_var = tk.IntVar(value=os.cpu_count() or 1)  # Search processes
 
         # Replace formatting
         self.font_family_var = tk.StringVar(value="Arial")
@@ -108,6 +124,10 @@ class FindTabGUI:
         tk.Checkbutton(parent, text="Search Subfolders", variable=self.subfolders_var).grid(row=5, column=1, sticky="w")
         tk.Checkbutton(parent, text="Enable Regex", variable=self.enable_regex_var).grid(row=5, column=2, sticky="w")
         tk.Checkbutton(parent, text="Apply Default Heading Format", variable=self.apply_heading_format_var).grid(row=5, column=3, sticky="w")
+        workers_frame = tk.Frame(parent)
+        workers_frame.grid(row=5, column=4, sticky="w")
+        tk.Label(workers_frame, text="Workers").pack(side="left")
+        tk.Spinbox(workers_frame, from_=1, to=64, width=4, textvariable=self.workers_var).pack(side="left", padx=5)
 
         # ---------------- 4. File Types ----------------
         tk.Label(parent, text="4. File Types", font=("Arial", 12, "bold")).grid(row=6, column=0, sticky="w", padx=10)
@@ -134,6 +154,8 @@ class FindTabGUI:
         tk.Button(find_buttons, text="Run Search", command=self.run_callback).pack(side="left")
         tk.Button(find_buttons, text="Matches Only", command=self.matches_only_callback).pack(side="left", padx=5)
         tk.Button(find_buttons, text="Paths Only", command=self.paths_only_callback).pack(side="left", padx=5)
+        tk.Button(find_buttons, text="Build / Update Index", command=self.build_index_callback).pack(side="left", padx=5)
+        tk.Button(find_buttons, text="Cancel", command=self.cancel_callback).pack(side="left", padx=5)
 
         # ---------------- 7. Replace ----------------
         tk.Label(parent, text="7. Replace", font=("Arial", 12, "bold")).grid(row=13, column=0, sticky="w", padx=10)
@@ -143,6 +165,8 @@ class FindTabGUI:
         replace_buttons.grid(row=15, column=0, columnspan=5, sticky="w", padx=10)
         tk.Button(replace_buttons, text="Apply Replace", command=self.replace_callback).pack(side="left")
         tk.Button(replace_buttons, text="Paste", command=self.paste_callback).pack(side="left", padx=5)
+        tk.Button(replace_buttons, text="Bulk Replace (Resumable)", command=self.bulk_replace_callback).pack(side="left", padx=5)
+        tk.Button(replace_buttons, text="Rollback Bulk Replace", command=self.rollback_callback).pack(side="left", padx=5)
 
         # ---------------- 8. Insert ----------------
         tk.Label(parent, text="8. Insert Content (Applied to Found Matches)", font=("Arial", 12, "bold")).grid(
@@ -261,8 +285,19 @@ class FindTabGUI:
         self.results_vscroll.config(command=self.text_results.yview)
         self.results_hscroll.config(command=self.text_results.xview)
 
-        # ---- Clear Button ----
-        tk.Button(parent, text="Clear Results", command=self.clear_callback).grid(row=28, column=0, columnspan=5, sticky="w", padx=10)
+        # ---- Clear Button / Jump to File ----
+        results_buttons = tk.Frame(parent)
+        results_buttons.grid(row=28, column=0, columnspan=5, sticky="w", padx=10)
+        tk.Button(results_buttons, text="Clear Results", command=self.clear_callback).pack(side="left")
+        tk.Button(results_buttons, text="< Prev File", command=self.prev_file_callback).pack(side="left", padx=(15, 5))
+        tk.Button(results_buttons, text="Next File >", command=self.next_file_callback).pack(side="left", padx=5)
+        tk.Label(results_buttons, text="Jump to file:").pack(side="left", padx=(10, 5))
+        self.jump_file_combo = ttk.Combobox(results_buttons, state="readonly", width=80)
+        self.jump_file_combo.pack(side="left")
+        self.jump_file_combo.bind(
+            "<<ComboboxSelected>>",
+            lambda event: self.jump_file_callback(self.jump_file_combo.current()) if self.jump_file_callback else None
+        )
 
         # ---------------- Status ----------------
         self.status_label = tk.Label(parent, text="", fg="blue")
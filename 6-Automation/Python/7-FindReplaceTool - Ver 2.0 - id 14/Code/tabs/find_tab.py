@@ -1,10 +1,14 @@
 from tkinter import filedialog
 from gui.find_tab_gui import FindTabGUI
-from utils.file_search import search_path_insert, search_path, display_results, run_search_file_paths_only
-from utils.insert_utils import insert_all_files
-from utils.remove_utils import remove_blank_line_at_matches
+from utils.search_runner import BackgroundSearch, BackgroundIndexBuild
+from utils.results_view import ResultsView
+from utils.edit_pipeline import (
+    build_edit_job, run_edit_process,
+    ACTION_INSERT, ACTION_REMOVE_LINE, ACTION_REMOVE_ALL_LINES,
+)
 from utils.paste_word_text import paste_word_selection_into_text
-from utils.file_replace import run_replace_process
+from utils.file_replace import run_replace_process, run_bulk_replace_process, run_rollback_process
+from utils.search_query import SearchQuery
 import tkinter.messagebox as messagebox
 from docx.text.paragraph import Paragraph
 from docx import Document
@@ -35,11 +39,20 @@ class FindTab:
             paths_only_callback=self.run_search_file_paths_only,
             insert_callback=self.apply_insert,
             remove_line_callback=self.apply_remove_line,
-            remove_all_line_callback=self.apply_all_remove_line
-
+            remove_all_line_callback=self.apply_all_remove_line,
+            build_index_callback=self.build_index,
+            cancel_callback=self.cancel_search,
+            prev_file_callback=self.prev_file,
+            next_file_callback=self.next_file,
+            jump_file_callback=self.jump_to_file,
+            bulk_replace_callback=self.apply_bulk_replace,
+            rollback_callback=self.rollback_bulk_replace
         )
         
         self.selected_path_type = None
+        self.active_search = None
+        self.active_index = None
+        self.results_view = ResultsView(self.gui)
 
         # -------------------- Bind Ctrl+V / Shift+Insert to custom paste only --------------------
         replace_widget = self.gui.replace_text
@@ -77,15 +90,46 @@ class FindTab:
             self.gui.entry_path.delete(0, "end")
             self.gui.entry_path.insert(0, path)
 
+    def get_workers(self):
+        """
+        Number of search processes chosen in the GUI (falls back to 1).
+        """
+        try:
+            return max(1, int(self.gui.workers_var.get()))
+        except Exception:
+            return 1
+
+    def validate_query(self, search_text):
+        """
+        Check the Find pattern once, before any file is read.
+        """
+        query = SearchQuery(search_text, self.gui.case_sensitive_var.get(), self.gui.enable_regex_var.get())
+        if query.error:
+            messagebox.showerror("Invalid Regex", f"The Find pattern is not a valid regex:\n{query.error}")
+            return False
+        return True
+
     # -------------------- Run Search --------------------
-    def run_search(self):
+    def start_search(self, mode):
+        """
+        Run the search on a background thread; results stream into the
+        results box and the status line shows files scanned / matches.
+        """
         search_text = self.gui.entry_search_text.get()
-        if not search_text:
-            from tkinter import messagebox
+        if not search_text or (mode == "paths" and not search_text.strip()):
             messagebox.showwarning("Empty Find Field", "The Find field is empty.")
             return
+        if not self.validate_query(search_text):
+            return
+
+        # Only one search writes to the results box at a time
+        if self.active_search and self.active_search.running:
+            self.active_search.cancel(detach=True)
 
-        results = search_path(
+        self.active_search = BackgroundSearch(
+            self.gui,
+            self.results_view,
+            mode=mode,
             path=self.gui.entry_path.get(),
             search_text=search_text,
             selected_type=self.gui.selected_type.get(),
@@ -95,55 +139,62 @@ class FindTab:
             txt_only=self.gui.txt_var.get(),
             doc_only=self.gui.doc_var.get(),
             pdf_only=self.gui.pdf_var.get(),
-            content_type=self.gui.content_type_var.get()
+            content_type=self.gui.content_type_var.get(),
+            workers=self.get_workers()
         )
+        self.active_search.start()
 
-        display_results(self.gui, results)
+    def run_search(self):
+        self.start_search("results")
 
-    
     def run_search_matches_only(self):
-        search_text = self.gui.entry_search_text.get()
-        if not search_text:
-            from tkinter import messagebox
-            messagebox.showwarning("Empty Find Field", "The Find field is empty.")
-            return
+        self.start_search("matches_only")
 
-        # Run the search using the refactored function
-        results = search_path(
-            path=self.gui.entry_path.get(),
-            search_text=search_text,
-            selected_type=self.gui.selected_type.get(),
-            case_sensitive=self.gui.case_sensitive_var.get(),
-            use_regex=self.gui.enable_regex_var.get(),
-            search_subfolders=self.gui.subfolders_var.get(),
-            txt_only=self.gui.txt_var.get(),
-            doc_only=self.gui.doc_var.get(),
-            pdf_only=self.gui.pdf_var.get(),
-            content_type=self.gui.content_type_var.get()
-        )
+    def run_search_file_paths_only(self):
+        self.start_search("paths")
 
-        # Filter results to only include files with matches
-        matches_only = [r for r in results if r["file_find_count"] > 0]
+    def cancel_search(self):
+        if self.active_search and self.active_search.running:
+            self.active_search.cancel()
+            self.gui.status_label.config(text="Cancelling search...", fg="orange")
 
-        # Display matches only
-        display_results(self.gui, matches_only)
+    def release_results(self):
+        """
+        Stop any running search and hand the results box back to plain text
+        (replace / insert / remove reports write to it directly).
+        """
+        if self.active_search and self.active_search.running:
+            self.active_search.cancel(detach=True)
+        self.results_view.detach()
 
+    # -------------------- Jump to File --------------------
+    def prev_file(self):
+        self.results_view.prev_file()
 
+    def next_file(self):
+        self.results_view.next_file()
 
-    # In your FindTab class
-    def run_search_file_paths_only(self):
-        run_search_file_paths_only(
-            gui=self.gui,
-            path=self.gui.entry_path.get(),
-            search_text=self.gui.entry_search_text.get(),
-            selected_type=self.gui.selected_type.get(),
-            case_sensitive=self.gui.case_sensitive_var.get(),
-            use_regex=self.gui.enable_regex_var.get(),
-            search_subfolders=self.gui.subfolders_var.get(),
-            txt_only=self.gui.txt_var.get(),
-            doc_only=self.gui.doc_var.get(),
-            pdf_only=self.gui.pdf_var.get()
-        )
+    def jump_to_file(self, position):
+        self.results_view.jump_to_file(position)
+
+    # -------------------- Trigram Index --------------------
+    def build_index(self):
+        """
+        Build (or refresh) the trigram index of the selected folder.
+        Later literal searches in this folder or below use it automatically.
+        """
+        path = self.gui.entry_path.get()
+        if self.gui.selected_type.get() != "folder" or not os.path.isdir(path):
+            messagebox.showwarning("Select a Folder", "Choose a folder to build an index for.")
+            return
+
+        if self.active_index and self.active_index.running:
+            messagebox.showinfo("Indexing", "The index is already being built.")
+            return
+
+        # Built on a worker thread; the status line shows the progress
+        self.active_index = BackgroundIndexBuild(self.gui, path)
+        self.active_index.start()
 
     def paste_text_to_replace(self):
         # Show loading message
@@ -163,6 +214,7 @@ class FindTab:
             messagebox.showwarning("Empty Find Field", "The Find field is empty.")
             return
 
+        self.release_results()
         run_replace_process(
             gui=self.gui,
             path=self.gui.entry_path.get(),
@@ -179,7 +231,51 @@ class FindTab:
         )
 
 
+    def replace_options(self):
+        """
+        Path / filter / match options shared by the replace actions.
+        """
+        return dict(
+            path=self.gui.entry_path.get(),
+            is_file=(self.gui.selected_type.get() == "file"),
+            find_text=self.gui.entry_search_text.get(),
+            tk_replace_widget=self.gui.replace_text,
+            case_sensitive=self.gui.case_sensitive_var.get(),
+            regex=self.gui.enable_regex_var.get(),
+            include_subfolders=self.gui.subfolders_var.get(),
+            txt=self.gui.txt_var.get(),
+            doc=self.gui.doc_var.get(),
+            pdf=self.gui.pdf_var.get(),
+            content_type=self.gui.content_type_var.get()
+        )
+
+    def apply_bulk_replace(self):
+        if self.gui.entry_search_text.get() == "":
+            messagebox.showwarning("Empty Find Field", "The Find field is empty.")
+            return
+        if not self.validate_query(self.gui.entry_search_text.get()):
+            return
+
+        self.release_results()
+        summary = run_bulk_replace_process(gui=self.gui, workers=self.get_workers(), **self.replace_options())
+
+        if summary["locked"]:
+            messagebox.showwarning(
+                "Files Are Open",
+                "Please close the following files and run Bulk Replace again "
+                "(finished files are skipped):\n\n" +
+                "\n".join(path for path, _ in summary["locked"])
+            )
+
+    def rollback_bulk_replace(self):
+        if not messagebox.askyesno("Rollback Bulk Replace",
+                                   "Restore the files changed by the bulk replace made with the current options?"):
+            return
+        self.release_results()
+        run_rollback_process(gui=self.gui, **self.replace_options())
+
     def clear_results(self):
+        self.release_results()
         self.gui.text_results.config(state="normal")
         self.gui.text_results.delete("1.0", "end")
         self.gui.text_results.config(state="disabled")
@@ -188,9 +284,11 @@ class FindTab:
     def apply_insert(self):
 
         gui = self.gui
+        self.release_results()
 
-
-        total, per_file, locked_files = insert_all_files(gui, search_path_insert)
+        total, per_file, locked_files = run_edit_process(
+            gui, build_edit_job(gui, ACTION_INSERT), self.get_workers()
+        )
 
         # ================= LOCKED FILES DIALOG =================
         if locked_files:
@@ -227,219 +325,22 @@ class FindTab:
                 )
 
     def apply_remove_line(self):
-        gui = self.gui
-        path = gui.entry_path.get()
-        search_text = gui.entry_search_text.get()
-        position = gui.Remvoed_position_var.get()  # before / after
-        case_sensitive = gui.case_sensitive_var.get()
-        use_regex = gui.enable_regex_var.get()
-        search_subfolders = gui.subfolders_var.get()
-        txt_only = gui.txt_var.get()
-        doc_only = gui.doc_var.get()
-        pdf_only = gui.pdf_var.get()
-        content_type = gui.content_type_var.get()
-
-        from utils.file_search import search_path_insert
-        from utils.remove_utils import remove_blank_line_at_matches
-        from docx import Document
-        import os
-
-        locked_files = []
-        total_removed = 0
-        per_file_removed = []
-
-        results = search_path_insert(
-            path=path,
-            search_text=search_text,
-            selected_type=gui.selected_type.get(),
-            case_sensitive=case_sensitive,
-            use_regex=use_regex,
-            search_subfolders=search_subfolders,
-            txt_only=txt_only,
-            doc_only=doc_only,
-            pdf_only=pdf_only,
-            content_type=content_type
-        )
-
-        if not results:
-            gui.text_results.config(state="normal")
-            gui.text_results.delete("1.0", "end")
-            gui.text_results.insert("end", "No matches found.\n")
-            gui.text_results.config(state="disabled")
-            gui.status_label.config(text="No files found", fg="orange")
-            return
-
-        for result in results:
-            if result.get("unsupported") or result.get("error"):
-                continue
-
-            matches = result.get("matches", [])
-            if not matches:
-                continue
-
-            file_path = result["file_path"]
-            ext = os.path.splitext(file_path)[1].lower()
-            removed_count = 0
-
-            try:
-                if ext == ".txt":
-                    with open(file_path, "r", encoding="utf-8") as f:
-                        text = f.read()
-
-                    removed_count, new_text = remove_blank_line_at_matches(
-                        text,
-                        matches,
-                        position
-                    )
-
-                    if removed_count > 0:
-                        with open(file_path, "w", encoding="utf-8") as f:
-                            f.write(new_text)
-
-                elif ext == ".docx":
-                    doc = Document(file_path)
-
-                    removed_count, doc = remove_blank_line_at_matches(
-                        doc,
-                        matches,
-                        position
-                    )
-
-                    if removed_count > 0:
-                        doc.save(file_path)
-
-            except PermissionError:
-                locked_files.append(file_path)
-                continue
-            except Exception as e:
-                print(f"Error processing file {file_path}: {e}")
-                continue
-
-            if removed_count > 0:
-                total_removed += removed_count
-                per_file_removed.append((file_path, removed_count))
-
-        gui.text_results.config(state="normal")
-        gui.text_results.delete("1.0", "end")
-
-        if not per_file_removed:
-            gui.text_results.insert("end", "No blank lines removed.\n")
-            gui.status_label.config(text="No blank lines removed", fg="orange")
-        else:
-            for file_path, count in per_file_removed:
-                gui.text_results.insert(
-                    "end",
-                    f"{file_path} ({count} blank line(s) removed)\n"
-                )
-            gui.status_label.config(
-                text=f"Blank lines removed: {total_removed}",
-                fg="green"
-            )
-
-        gui.text_results.config(state="disabled")
-
-        if locked_files:
-            from tkinter import messagebox
-            messagebox.showwarning(
-                "Files Are Open",
-                "Please close the following files and try again:\n\n" +
-                "\n".join(locked_files)
-            )
-
-        print(f"[DEBUG] TOTAL removed: {total_removed}")
+        self.apply_remove(ACTION_REMOVE_LINE)
 
     def apply_all_remove_line(self):
-        gui = self.gui
-        path = gui.entry_path.get()
-        search_text = gui.entry_search_text.get()
-        position = gui.Remvoed_position_var.get()  # before / after
-        case_sensitive = gui.case_sensitive_var.get()
-        use_regex = gui.enable_regex_var.get()
-        search_subfolders = gui.subfolders_var.get()
-        txt_only = gui.txt_var.get()
-        doc_only = gui.doc_var.get()
-        pdf_only = gui.pdf_var.get()
-        content_type = gui.content_type_var.get()
-
-        from utils.file_search import search_path_insert
-        from utils.remove_utils import remove_all_blank_lines_at_matches
-        from docx import Document
-        import os
-
-        locked_files = []
-        total_removed = 0
-        per_file_removed = []
-
-        results = search_path_insert(
-            path=path,
-            search_text=search_text,
-            selected_type=gui.selected_type.get(),
-            case_sensitive=case_sensitive,
-            use_regex=use_regex,
-            search_subfolders=search_subfolders,
-            txt_only=txt_only,
-            doc_only=doc_only,
-            pdf_only=pdf_only,
-            content_type=content_type
-        )
+        self.apply_remove(ACTION_REMOVE_ALL_LINES)
 
-        if not results:
-            gui.text_results.config(state="normal")
-            gui.text_results.delete("1.0", "end")
-            gui.text_results.insert("end", "No matches found.\n")
-            gui.text_results.config(state="disabled")
-            gui.status_label.config(text="No files found", fg="orange")
-            return
-
-        for result in results:
-            if result.get("unsupported") or result.get("error"):
-                continue
-
-            matches = result.get("matches", [])
-            if not matches:
-                continue
-
-            file_path = result["file_path"]
-            ext = os.path.splitext(file_path)[1].lower()
-            removed_count = 0
-
-            try:
-                if ext == ".txt":
-                    with open(file_path, "r", encoding="utf-8") as f:
-                        text = f.read()
-
-                    removed_count, new_text = remove_all_blank_lines_at_matches(
-                        text,
-                        matches,
-                        position
-                    )
-
-                    if removed_count > 0:
-                        with open(file_path, "w", encoding="utf-8") as f:
-                            f.write(new_text)
-
-                elif ext == ".docx":
-                    doc = Document(file_path)
-
-                    removed_count, doc = remove_all_blank_lines_at_matches(
-                        doc,
-                        matches,
-                        position
-                    )
-
-                    if removed_count > 0:
-                        doc.save(file_path)
-
-            except PermissionError:
-                locked_files.append(file_path)
-                continue
-            except Exception as e:
-                print(f"Error processing file {file_path}: {e}")
-                continue
+    def apply_remove(self, action):
+        """
+        Remove blank lines next to the matches (one per match, or all of them).
+        Each file is searched and edited in a single open, in a worker pool.
+        """
+        gui = self.gui
+        self.release_results()
 
-            if removed_count > 0:
-                total_removed += removed_count
-                per_file_removed.append((file_path, removed_count))
+        total_removed, per_file_removed, locked_files = run_edit_process(
+            gui, build_edit_job(gui, action), self.get_workers()
+        )
 
         gui.text_results.config(state="normal")
         gui.text_results.delete("1.0", "end")
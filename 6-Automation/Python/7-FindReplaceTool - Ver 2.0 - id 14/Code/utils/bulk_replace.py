@@ -0,0 +1,398 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from lxml import etree
+
+from utils.docx_replace import replace_in_docx
+from utils.text_cache import CACHE_DIR
+from utils.txt_scan import decode_txt, encode_txt
+
+
+# -----------------------------
+# Settings
+# -----------------------------
+JOURNAL_DIR = os.path.join(CACHE_DIR, "journals")
+HASH_CHUNK = 1024 * 1024
+
+# Journal states of a file
+STATE_UNCHANGED = "unchanged"    # searched, nothing to replace
+STATE_PREPARED = "prepared"      # new version written to a temp file, about to be swapped in
+STATE_DONE = "done"              # new version in place
+STATE_FAILED = "failed"          # swap failed (file locked / changed meanwhile)
+STATE_ROLLED_BACK = "rolled_back"
+
+
+def file_hash(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _norm(path):
+    return os.path.normcase(os.path.abspath(path))
+
+
+def _temp_next_to(path):
+    fd, tmp_path = tempfile.mkstemp(suffix=".tmp", prefix="~replace_",
+                                    dir=os.path.dirname(os.path.abspath(path)))
+    os.close(fd)
+    return tmp_path
+
+
+def _run_temp_for(path, run_key):
+    """
+    Temp file of `path` in the bulk replace run `run_key`. The name is fixed
+    per run, so a later run (or a rollback) can find and remove the temp
+    files a crash left behind, also the ones never journaled.
+    """
+    name = hashlib.sha1(_norm(path).encode("utf-8")).hexdigest()[:12]
+    return os.path.join(os.path.dirname(os.path.abspath(path)), f"~replace_{run_key[:12]}_{name}.tmp")
+
+
+def _remove_quietly(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+# -----------------------------
+# Job (pickled once per worker task)
+# -----------------------------
+class ReplaceJob:
+    """
+    Everything a worker needs to replace one file.
+    DOCX replacement runs travel as XML bytes (lxml elements do not pickle)
+    and are parsed again once per worker process.
+    """
+    def __init__(self, find_text, replace_text, case_sensitive=False, regex=False,
+                 templates=(), heading_templates=(), content_type="all",
+                 apply_heading_format=False):
+        self.find_text = find_text
+        self.replace_text = replace_text
+        self.case_sensitive = case_sensitive
+        self.regex = regex
+        self.template_xml = [etree.tostring(t) for t in templates]
+        self.heading_template_xml = [etree.tostring(t) for t in heading_templates]
+        self.content_type = content_type
+        self.apply_heading_format = apply_heading_format
+        self.backup_dir = None
+        self.run_key = None      # set by bulk_replace: temp files get names fixed per run
+        self._runs = None
+
+    @property
+    def pattern(self):
+        flags = 0 if self.case_sensitive else re.IGNORECASE
+        return re.compile(self.find_text if self.regex else re.escape(self.find_text), flags)
+
+    def replacement_runs(self):
+        if self._runs is None:
+            self._runs = ([etree.fromstring(x) for x in self.template_xml],
+                          [etree.fromstring(x) for x in self.heading_template_xml])
+        return self._runs
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_runs"] = None
+        return state
+
+    def key(self, files):
+        """
+        Identity of a run: the same files and options map to the same journal,
+        so running it again resumes instead of starting over.
+        """
+        data = json.dumps([sorted(_norm(f) for f in files), self.find_text, self.replace_text,
+                           self.case_sensitive, self.regex, self.content_type, self.apply_heading_format,
+                           [x.decode("utf-8") for x in self.template_xml]])
+        return hashlib.sha1(data.encode("utf-8")).hexdigest()
+
+
+# -----------------------------
+# Worker: build the new version of one file next to it
+# -----------------------------
+def _replace_txt(file_path, job, out_path):
+    """
+    Replace in a TXT file of any encoding (see txt_scan.decode_txt); the new
+    version keeps the file's encoding, BOM, line breaks and undecodable bytes.
+    """
+    with open(file_path, "rb") as f:
+        content, bom, codec = decode_txt(f.read())
+    new_content, count = job.pattern.subn(job.replace_text, content)
+    if count:
+        with open(out_path, "wb") as f:
+            f.write(encode_txt(new_content, bom, codec))
+    return count
+
+
+def prepare_file(file_path, job):
+    """
+    Write the replaced version of file_path to a temp file in the same folder
+    and back up the original. The file itself is not touched here.
+    Returns a journal entry dict (temp_path is None when nothing matched).
+    """
+    entry = {"path": file_path, "original_hash": None, "new_hash": None, "count": 0,
+             "backup": None, "temp_path": None, "error": None}
+    ext = os.path.splitext(file_path)[1].lower()
+    if ext not in (".txt", ".docx"):
+        entry["error"] = "PDF replace not supported" if ext == ".pdf" else "Unsupported file type"
+        return entry
+
+    tmp_path = None
+    try:
+        entry["original_hash"] = file_hash(file_path)
+        tmp_path = _run_temp_for(file_path, job.run_key) if job.run_key else _temp_next_to(file_path)
+
+        if ext == ".txt":
+            count = _replace_txt(file_path, job, tmp_path)
+        else:
+            templates, heading_templates = job.replacement_runs()
+            count = replace_in_docx(file_path, job.pattern, templates,
+                                    content_type=job.content_type,
+                                    apply_heading_format=job.apply_heading_format,
+                                    heading_templates=heading_templates,
+                                    out_path=tmp_path)
+
+        entry["count"] = count
+        if not count:
+            _remove_quietly(tmp_path)
+            return entry
+
+        shutil.copymode(file_path, tmp_path)
+        entry["new_hash"] = file_hash(tmp_path)
+        entry["temp_path"] = tmp_path
+
+        # Originals are kept by content hash, so a rollback can restore them
+        backup = os.path.join(job.backup_dir, entry["original_hash"])
+        if not os.path.exists(backup):
+            shutil.copyfile(file_path, backup + ".part")
+            os.replace(backup + ".part", backup)
+        entry["backup"] = backup
+        return entry
+
+    except Exception as e:
+        if tmp_path:
+            _remove_quietly(tmp_path)
+        entry["error"] = str(e)
+        entry["temp_path"] = None
+        return entry
+
+
+# -----------------------------
+# Journal
+# -----------------------------
+class ReplaceJournal:
+    """
+    Append-only JSON Lines log of one bulk replace run:
+    one record per state change of a file (path, hashes, count, state).
+    Every record is flushed to disk before the next step, so after a crash
+    the last record of each file tells what happened to it.
+    """
+    def __init__(self, folder):
+        self.folder = folder
+        self.path = os.path.join(folder, "journal.jsonl")
+        self.backup_dir = os.path.join(folder, "backups")
+        os.makedirs(self.backup_dir, exist_ok=True)
+        self.entries = {}
+
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # torn last line after a crash
+                    self.entries[_norm(record["path"])] = record
+
+    @classmethod
+    def for_key(cls, key):
+        return cls(os.path.join(JOURNAL_DIR, key))
+
+    def record(self, entry, state):
+        record = {k: entry.get(k) for k in ("path", "original_hash", "new_hash", "count", "backup", "temp_path")}
+        record["state"] = state
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self.entries[_norm(entry["path"])] = record
+
+    def is_finished(self, file_path):
+        """
+        True when the journal already covers the file as it is on disk now.
+        """
+        record = self.entries.get(_norm(file_path))
+        if not record or record["state"] not in (STATE_UNCHANGED, STATE_PREPARED, STATE_DONE):
+            return False
+        try:
+            current = file_hash(file_path)
+        except OSError:
+            return False
+
+        if record["state"] == STATE_UNCHANGED:
+            return current == record["original_hash"]
+        if current == record["new_hash"]:
+            if record["state"] == STATE_PREPARED:
+                self.record(record, STATE_DONE)  # swapped in just before a crash
+            return True
+        return False
+
+    def remove_temp_files(self, files, run_key):
+        """
+        Delete the temp files an interrupted run left next to the files:
+        the ones journaled but never swapped in, and the ones a worker was
+        still writing (found by their per-run name).
+        """
+        temp_paths = {record["temp_path"] for record in self.entries.values()
+                      if record.get("temp_path") and record["state"] != STATE_DONE}
+        temp_paths.update(_run_temp_for(f, run_key) for f in files)
+        for tmp_path in temp_paths:
+            if os.path.exists(tmp_path):
+                _remove_quietly(tmp_path)
+
+    def remove(self):
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+
+# -----------------------------
+# Bulk replace / rollback
+# -----------------------------
+def _commit(entry, journal):
+    """
+    Swap a prepared temp file into place. Returns None or an error text.
+    """
+    path, tmp_path = entry["path"], entry["temp_path"]
+    try:
+        if file_hash(path) != entry["original_hash"]:
+            _remove_quietly(tmp_path)
+            journal.record(entry, STATE_FAILED)
+            return "changed while replacing"
+        journal.record(entry, STATE_PREPARED)
+        os.replace(tmp_path, path)
+    except PermissionError:
+        _remove_quietly(tmp_path)
+        journal.record(entry, STATE_FAILED)
+        return "locked"
+    except OSError as e:
+        # e.g. deleted / renamed since it was prepared: only this file fails
+        _remove_quietly(tmp_path)
+        journal.record(entry, STATE_FAILED)
+        return str(e)
+    journal.record(entry, STATE_DONE)
+    return None
+
+
+def bulk_replace(files, job, workers=None, progress=None):
+    """
+    Replace in many files with a process pool.
+
+    Workers write each new version to a temp file next to the original;
+    this process journals it, then swaps it in with os.replace (atomic on
+    the same volume). Files the journal of an earlier, interrupted run
+    already finished are skipped.
+
+    progress(done, total, entry) is called per file.
+    Returns a summary dict:
+        'results': list of (path, count) for replaced files
+        'skipped': files already done by an earlier run
+        'locked' / 'errors': lists of (path, message)
+        'journal': the journal folder (for rollback)
+    """
+    job.run_key = job.key(files)
+    journal = ReplaceJournal.for_key(job.run_key)
+    job.backup_dir = journal.backup_dir
+    journal.remove_temp_files(files, job.run_key)   # left by an interrupted run
+
+    summary = {"results": [], "skipped": [], "locked": [], "errors": [], "journal": journal.folder}
+    todo = []
+    for file_path in files:
+        if journal.is_finished(file_path):
+            summary["skipped"].append(file_path)
+        else:
+            todo.append(file_path)
+
+    total = len(files)
+    done = len(summary["skipped"])
+
+    def handle(entry):
+        nonlocal done
+        done += 1
+        if entry["error"]:
+            summary["errors"].append((entry["path"], entry["error"]))
+        elif not entry["count"]:
+            journal.record(entry, STATE_UNCHANGED)
+        else:
+            error = _commit(entry, journal)
+            if error == "locked":
+                summary["locked"].append((entry["path"], error))
+            elif error:
+                summary["errors"].append((entry["path"], error))
+            else:
+                summary["results"].append((entry["path"], entry["count"]))
+        if progress:
+            progress(done, total, entry)
+
+    workers = min(workers or os.cpu_count() or 1, len(todo))
+    if workers <= 1:
+        for file_path in todo:
+            handle(prepare_file(file_path, job))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(prepare_file, file_path, job) for file_path in todo]
+            for future in as_completed(futures):
+                handle(future.result())
+
+    return summary
+
+
+def rollback(files, job):
+    """
+    Undo the bulk replace run that used these files and options.
+    Files edited since the replace are left alone and reported.
+    Returns (restored paths, skipped paths); the journal is deleted
+    once nothing is left to restore.
+    """
+    run_key = job.key(files)
+    folder = os.path.join(JOURNAL_DIR, run_key)
+    if not os.path.isdir(folder):
+        return [], []
+    journal = ReplaceJournal(folder)
+    journal.remove_temp_files(files, run_key)
+
+    restored, skipped = [], []
+    for record in list(journal.entries.values()):
+        if record["state"] not in (STATE_PREPARED, STATE_DONE):
+            continue
+        path = record["path"]
+        tmp_path = None
+        try:
+            current = file_hash(path)
+            if current == record["original_hash"]:
+                journal.record(record, STATE_ROLLED_BACK)  # never swapped in
+                continue
+            if current != record["new_hash"]:
+                skipped.append(path)
+                continue
+            tmp_path = _temp_next_to(path)
+            shutil.copyfile(record["backup"], tmp_path)
+            shutil.copymode(path, tmp_path)
+            os.replace(tmp_path, path)
+            journal.record(record, STATE_ROLLED_BACK)
+            restored.append(path)
+        except OSError as e:
+            if tmp_path:
+                _remove_quietly(tmp_path)
+            # stderr: stdout may be the CLI's JSON Lines stream
+            print(f"Rollback failed for {path}: {e}", file=sys.stderr)
+            skipped.append(path)
+
+    if not skipped:
+        journal.remove()
+    return restored, skipped
@@ -0,0 +1,116 @@
+from bisect import bisect_right
+
+from docx.table import Table, _Cell
+from docx.text.hyperlink import Hyperlink
+
+from utils.docx_stream import W_TBL, W_TR, W_TC
+
+
+# -----------------------------
+# Runs behind Paragraph.text
+# -----------------------------
+def text_runs(p):
+    """
+    The runs of a python-docx paragraph in p.text order: direct runs and
+    runs inside hyperlinks (p.runs alone misses the hyperlink text).
+    """
+    runs = []
+    for item in p.iter_inner_content():
+        if isinstance(item, Hyperlink):
+            runs.extend(item.runs)
+        else:
+            runs.append(item)
+    return runs
+
+
+def split_cell_spans(texts, spans):
+    """
+    Map spans in a cell text (its paragraph texts joined by '\\n') to
+    {paragraph index: [(start, end), ...]} in paragraph coordinates.
+    A span running into the next paragraph is cut at the paragraph end.
+    """
+    starts = []
+    pos = 0
+    for text in texts:
+        starts.append(pos)
+        pos += len(text) + 1
+
+    per_paragraph = {}
+    for start, end in spans:
+        i = bisect_right(starts, start) - 1
+        if i < 0 or start - starts[i] >= len(texts[i]):
+            continue  # starts on a '\n' between paragraphs
+        local_end = min(end - starts[i], len(texts[i]))
+        per_paragraph.setdefault(i, []).append((start - starts[i], local_end))
+    return per_paragraph
+
+
+# -----------------------------
+# Locator -> paragraphs
+# -----------------------------
+class LocatorResolver:
+    """
+    Resolve search locators (see docx_stream.iter_docx_blocks) against an
+    open python-docx Document, without scanning the document per match.
+
+        ('body', n)            -> doc.paragraphs[n]
+        ('cell', t, r, c, ...) -> the paragraphs of that table cell
+
+    doc.paragraphs is read once, so body ordinals stay valid while
+    paragraphs are removed; removed ones simply have no parent any more.
+    """
+    def __init__(self, doc):
+        self.doc = doc
+        self.paragraphs = doc.paragraphs
+        self.body_tables = doc.element.body.findall(W_TBL)
+        self._cells = {}
+
+    def locate(self, locator, line_text, spans):
+        """
+        Return [(siblings, index, spans), ...] for one search match: the
+        paragraph is siblings[index] (siblings is doc.paragraphs for body
+        lines, the cell's paragraphs for table lines) and spans are moved to
+        paragraph coordinates. A cell match yields one entry per paragraph
+        it touches. Returns [] when the locator is missing or the text
+        there changed since the search (the file was edited in between).
+        """
+        if not locator:
+            return []
+        try:
+            if locator[0] == "body":
+                n = locator[1]
+                if self.paragraphs[n].text != line_text:
+                    return []
+                return [(self.paragraphs, n, list(spans))]
+
+            if locator[0] == "cell":
+                paragraphs = self.cell_paragraphs(locator[1:])
+                texts = [p.text for p in paragraphs]
+                if "\n".join(texts) != line_text:
+                    return []
+                return [(paragraphs, i, local)
+                        for i, local in sorted(split_cell_spans(texts, spans).items())]
+        except IndexError:
+            pass
+        return []
+
+    def cell_paragraphs(self, path):
+        path = tuple(path)
+        if path not in self._cells:
+            self._cells[path] = self._cell(path).paragraphs
+        return self._cells[path]
+
+    def _cell(self, path):
+        tbl = self.body_tables[path[0]]
+        parent = self.doc._body
+        level = 0
+        while True:
+            table = Table(tbl, parent)
+            tr = tbl.findall(W_TR)[path[level + 1]]
+            tc = tr.findall(W_TC)[path[level + 2]]
+            cell = _Cell(tc, table)
+            level += 3
+            if level == len(path):
+                return cell
+            tbl = tc.findall(W_TBL)[path[level]]
+            parent = cell
@@ -0,0 +1,348 @@
+import os
+import shutil
+import sys
+import tempfile
+import zipfile
+from bisect import bisect_right
+from copy import deepcopy
+
+from docx.oxml import OxmlElement
+from docx.oxml.ns import qn
+from docx.shared import Pt
+from docx.text.run import Run
+from lxml import etree
+
+from utils.docx_stream import (
+    w, run_text, _docx_part_names, _paragraph_style_names,
+    W_BODY, W_P, W_R, W_T, W_TBL, W_TR, W_TC, W_HYPERLINK,
+    W_TAB, W_PTAB, W_BR, W_CR, W_NBH, W_VAL, W_TYPE,
+)
+
+
+W_RPR, W_PPR, W_PSTYLE = w("rPr"), w("pPr"), w("pStyle")
+XML_SPACE = "{http://www.w3.org/XML/1998/namespace}space"
+HEADING_NAMES = {f"Heading {n}" for n in range(1, 10)}
+
+
+# -----------------------------
+# Replacement runs (built once, copied per match)
+# -----------------------------
+def set_run_shading(run, hex_color):
+    """
+    Apply shading to a run using a hex color (e.g., #C0C0C0)
+    """
+    rPr = run._element.get_or_add_rPr()
+    shd = rPr.find(qn('w:shd'))
+    if shd is None:
+        shd = OxmlElement('w:shd')
+        rPr.append(shd)
+    shd.set(qn('w:fill'), hex_color.replace('#', ''))
+
+
+def force_run_font(run, font_name):
+    rPr = run._element.get_or_add_rPr()
+    rFonts = rPr.get_or_add_rFonts()
+    for k in ("ascii", "hAnsi", "eastAsia", "cs"):
+        rFonts.set(qn(f"w:{k}"), font_name)
+    run.font.name = font_name
+
+
+def build_replacement_runs(char_formats):
+    """
+    Turn Replace-box char formats into template <w:r> elements.
+    They are built once per replace and deep-copied into each match.
+    """
+    templates = []
+    for fmt in char_formats:
+        r = OxmlElement("w:r")
+        run = Run(r, None)
+        run.text = fmt["text"]
+        run.font.name = fmt["font_family"]
+        run.font.size = Pt(fmt["font_size"])
+        run.font.bold = fmt["bold"]
+        run.font.italic = fmt["italic"]
+        if fmt["color"]:
+            run.font.color.rgb = fmt["color"]
+        if fmt.get("highlight") is not None:
+            try:
+                run.font.highlight_color = fmt["highlight"]
+            except Exception:
+                if fmt.get("highlight_hex"):
+                    set_run_shading(run, fmt["highlight_hex"])
+        elif fmt.get("highlight_hex"):
+            set_run_shading(run, fmt["highlight_hex"])
+        force_run_font(run, fmt["font_family"])
+        templates.append(r)
+    return templates
+
+
+def plain_replacement_runs(text):
+    """
+    Template runs for a plain replacement text (no Replace box formatting).
+    They carry no <w:rPr>, so every copy takes the formatting of the
+    text it replaces (see replace_in_paragraph).
+    """
+    if not text:
+        return []
+    r = OxmlElement("w:r")
+    Run(r, None).text = text
+    return [r]
+
+
+# -----------------------------
+# Editing runs in place
+# -----------------------------
+def _char_width(e):
+    """
+    Characters a run child adds to run_text(); 0 for rPr, drawings, field codes...
+    """
+    tag = e.tag
+    if tag == W_T:
+        return len(e.text or "")
+    if tag in (W_TAB, W_PTAB, W_CR, W_NBH):
+        return 1
+    if tag == W_BR and e.get(W_TYPE) in (None, "textWrapping"):
+        return 1
+    return 0
+
+
+def _cut_run(r, start, end, drop_marks=False):
+    """
+    Remove the characters [start, end) of a run (offsets as in run_text()).
+    Children without text (drawings, field codes, bookmarks) are kept,
+    unless drop_marks is set and they sit inside the range.
+    """
+    pos = 0
+    for e in list(r):
+        if e.tag == W_RPR:
+            continue
+        width = _char_width(e)
+        if width == 0:
+            if drop_marks and start <= pos < end:
+                r.remove(e)
+            continue
+
+        e_start, e_end = pos, pos + width
+        pos = e_end
+        if e_end <= start or e_start >= end:
+            continue
+        if e.tag == W_T and not (start <= e_start and e_end <= end):
+            text = e.text
+            kept = text[:max(start - e_start, 0)] + text[min(end, e_end) - e_start:]
+            e.text = kept
+            if kept != kept.strip():
+                e.set(XML_SPACE, "preserve")
+        else:
+            r.remove(e)
+
+
+def _split_run(r, offset):
+    """
+    Split a run at a character offset: r keeps [0, offset), the returned
+    copy (inserted right after r) holds the rest with the same formatting.
+    """
+    right = deepcopy(r)
+    r.addnext(right)
+    _cut_run(r, offset, sys.maxsize, drop_marks=True)
+    _cut_run(right, 0, offset, drop_marks=True)
+    return right
+
+
+def _is_empty_run(r):
+    return all(e.tag == W_RPR for e in r)
+
+
+def _remove(e):
+    e.getparent().remove(e)
+
+
+def paragraph_runs(p):
+    """
+    The runs behind paragraph_text(): direct runs and runs inside hyperlinks.
+    """
+    runs = []
+    for child in p:
+        if child.tag == W_R:
+            runs.append(child)
+        elif child.tag == W_HYPERLINK:
+            runs.extend(child.iterchildren(W_R))
+    return runs
+
+
+def replace_in_paragraph(p, pattern, templates):
+    """
+    Replace every match of pattern in a <w:p> with copies of the template runs.
+    Only runs a match touches are edited (split / trimmed); every other run,
+    hyperlink, bookmark and field in the paragraph is left as it is.
+    Template runs without <w:rPr> take the formatting of the matched text.
+    Returns the number of matches.
+    """
+    runs = paragraph_runs(p)
+    if not runs:
+        return 0
+    texts = [run_text(r) for r in runs]
+    full_text = "".join(texts)
+    if not full_text:
+        return 0
+    matches = [m.span() for m in pattern.finditer(full_text)]
+    if not matches:
+        return 0
+
+    starts = []
+    pos = 0
+    for text in texts:
+        starts.append(pos)
+        pos += len(text)
+
+    # Right to left, so offsets of the runs still to visit never move
+    for start, end in reversed(matches):
+        i = bisect_right(starts, start) - 1
+        anchor = runs[i]
+        a = start - starts[i]
+        b = min(end, starts[i] + len(texts[i])) - starts[i]
+
+        # Later runs the match reaches into lose the matched characters
+        j = i + 1
+        while j < len(runs) and starts[j] < end:
+            _cut_run(runs[j], 0, end - starts[j])
+            if _is_empty_run(runs[j]):
+                _remove(runs[j])
+            j += 1
+
+        right = anchor if a == 0 else _split_run(anchor, a)
+        _cut_run(right, 0, b - a)
+        rpr = right.find(W_RPR)
+        for template in templates:
+            r = deepcopy(template)
+            if rpr is not None and r.find(W_RPR) is None:
+                r.insert(0, deepcopy(rpr))
+            right.addprevious(r)
+        if _is_empty_run(right):
+            _remove(right)
+
+    return len(matches)
+
+
+def clear_heading_run_format(p):
+    """
+    Drop run-level bold/italic/size/color/font from the direct runs of a
+    heading, so Word's Heading style applies (see apply_word_heading_format).
+    """
+    for r in p.iterchildren(W_R):
+        rPr = r.find(W_RPR)
+        if rPr is None:
+            continue
+        for tag in ("b", "i", "sz", "color"):
+            for e in rPr.findall(w(tag)):
+                rPr.remove(e)
+        rFonts = rPr.find(w("rFonts"))
+        if rFonts is not None:
+            for attr in ("ascii", "hAnsi"):
+                rFonts.attrib.pop(w(attr), None)
+
+
+# -----------------------------
+# Whole documents
+# -----------------------------
+def _table_paragraphs(tbl):
+    """
+    Cell paragraphs of a table in document order, nested tables included;
+    every cell is visited once (merged cells are not repeated).
+    """
+    for tr in tbl.iterchildren(W_TR):
+        for tc in tr.iterchildren(W_TC):
+            for child in tc:
+                if child.tag == W_P:
+                    yield child
+                elif child.tag == W_TBL:
+                    yield from _table_paragraphs(child)
+
+
+def build_docx_with_part(file_path, part_name, root, out_path):
+    """
+    Write a copy of a .docx to out_path with one XML part replaced;
+    every other part is copied unchanged.
+    """
+    data = etree.tostring(root, xml_declaration=True, encoding="UTF-8", standalone=True)
+    with zipfile.ZipFile(file_path) as src, zipfile.ZipFile(out_path, "w", zipfile.ZIP_DEFLATED) as dst:
+        for info in src.infolist():
+            dst.writestr(info, data if info.filename == part_name else src.read(info))
+
+
+def write_docx_part(file_path, part_name, root):
+    """
+    Rewrite one XML part of a .docx in place.
+    The new package is written next to the file and swapped in with os.replace,
+    so a failure never leaves a half-written document behind.
+    """
+    fd, tmp_path = tempfile.mkstemp(suffix=".tmp", prefix="~replace_",
+                                    dir=os.path.dirname(os.path.abspath(file_path)))
+    os.close(fd)
+    try:
+        build_docx_with_part(file_path, part_name, root, tmp_path)
+        shutil.copymode(file_path, tmp_path)
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def replace_in_docx(file_path, pattern, templates, content_type="all",
+                    apply_heading_format=False, heading_templates=None, out_path=None):
+    """
+    Replace matches in one DOCX by editing word/document.xml directly.
+    Same paragraph selection as the python-docx version (content_type, headings);
+    the file is only rewritten when at least one replacement was made.
+    With out_path the result is written there and file_path is left untouched.
+    Returns the number of replacements.
+    """
+    with zipfile.ZipFile(file_path) as zf:
+        main_part, styles_part = _docx_part_names(zf)
+        style_names, default_style = _paragraph_style_names(zf, styles_part)
+        root = etree.fromstring(zf.read(main_part))
+
+    body = root.find(W_BODY)
+    if body is None:
+        return 0
+    if heading_templates is None:
+        heading_templates = templates
+
+    def style_name(p):
+        ppr = p.find(W_PPR)
+        style = ppr.find(W_PSTYLE) if ppr is not None else None
+        return style_names.get(style.get(W_VAL) if style is not None else default_style, "")
+
+    def replace_heading(p, name):
+        # Plain text, then Word's own Heading formatting
+        count = replace_in_paragraph(p, pattern, heading_templates)
+        if name in HEADING_NAMES:
+            clear_heading_run_format(p)
+        return count
+
+    count = 0
+    for p in body.iterchildren(W_P):
+        name = style_name(p)
+        if name.startswith("Heading"):
+            if apply_heading_format:
+                count += replace_heading(p, name)
+            elif content_type in ("all", "headings", "tables_headings"):
+                count += replace_in_paragraph(p, pattern, templates)
+        elif content_type in ("all", "text"):
+            count += replace_in_paragraph(p, pattern, templates)
+
+    if content_type in ("tables", "tables_headings", "all"):
+        for tbl in body.iterchildren(W_TBL):
+            for p in _table_paragraphs(tbl):
+                name = style_name(p)
+                if apply_heading_format and name.startswith("Heading"):
+                    count += replace_heading(p, name)
+                else:
+                    count += replace_in_paragraph(p, pattern, templates)
+
+    if count:
+        if out_path:
+            build_docx_with_part(file_path, main_part, root, out_path)
+        else:
+            write_docx_part(file_path, main_part, root)
+    return count
@@ -0,0 +1,271 @@
+import posixpath
+import re
+import zipfile
+from lxml import etree
+
+
+# -----------------------------
+# WordprocessingML names
+# -----------------------------
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+OFFICE_DOCUMENT_REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"
+STYLES_REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles"
+
+
+def w(tag):
+    return f"{{{W_NS}}}{tag}"
+
+
+W_BODY, W_P, W_R, W_T = w("body"), w("p"), w("r"), w("t")
+W_TBL, W_TR, W_TC, W_HYPERLINK, W_TXBX = w("tbl"), w("tr"), w("tc"), w("hyperlink"), w("txbxContent")
+W_TAB, W_PTAB, W_BR, W_CR, W_NBH = w("tab"), w("ptab"), w("br"), w("cr"), w("noBreakHyphen")
+W_VAL, W_TYPE = w("val"), w("type")
+
+# Built-in heading names are stored lower-case ("heading 1"); Word shows "Heading 1"
+_BUILTIN_HEADING = re.compile(r"heading [1-9]")
+
+
+# -----------------------------
+# Package parts
+# -----------------------------
+def _rel_targets(zf, rels_name, source_dir):
+    """
+    Return {relationship type: part name} from a .rels part ({} if missing).
+    """
+    try:
+        root = etree.fromstring(zf.read(rels_name))
+    except KeyError:
+        return {}
+    targets = {}
+    for rel in root.iter(f"{{{REL_NS}}}Relationship"):
+        target = rel.get("Target", "")
+        if rel.get("TargetMode") == "External":
+            continue
+        if target.startswith("/"):
+            name = target.lstrip("/")
+        else:
+            name = posixpath.normpath(posixpath.join(source_dir, target))
+        targets.setdefault(rel.get("Type"), name)
+    return targets
+
+
+def _docx_part_names(zf):
+    """
+    Return (main document part, styles part or None) of a .docx package.
+    """
+    main = _rel_targets(zf, "_rels/.rels", "").get(OFFICE_DOCUMENT_REL, "word/document.xml")
+    main_dir, main_file = posixpath.split(main)
+    rels = _rel_targets(zf, posixpath.join(main_dir, "_rels", main_file + ".rels"), main_dir)
+    return main, rels.get(STYLES_REL)
+
+
+def _paragraph_style_names(zf, styles_part):
+    """
+    Return ({paragraph style id: name}, default paragraph style id or None).
+    Built-in heading names are shown as python-docx does ("heading 1" -> "Heading 1").
+    """
+    if not styles_part:
+        return {}, None
+    try:
+        root = etree.fromstring(zf.read(styles_part))
+    except KeyError:
+        return {}, None
+    return _style_names_in(root)
+
+
+def _style_names_in(styles_root):
+    """
+    _paragraph_style_names() for an already parsed styles part (or None).
+    """
+    names = {}
+    default_id = None
+    if styles_root is None:
+        return names, default_id
+
+    for style in styles_root.iter(w("style")):
+        if style.get(W_TYPE) != "paragraph":
+            continue
+        name_el = style.find(w("name"))
+        name = name_el.get(W_VAL, "") if name_el is not None else ""
+        if _BUILTIN_HEADING.fullmatch(name):
+            name = name.capitalize()
+        style_id = style.get(w("styleId"))
+        names[style_id] = name
+        if style.get(w("default")) in ("1", "true", "on"):
+            default_id = style_id
+    return names, default_id
+
+
+def _heading_ids(names, default_id):
+    """
+    Return (set of heading paragraph style ids, default paragraph style is heading).
+    A style is a heading when its name starts with "Heading" (as python-docx shows it).
+    """
+    heading_ids = {style_id for style_id, name in names.items() if name.startswith("Heading")}
+    return heading_ids, default_id in heading_ids
+
+
+def _heading_style_ids(zf, styles_part):
+    return _heading_ids(*_paragraph_style_names(zf, styles_part))
+
+
+# -----------------------------
+# Text of runs / paragraphs (same rules as python-docx Paragraph.text)
+# -----------------------------
+def run_text(r):
+    parts = []
+    for e in r:
+        tag = e.tag
+        if tag == W_T:
+            parts.append(e.text or "")
+        elif tag in (W_TAB, W_PTAB):
+            parts.append("\t")
+        elif tag == W_BR:
+            if e.get(W_TYPE) in (None, "textWrapping"):
+                parts.append("\n")
+        elif tag == W_CR:
+            parts.append("\n")
+        elif tag == W_NBH:
+            parts.append("-")
+    return "".join(parts)
+
+
+def paragraph_text(p):
+    parts = []
+    for child in p:
+        if child.tag == W_R:
+            parts.append(run_text(child))
+        elif child.tag == W_HYPERLINK:
+            parts.extend(run_text(r) for r in child.iterchildren(W_R))
+    return "".join(parts)
+
+
+def _is_heading(p, heading_ids, default_is_heading):
+    ppr = p.find(w("pPr"))
+    style = ppr.find(w("pStyle")) if ppr is not None else None
+    if style is None:
+        return default_is_heading
+    return style.get(W_VAL) in heading_ids
+
+
+def _is_vmerge_continuation(tc):
+    """
+    True for the lower cells of a vertical merge; Word only shows the first one.
+    """
+    tcpr = tc.find(w("tcPr"))
+    vmerge = tcpr.find(w("vMerge")) if tcpr is not None else None
+    return vmerge is not None and vmerge.get(W_VAL) in (None, "continue")
+
+
+# -----------------------------
+# Streaming extractor
+# -----------------------------
+def iter_docx_lines(file_path):
+    """
+    Walk word/document.xml once and lazily yield (kind, text) per non-blank line:
+        kind 'heading' : body paragraph with a Heading style
+        kind 'body'    : any other body paragraph
+        kind 'table'   : one table cell (its paragraphs joined by '\\n'),
+                         nested tables included, merged cells reported once
+    Text boxes are skipped, like python-docx doc.paragraphs does.
+    Finished body elements are freed as the walk goes, so memory stays flat.
+    """
+    for kind, text, _ in iter_docx_blocks(file_path):
+        yield kind, text
+
+
+BLOCK_TAGS = (W_P, W_TBL, W_TR, W_TC, W_TXBX)
+
+
+def iter_docx_blocks(file_path):
+    """
+    Same walk as iter_docx_lines(), yielding (kind, text, locator).
+
+    The locator says where the line sits, so a later edit can go straight to it:
+        ('body', n)            : doc.paragraphs[n] in python-docx
+        ('cell', t, r, c, ...) : cell c of row r of body table t; nested tables
+                                 add (table, row, cell) per level inside that cell
+    It is None for lines python-docx cannot address that way
+    (e.g. paragraphs inside content controls).
+    """
+    with zipfile.ZipFile(file_path) as zf:
+        main_part, styles_part = _docx_part_names(zf)
+        heading_ids, default_is_heading = _heading_style_ids(zf, styles_part)
+
+        with zf.open(main_part) as stream:
+            events = etree.iterparse(stream, events=("start", "end"), tag=BLOCK_TAGS)
+            yield from _walk_blocks(events, heading_ids, default_is_heading, free=True)
+
+
+def iter_tree_blocks(root, styles_root=None):
+    """
+    iter_docx_blocks() over a document.xml tree that is already parsed
+    (e.g. python-docx doc.element with doc.styles.element); the tree is left intact.
+    """
+    heading_ids, default_is_heading = _heading_ids(*_style_names_in(styles_root))
+    events = etree.iterwalk(root, events=("start", "end"), tag=BLOCK_TAGS)
+    yield from _walk_blocks(events, heading_ids, default_is_heading)
+
+
+def _walk_blocks(events, heading_ids, default_is_heading, free=False):
+    """
+    Turn (event, element) pairs of a document.xml walk into (kind, text, locator).
+    With free=True finished body-level elements are cleared (streaming parse).
+    """
+    txbx_depth = 0
+    body_p = -1     # ordinal of the last body-level paragraph
+    body_tbl = -1   # ordinal of the last body-level table
+    frames = []     # open tbl/tr/tc: [path or None, children counted so far]
+
+    for event, elem in events:
+        tag = elem.tag
+        if tag == W_TXBX:
+            txbx_depth += 1 if event == "start" else -1
+            continue
+        if txbx_depth:
+            continue
+
+        parent = elem.getparent()
+
+        if event == "start":
+            if tag == W_P:
+                continue
+            path = None
+            if tag == W_TBL and parent.tag == W_BODY:
+                body_tbl += 1
+                path = (body_tbl,)
+            elif frames and (tag, parent.tag) in ((W_TBL, W_TC), (W_TR, W_TBL), (W_TC, W_TR)):
+                # Direct children only, as python-docx counts them
+                outer = frames[-1]
+                outer[1] += 1
+                if outer[0] is not None:
+                    path = outer[0] + (outer[1],)
+            frames.append([path, -1])
+            continue
+
+        if tag == W_P and parent.tag != W_TC:
+            locator = None
+            if parent.tag == W_BODY:
+                body_p += 1
+                locator = ("body", body_p)
+            text = paragraph_text(elem)
+            if text.strip():
+                kind = "heading" if _is_heading(elem, heading_ids, default_is_heading) else "body"
+                yield kind, text, locator
+
+        elif tag == W_TC:
+            path = frames[-1][0]
+            if not _is_vmerge_continuation(elem):
+                text = "\n".join(paragraph_text(p) for p in elem.iterchildren(W_P))
+                if text.strip():
+                    yield "table", text, ("cell",) + path if path is not None else None
+
+        if tag != W_P:
+            frames.pop()
+
+        # Free body-level paragraphs/tables once they are done
+        if free and parent is not None and parent.tag == W_BODY and tag in (W_P, W_TBL):
+            elem.clear()
+            while elem.getprevious() is not None:
+                del parent[0]
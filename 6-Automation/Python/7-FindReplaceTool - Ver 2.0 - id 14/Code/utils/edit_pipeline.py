@@ -0,0 +1,211 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from docx import Document
+
+from utils.docx_stream import iter_tree_blocks
+from utils.file_search import collect_files
+from utils.insert_utils import insert_at_matches
+from utils.remove_utils import remove_blank_line_at_matches, remove_all_blank_lines_at_matches
+from utils.search_query import SearchQuery
+from utils.text_extract import docx_buckets, lines_for_content_type, locators_for_content_type
+from utils.txt_scan import decode_txt, encode_txt
+
+
+# -----------------------------
+# Settings
+# -----------------------------
+ACTION_INSERT = "insert"
+ACTION_REMOVE_LINE = "remove_line"              # one blank line per match
+ACTION_REMOVE_ALL_LINES = "remove_all_lines"    # every blank line next to a match
+
+EDIT_EXTENSIONS = (".txt", ".docx")
+
+
+# -----------------------------
+# Job (pickled once per worker task)
+# -----------------------------
+class EditJob:
+    """
+    One search -> edit request: the Find query plus the edit to make at
+    every match. options are the keyword arguments of the edit function
+    (insert_at_matches: insert_type, content, repeat, position, line_offset,
+    insert_reference; the remove functions: position).
+    """
+    def __init__(self, action, search_text, case_sensitive=False, use_regex=False,
+                 content_type="all", **options):
+        self.action = action
+        self.query = SearchQuery(search_text, case_sensitive, use_regex)
+        self.content_type = content_type
+        self.options = options
+
+    def apply(self, doc_or_text, matches, locators=None):
+        """
+        Make the edit; returns (count, new text or the edited Document).
+        """
+        if self.action == ACTION_INSERT:
+            result = insert_at_matches(doc_or_text, matches, content_type=self.content_type,
+                                       locators=locators, **self.options)
+            return result if isinstance(doc_or_text, str) else (result, doc_or_text)
+        if self.action == ACTION_REMOVE_LINE:
+            return remove_blank_line_at_matches(doc_or_text, matches, locators=locators, **self.options)
+        if self.action == ACTION_REMOVE_ALL_LINES:
+            return remove_all_blank_lines_at_matches(doc_or_text, matches, locators=locators, **self.options)
+        raise ValueError(f"Unknown edit action: {self.action}")
+
+
+# -----------------------------
+# Worker: search and edit one file, opened once
+# -----------------------------
+def _edit_txt(file_path, job):
+    # Edited in the file's own encoding and BOM, as bulk replace does
+    with open(file_path, "rb") as f:
+        text, bom, codec = decode_txt(f.read())
+    # Searched and edited with '\n' line ends (as the search reads the file),
+    # written back with the file's '\r\n'
+    crlf = "\r\n" in text
+    if crlf:
+        text = text.replace("\r\n", "\n")
+    lines = text.split("\n")
+    if lines and lines[-1] == "":
+        lines.pop()
+
+    matches = job.query.find_in_lines(lines)
+    if not matches:
+        return 0
+    count, new_text = job.apply(text, matches)
+    if count > 0:
+        if crlf:
+            new_text = new_text.replace("\n", "\r\n")
+        with open(file_path, "wb") as f:
+            f.write(encode_txt(new_text, bom, codec))
+    return count
+
+
+def _edit_docx(file_path, job):
+    doc = Document(file_path)
+    # Search the tree that is about to be edited, so the edit never
+    # works from a stale search of an older version of the file
+    buckets = docx_buckets(iter_tree_blocks(doc.element, doc.styles.element))
+    lines = lines_for_content_type(buckets, job.content_type)
+    locators = locators_for_content_type(buckets, job.content_type)
+
+    matches = job.query.find_in_lines(lines)
+    if not matches:
+        return 0
+    count, doc = job.apply(doc, matches, [locators[line_no - 1] for line_no, _, _ in matches])
+    if count > 0:
+        doc.save(file_path)
+    return count
+
+
+def edit_file(file_path, job):
+    """
+    Parse a TXT/DOCX once, search it in memory, edit it and save it.
+    Returns {'path', 'count', 'locked', 'error'}.
+    """
+    entry = {"path": file_path, "count": 0, "locked": False, "error": None}
+    ext = os.path.splitext(file_path)[1].lower()
+    try:
+        if ext == ".txt":
+            entry["count"] = _edit_txt(file_path, job)
+        elif ext == ".docx":
+            entry["count"] = _edit_docx(file_path, job)
+    except PermissionError:
+        entry["locked"] = True   # open in another program
+    except Exception as e:
+        entry["error"] = str(e)
+    return entry
+
+
+# -----------------------------
+# Many files
+# -----------------------------
+def run_edit_pipeline(files, job, workers=None, progress=None):
+    """
+    Search and edit many files with a process pool, one open per file.
+    PDFs and other types are skipped (they cannot be edited).
+
+    progress(done, total, entry) is called per file.
+    Returns a summary dict:
+        'results': list of (path, count) for edited files, in the order of files
+        'locked': paths that were open in another program
+        'errors': list of (path, message)
+    """
+    todo = [f for f in files if os.path.splitext(f)[1].lower() in EDIT_EXTENSIONS]
+    entries = {}
+
+    def handle(entry):
+        entries[entry["path"]] = entry
+        if progress:
+            progress(len(entries), len(todo), entry)
+
+    workers = min(workers or os.cpu_count() or 1, len(todo))
+    if workers <= 1:
+        for file_path in todo:
+            handle(edit_file(file_path, job))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(edit_file, file_path, job) for file_path in todo]
+            for future in as_completed(futures):
+                handle(future.result())
+
+    ordered = [entries[f] for f in todo if f in entries]
+    return {
+        "results": [(e["path"], e["count"]) for e in ordered if e["count"] > 0],
+        "locked": [e["path"] for e in ordered if e["locked"]],
+        "errors": [(e["path"], e["error"]) for e in ordered if e["error"]],
+    }
+
+
+# -----------------------------
+# GUI entry points
+# -----------------------------
+def _int_or(value, default):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def build_edit_job(gui, action):
+    """
+    EditJob for the Find tab: Find options plus the Insert / Remove options.
+    """
+    if action == ACTION_INSERT:
+        options = {
+            "insert_type": gui.insert_content_type_var.get(),
+            "content": gui.insert_content_text_var.get(),
+            "repeat": _int_or(gui.insert_repeat_var.get(), 1),
+            "position": gui.insert_position_var.get(),
+            "line_offset": _int_or(gui.insert_line_offset_var.get(), 0),
+            "insert_reference": gui.insert_reference_var.get(),
+        }
+    else:
+        options = {"position": gui.Remvoed_position_var.get()}  # before / after
+
+    return EditJob(action, gui.entry_search_text.get(),
+                   case_sensitive=gui.case_sensitive_var.get(),
+                   use_regex=gui.enable_regex_var.get(),
+                   content_type=gui.content_type_var.get(),
+                   **options)
+
+
+def run_edit_process(gui, job, workers=None):
+    """
+    Run an EditJob over the files selected in the Find tab.
+    Returns (total count, [(path, count), ...], locked paths).
+    """
+    files = collect_files(gui.entry_path.get(), gui.selected_type.get(), gui.subfolders_var.get(),
+                          gui.txt_var.get(), gui.doc_var.get(), gui.pdf_var.get())
+
+    def progress(done, total, entry):
+        if done % 20 == 0 or done == total:
+            gui.status_label.config(text=f"Editing {done}/{total} files...", fg="blue")
+            gui.status_label.update_idletasks()
+
+    summary = run_edit_pipeline(files, job, workers=workers, progress=progress)
+    for file_path, error in summary["errors"]:
+        print(f"Error processing file {file_path}: {error}")
+    total = sum(count for _, count in summary["results"])
+    return total, summary["results"], summary["locked"]
@@ -0,0 +1,107 @@
+import os
+
+from utils.bulk_replace import ReplaceJob, bulk_replace
+from utils.docx_replace import plain_replacement_runs
+from utils.edit_pipeline import (
+    EditJob, run_edit_pipeline,
+    ACTION_INSERT, ACTION_REMOVE_LINE, ACTION_REMOVE_ALL_LINES,
+)
+from utils.file_search import collect_files, default_workers, find_in_file, iter_search_path, iter_search_terms
+from utils.pdf_search import find_in_pdf
+from utils.search_query import SearchQuery
+
+
+# -----------------------------
+# Headless engine
+# -----------------------------
+# The Find tab operations without Tk: every option the GUI reads from its
+# widgets is a plain argument here, so they can run from a script, a
+# scheduler or the command line (see find_replace_cli.py).
+# Folders are processed with a process pool (one worker per core by default).
+
+def list_files(path, subfolders=False, txt=False, doc=False, pdf=False):
+    """
+    Files a run works on: path itself when it is a file, else the files of
+    the folder (and its subfolders) with the chosen types (all when none is).
+    """
+    selected_type = "file" if os.path.isfile(path) else "folder"
+    return collect_files(path, selected_type, subfolders, txt, doc, pdf)
+
+
+def check_query(search_text, case_sensitive=False, use_regex=False):
+    """
+    Raise ValueError when the Find text is empty or not a valid regex.
+    """
+    if not search_text:
+        raise ValueError("The Find text is empty.")
+    query = SearchQuery(search_text, case_sensitive, use_regex)
+    if query.error:
+        raise ValueError(f"The Find pattern is not a valid regex: {query.error}")
+
+
+def search(path, search_text, case_sensitive=False, use_regex=False, subfolders=False,
+           txt=False, doc=False, pdf=False, content_type="all", workers=None, terms=None,
+           pdf_boxes=False):
+    """
+    Search a file or folder; yields one find_in_file() dict per file, in
+    file order, as soon as it is ready. With terms (a list) every term is
+    searched in the same pass and each dict also has 'term_counts'.
+    With pdf_boxes, PDF dicts also have 'rects' (see find_in_pdf).
+    """
+    selected_type = "file" if os.path.isfile(path) else "folder"
+    workers = workers or default_workers()
+    if terms and pdf_boxes:
+        raise ValueError("PDF boxes are only available for a single Find text, not a terms file.")
+    if terms:
+        return iter_search_terms(path, terms, selected_type, case_sensitive, use_regex, subfolders,
+                                 txt, doc, pdf, content_type, workers=workers)
+    check_query(search_text, case_sensitive, use_regex)
+    return iter_search_path(path, search_text, selected_type, case_sensitive, use_regex, subfolders,
+                            txt, doc, pdf, content_type, workers=workers,
+                            search_func=find_in_pdf if pdf_boxes else find_in_file)
+
+
+def replace(files, find_text, replace_text, case_sensitive=False, use_regex=False, content_type="all",
+            apply_heading_format=False, workers=None, progress=None):
+    """
+    Journaled, parallel replace (see bulk_replace) with a plain replacement
+    text: in DOCX files the new text keeps the formatting of the text it
+    replaces. Returns the bulk_replace summary dict.
+    """
+    check_query(find_text, case_sensitive, use_regex)
+    runs = plain_replacement_runs(replace_text)
+    job = ReplaceJob(find_text, replace_text,
+                     case_sensitive=case_sensitive,
+                     regex=use_regex,
+                     templates=runs,
+                     heading_templates=runs,
+                     content_type=content_type,
+                     apply_heading_format=apply_heading_format)
+    return bulk_replace(files, job, workers=workers or default_workers(), progress=progress)
+
+
+def insert(files, search_text, case_sensitive=False, use_regex=False, content_type="all",
+           insert_type="space", content="", repeat=1, position="before", line_offset=0,
+           insert_reference="matched_line", workers=None, progress=None):
+    """
+    Insert a space / new line / custom content at every match
+    (same options as the Insert section of the Find tab).
+    Returns the run_edit_pipeline summary dict.
+    """
+    check_query(search_text, case_sensitive, use_regex)
+    job = EditJob(ACTION_INSERT, search_text, case_sensitive, use_regex, content_type,
+                  insert_type=insert_type, content=content, repeat=repeat, position=position,
+                  line_offset=line_offset, insert_reference=insert_reference)
+    return run_edit_pipeline(files, job, workers=workers or default_workers(), progress=progress)
+
+
+def remove_blank_lines(files, search_text, case_sensitive=False, use_regex=False, content_type="all",
+                       position="before", remove_all=False, workers=None, progress=None):
+    """
+    Remove the blank line before / after every match, or every blank line
+    there with remove_all. Returns the run_edit_pipeline summary dict.
+    """
+    check_query(search_text, case_sensitive, use_regex)
+    action = ACTION_REMOVE_ALL_LINES if remove_all else ACTION_REMOVE_LINE
+    job = EditJob(action, search_text, case_sensitive, use_regex, content_type, position=position)
+    return run_edit_pipeline(files, job, workers=workers or default_workers(), progress=progress)
@@ -1,12 +1,13 @@
 import os
 import re
-from docx import Document
 from docx.shared import RGBColor, Pt
 from docx.enum.text import WD_COLOR_INDEX
 import tkinter.font as tkFont
 import unicodedata
 from docx.oxml.ns import qn
-from docx.oxml import OxmlElement
+from utils.docx_replace import build_replacement_runs, replace_in_docx, set_run_shading
+from utils.bulk_replace import ReplaceJob, bulk_replace, rollback
+from utils.txt_scan import decode_txt, encode_txt
 
 
 # ----------------- Helpers -----------------
@@ -155,12 +156,14 @@ def apply_word_heading_format(para):
 
 def build_plain_char_formats(text):
     """
-    Build minimal char_formats list so replace_paragraph_safe_inplace
+    Build a minimal char_formats list (one span) so replace_paragraph_safe_inplace
     inserts text instead of deleting it.
     Formatting will be overridden later.
     """
+    if not text:
+        return []
     return [{
-        "text": ch,
+        "text": text,
         "font_family": "Arial",
         "font_size": 12,
         "bold": False,
@@ -168,20 +171,9 @@ def build_plain_char_formats(text):
         "color": None,
         "highlight": None,
         "highlight_hex": None
-    } for ch in text]
+    }]
 
 
-def set_run_shading(run, hex_color):
-    """
-    Apply shading to a run using a hex color (e.g., #C0C0C0)
-    """
-    rPr = run._element.get_or_add_rPr()
-    shd = rPr.find(qn('w:shd'))
-    if shd is None:
-        shd = OxmlElement('w:shd')
-        rPr.append(shd)
-    shd.set(qn('w:fill'), hex_color.replace('#',''))
-
 def bg_to_docx_highlight(bg: str):
     """
     Convert Tkinter background hex color to DOCX highlight.
@@ -216,59 +208,108 @@ def bg_to_docx_highlight(bg: str):
     return None
 
 
+def _offset_of(index, line_starts):
+    """
+    Convert a Text index ("line.col") to a character offset.
+    """
+    line, col = str(index).split(".")
+    return line_starts[int(line) - 1] + int(col)
+
+
+def _tag_format(text_widget, tag, font_cache):
+    """
+    Return (font, fg, bg) a tag sets; each is None when the tag leaves it alone.
+    A font is resolved once per font spec (family, size, bold, italic).
+    """
+    font = None
+    spec = text_widget.tag_cget(tag, "font")
+    if spec:
+        spec = str(spec)
+        if spec not in font_cache:
+            actual = tkFont.Font(font=spec).actual()
+            font_cache[spec] = (actual["family"], actual["size"],
+                                actual["weight"] == "bold", actual["slant"] == "italic")
+        font = font_cache[spec]
+    fg = text_widget.tag_cget(tag, "foreground") or None
+    bg = text_widget.tag_cget(tag, "background") or None
+    return font, fg, bg
+
+
 def get_text_widget_char_formats(text_widget):
     """
-    Extract per-character text and formatting from a Tkinter Text widget.
-    Returns a list of dictionaries for use in replace_paragraph_safe_inplace.
+    Extract the text and formatting of a Tkinter Text widget as run-length spans:
+    one dict per stretch of characters with the same formatting (one DOCX run each).
+    Tag ranges are read once per tag instead of querying every character;
+    tags apply in priority order, so a higher tag wins as with tag_names().
     """
-    result = []
     text = text_widget.get("1.0", "end-1c")
-    for i, ch in enumerate(text):
-        idx = f"1.0 + {i} chars"
-        # Default formatting
-        font_family = "Arial"
-        font_size = 12
-        bold = False
-        italic = False
-        fg_color = "#000000"
-        bg_color = None
-        highlight_hex = None
-
-        # Check all tags at this position
-        tags = text_widget.tag_names(idx)
-        for tag in tags:
-            tag_config = text_widget.tag_cget(tag, "font")
-            if tag_config:
-                tk_font = tkFont.Font(font=text_widget.tag_cget(tag, "font"))
-                font_family = tk_font.actual("family")
-                font_size = tk_font.actual("size")
-                bold = tk_font.actual("weight") == "bold"
-                italic = tk_font.actual("slant") == "italic"
-
-            fg = text_widget.tag_cget(tag, "foreground")
-            if fg:
-                fg_color = fg
-
-            bg = text_widget.tag_cget(tag, "background")
-            if bg:
-                bg_color = bg_to_docx_highlight(bg)
-                highlight_hex = bg  # store original hex for fallback
-
-        # Convert fg_color #RRGGBB to RGBColor
-        r = int(fg_color[1:3], 16)
-        g = int(fg_color[3:5], 16)
-        b = int(fg_color[5:7], 16)
-        color_rgb = RGBColor(r, g, b)
+    if not text:
+        return []
+
+    line_starts = [0]
+    for line in text.split("\n")[:-1]:
+        line_starts.append(line_starts[-1] + len(line) + 1)
+
+    # Tags that change formatting, lowest priority first, with their ranges
+    font_cache = {}
+    tags = []
+    bounds = {0, len(text)}
+    for tag in text_widget.tag_names():
+        fmt = _tag_format(text_widget, tag, font_cache)
+        if fmt == (None, None, None):
+            continue
+        ranges = text_widget.tag_ranges(tag)
+        spans = [(min(_offset_of(a, line_starts), len(text)), min(_offset_of(b, line_starts), len(text)))
+                 for a, b in zip(ranges[0::2], ranges[1::2])]
+        spans = [(a, b) for a, b in spans if a < b]
+        if not spans:
+            continue
+        tags.append((spans, fmt))
+        for a, b in spans:
+            bounds.update((a, b))
+
+    # Resolve each stretch between tag boundaries; merge neighbours that look the same
+    # (Tk returns the ranges of a tag sorted, so one pointer per tag walks them)
+    edges = sorted(bounds)
+    pointers = [0] * len(tags)
+    segments = []
+    for start, end in zip(edges, edges[1:]):
+        font, fg_color, bg = ("Arial", 12, False, False), "#000000", None
+        for k, (spans, (tag_font, tag_fg, tag_bg)) in enumerate(tags):
+            i = pointers[k]
+            while i < len(spans) and spans[i][1] <= start:
+                i += 1
+            pointers[k] = i
+            if i == len(spans) or spans[i][0] > start:
+                continue
+            if tag_font:
+                font = tag_font
+            if tag_fg:
+                fg_color = tag_fg
+            if tag_bg:
+                bg = tag_bg
+        key = (font, fg_color, bg)
+        if segments and segments[-1][2] == key:
+            segments[-1][1] = end
+        else:
+            segments.append([start, end, key])
 
+    result = []
+    rgb_cache = {}
+    for start, end, ((font_family, font_size, bold, italic), fg_color, bg) in segments:
+        if fg_color not in rgb_cache:
+            # Named colors ("red") as well as #RRGGBB
+            r, g, b = (v >> 8 for v in text_widget.winfo_rgb(fg_color))
+            rgb_cache[fg_color] = RGBColor(r, g, b)
         result.append({
-            "text": ch,
+            "text": text[start:end],
             "font_family": font_family,
             "font_size": font_size,
             "bold": bold,
             "italic": italic,
-            "color": color_rgb,
-            "highlight": bg_color,
-            "highlight_hex": highlight_hex
+            "color": rgb_cache[fg_color],
+            "highlight": bg_to_docx_highlight(bg),
+            "highlight_hex": bg  # original hex for the shading fallback
         })
     return result
 
@@ -276,7 +317,8 @@ def get_text_widget_char_formats(text_widget):
 # while preserving formatting and highlights.
 def replace_paragraph_safe_inplace(para, pattern, char_formats):
     """
-    Replaces only matched text in-place with per-character formatting.
+    Replaces only matched text in-place with the Replace box formatting
+    (one run per format span).
     If char_formats is empty, removes the matched text.
     Unmatched text keeps all original formatting, including highlight and color.
     """
@@ -399,8 +441,8 @@ def replace_in_file_docx(path, tk_replace_widget, find_text,
     Replaces matched text in DOCX with Word selection formatting.
     If no text selected, removes the matched text.
     Only matched text is replaced; unmatched text keeps original formatting including highlight.
+    The file is only saved when something was replaced.
     """
-    doc = Document(path)
     char_formats = get_text_widget_char_formats(tk_replace_widget)
     if char_formats is None:
         char_formats = []  # Treat as empty to remove matched text
@@ -408,14 +450,9 @@ def replace_in_file_docx(path, tk_replace_widget, find_text,
     flags = 0 if case_sensitive else re.IGNORECASE
     pattern = re.compile(find_text, flags) if regex else re.compile(re.escape(find_text), flags)
 
-    handler = lambda p: replace_paragraph_safe_inplace(p, pattern, char_formats)
-
-    for para in doc.paragraphs:
-        handler(para)
-    process_tables(doc.tables, handler)
-
-    doc.save(path)
-    print(f"Replaced text in {path}.")
+    count = replace_in_docx(path, pattern, build_replacement_runs(char_formats))
+    print(f"Replaced text in {path} ({count} replacements).")
+    return count
 # end functions of replaced
 
 # ----------------- Main Replace Process -----------------
@@ -434,6 +471,7 @@ def run_replace_process(gui, path, is_file, find_text, tk_replace_widget,
     gui.text_results.insert("end", f"Processing {len(files)} file(s)...\n\n")
 
     replace_plain_text = extract_plain_text(tk_replace_widget)  # Extract replacement text
+    templates = None  # DOCX replacement runs, built on the first DOCX
 
     for file_path in files:
         file_replacements = 0
@@ -441,8 +479,9 @@ def run_replace_process(gui, path, is_file, find_text, tk_replace_widget,
         try:
             # ---------- TXT ---------- 
             if file_path.lower().endswith(".txt"):
-                with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
-                    content = f.read()
+                # Kept in its own encoding (see txt_scan.decode_txt)
+                with open(file_path, "rb") as f:
+                    content, bom, codec = decode_txt(f.read())
 
                 flags = 0 if case_sensitive else re.IGNORECASE
 
@@ -452,60 +491,32 @@ def run_replace_process(gui, path, is_file, find_text, tk_replace_widget,
                     pattern = re.compile(re.escape(find_text), flags=flags)
                     new_content, count = pattern.subn(replace_plain_text, content)
 
-                with open(file_path, "w", encoding="utf-8", errors="ignore") as f:
-                    f.write(new_content)
+                # Unchanged files are not rewritten
+                if count:
+                    with open(file_path, "wb") as f:
+                        f.write(encode_txt(new_content, bom, codec))
 
                 file_replacements = count
 
 
             # ---------- DOCX ----------
             elif file_path.lower().endswith(".docx"):
-                docx = Document(file_path)
-                char_formats = get_text_widget_char_formats(tk_replace_widget) or []
-
                 flags = 0 if case_sensitive else re.IGNORECASE
                 pattern = re.compile(find_text, flags) if regex else re.compile(re.escape(find_text), flags)
 
-                # Extract replacement text
-                replace_plain_text = extract_plain_text(tk_replace_widget)
-                apply_heading_format = gui.apply_heading_format_var.get()
-
-                # --- Process each paragraph ---
-                for para in docx.paragraphs:
-                    is_heading = para.style and para.style.name.startswith("Heading")
-
-                    if is_heading:
-                        if apply_heading_format:
-                            # Build simple char_formats list to avoid deleting text
-                            plain_formats = build_plain_char_formats(replace_plain_text)
-                            file_replacements += replace_paragraph_safe_inplace(para, pattern, plain_formats)
-                            # Apply Word default Heading format
-                            apply_word_heading_format(para)
-                        else:
-                            if content_type in ("all", "headings", "tables_headings"):
-                                file_replacements += replace_paragraph_safe_inplace(para, pattern, char_formats)
-                    else:
-                        # Non-heading text
-                        if content_type in ("all", "text"):
-                            file_replacements += replace_paragraph_safe_inplace(para, pattern, char_formats)
-
-                # --- Process tables ---
-                if content_type in ("tables", "tables_headings", "all"):
-                    def table_handler(p):
-                        nonlocal file_replacements
-                        is_heading = p.style and p.style.name.startswith("Heading")
-                        if is_heading:
-                            if apply_heading_format:
-                                plain_formats = build_plain_char_formats(replace_plain_text)
-                                file_replacements += replace_paragraph_safe_inplace(p, pattern, plain_formats)
-                                apply_word_heading_format(p)
-                            else:
-                                file_replacements += replace_paragraph_safe_inplace(p, pattern, char_formats)
-                        else:
-                            file_replacements += replace_paragraph_safe_inplace(p, pattern, char_formats)
-                    process_tables(docx.tables, table_handler)
-
-                docx.save(file_path)
+                # Runs are built from the Replace box once, then copied into every match
+                if templates is None:
+                    templates = build_replacement_runs(get_text_widget_char_formats(tk_replace_widget) or [])
+                    heading_templates = build_replacement_runs(build_plain_char_formats(replace_plain_text))
+
+                # One parse of document.xml; only the runs a match touches are
+                # edited, and files without replacements are never rewritten
+                file_replacements = replace_in_docx(
+                    file_path, pattern, templates,
+                    content_type=content_type,
+                    apply_heading_format=gui.apply_heading_format_var.get(),
+                    heading_templates=heading_templates
+                )
 
             # ---------- PDF ---------- 
             elif file_path.lower().endswith(".pdf"):
@@ -535,3 +546,90 @@ def run_replace_process(gui, path, is_file, find_text, tk_replace_widget,
 
     gui.text_results.config(state="disabled")
     gui.text_results.see("1.0")  # Scroll to top after completing
+
+
+# ----------------- Bulk Replace (parallel, journaled) -----------------
+def build_replace_job(gui, find_text, tk_replace_widget, case_sensitive, regex, content_type):
+    """
+    Snapshot the Replace box and options into a picklable ReplaceJob.
+    """
+    replace_plain_text = extract_plain_text(tk_replace_widget)
+    return ReplaceJob(
+        find_text, replace_plain_text,
+        case_sensitive=case_sensitive,
+        regex=regex,
+        templates=build_replacement_runs(get_text_widget_char_formats(tk_replace_widget) or []),
+        heading_templates=build_replacement_runs(build_plain_char_formats(replace_plain_text)),
+        content_type=content_type,
+        apply_heading_format=gui.apply_heading_format_var.get()
+    )
+
+
+def run_bulk_replace_process(gui, path, is_file, find_text, tk_replace_widget,
+                             case_sensitive, regex, include_subfolders, txt, doc, pdf, content_type,
+                             workers=None):
+    """
+    Same replace as run_replace_process, but files are processed in a worker
+    pool, swapped in atomically and journaled. Running it again with the same
+    options resumes an interrupted run; run_rollback_process undoes it.
+    """
+    files = get_files_to_process(path, is_file, include_subfolders, txt, doc, pdf)
+    job = build_replace_job(gui, find_text, tk_replace_widget, case_sensitive, regex, content_type)
+
+    def progress(done, total, entry):
+        if done % 20 == 0 or done == total:
+            gui.status_label.config(text=f"Bulk replace {done}/{total} files...", fg="blue")
+            gui.status_label.update_idletasks()
+
+    summary = bulk_replace(files, job, workers=workers, progress=progress)
+
+    gui.text_results.config(state="normal")
+    gui.text_results.delete("1.0", "end")
+    gui.text_results.insert("end", f"Processing {len(files)} file(s)...\n\n")
+
+    total_replacements = 0
+    for file_path, count in summary["results"]:
+        total_replacements += count
+        gui.text_results.insert("end", f"{file_path} ({count} replacements)\n")
+    for file_path, error in summary["errors"]:
+        gui.text_results.insert("end", f"Error in {file_path}: {error}\n")
+    if summary["skipped"]:
+        gui.text_results.insert("end", f"\n{len(summary['skipped'])} file(s) already done by an earlier run (skipped)\n")
+
+    gui.text_results.insert(
+        "end",
+        f"\nReplace complete.\n"
+        f"Files with replacements: {len(summary['results'])}\n"
+        f"Total replacements made: {total_replacements}\n"
+        f"Journal: {summary['journal']}\n"
+    )
+    gui.text_results.config(state="disabled")
+    gui.text_results.see("1.0")
+
+    gui.status_label.config(text=f"Bulk replace complete ({total_replacements} replacements)", fg="green")
+    return summary
+
+
+def run_rollback_process(gui, path, is_file, find_text, tk_replace_widget,
+                         case_sensitive, regex, include_subfolders, txt, doc, pdf, content_type):
+    """
+    Restore the originals of the bulk replace run made with the same options.
+    """
+    files = get_files_to_process(path, is_file, include_subfolders, txt, doc, pdf)
+    job = build_replace_job(gui, find_text, tk_replace_widget, case_sensitive, regex, content_type)
+    restored, skipped = rollback(files, job)
+
+    gui.text_results.config(state="normal")
+    gui.text_results.delete("1.0", "end")
+    for file_path in restored:
+        gui.text_results.insert("end", f"{file_path} (restored)\n")
+    for file_path in skipped:
+        gui.text_results.insert("end", f"{file_path} (changed since the replace, not restored)\n")
+    gui.text_results.insert("end", f"\nRollback complete.\nFiles restored: {len(restored)}\n")
+    gui.text_results.config(state="disabled")
+
+    if restored or skipped:
+        gui.status_label.config(text=f"Rollback complete ({len(restored)} file(s) restored)", fg="green")
+    else:
+        gui.status_label.config(text="No bulk replace found for these options", fg="orange")
+    return restored, skipped
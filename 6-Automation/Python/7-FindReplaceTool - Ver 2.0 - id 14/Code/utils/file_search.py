@@ -1,16 +1,23 @@
 import os
-import re
-from docx import Document
-import fitz  # PyMuPDF for PDFs
+from contextlib import closing
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from utils.text_cache import load_buckets, iter_search_lines
+from utils.search_query import SearchQuery, TermsQuery
+from utils.txt_scan import scan_txt
+from utils.text_extract import iter_txt_lines, lines_for_content_type, pdf_line_pages
+from utils.trigram_index import find_index_root, narrow_files, iter_index_lines
 
 
-def find_in_file(file_path, search_text, case_sensitive=False, use_regex=False, content_type="all"):
+def find_in_file(file_path, search_text, case_sensitive=False, use_regex=False, content_type="all", query=None):
     """
     Search for text in a file and return structured results.
+    Pass a prebuilt SearchQuery as `query` to skip compiling it per file.
     Returns:
         dict:
             'file_path': str
             'matches': list of tuples (line_number, line_text, [(start,end), ...])
+            'pages': PDF only, (page, line in page) per match, both 1-based
             'file_find_count': int
             'error': str or None
             'unsupported': bool
@@ -22,82 +29,34 @@ def find_in_file(file_path, search_text, case_sensitive=False, use_regex=False,
         "error": None,
         "unsupported": False
     }
+    if query is None:
+        query = SearchQuery(search_text, case_sensitive, use_regex)
 
     try:
         _, ext = os.path.splitext(file_path)
         ext = ext.lower()
-        lines = []
-        primary_line_count = 0
-        flags = 0 if case_sensitive else re.IGNORECASE  # Handle case insensitivity
-        
-        # ----- TXT -----        
+
+        # ----- TXT (memory-mapped, only matching lines are decoded) -----
         if ext == ".txt":
-            with open(file_path, "r", encoding="utf-8") as f:
-                lines = [line.rstrip("\n") for line in f]
-            primary_line_count = len(lines)
-
-        # ----- DOCX -----
-        elif ext == ".docx":
-            doc = Document(file_path)
-            primary_lines = []
-
-            if content_type in ("all", "text"):
-                for p in doc.paragraphs:
-                    if p.text.strip() and (content_type != "text" or not (p.style and p.style.name.startswith("Heading"))):
-                        primary_lines.append(p.text)
-
-            if content_type in ("headings", "tables_headings"):
-                for p in doc.paragraphs:
-                    if p.style and p.style.name.startswith("Heading") and p.text.strip():
-                        primary_lines.append(p.text)
-
-            if content_type in ("tables", "tables_headings", "all"):
-                for table in doc.tables:
-                    for row in table.rows:
-                        for cell in row.cells:
-                            if cell.text.strip():
-                                primary_lines.append(cell.text)
-
-            lines = primary_lines
-            primary_line_count = len(lines)
-
-
-        # ----- PDF -----
-        elif ext == ".pdf":
-            doc = fitz.open(file_path)
-            for page in doc:
-                text = page.get_text()
-                if text:
-                    lines.extend(text.splitlines())
-            primary_line_count = len(lines)
+            found = scan_txt(file_path, query)
+
+        # ----- DOCX / PDF (extracted text is cached on disk) -----
+        elif ext in (".docx", ".pdf"):
+            buckets = load_buckets(file_path, ext)
+            lines = lines_for_content_type(buckets, content_type)
+            found = query.find_in_lines(lines)
 
         else:
             results["unsupported"] = True
             return results
 
         # ----- SEARCH -----
-        for i, line in enumerate(lines, start=1):
-            matches = []
-
-            if use_regex:
-                try:
-                    matches = [m.span() for m in re.finditer(search_text, line, flags)]
-                except re.error as e:
-                    continue
-            else:
-                search_line = line if case_sensitive else line.lower()
-                target = search_text if case_sensitive else search_text.lower()
-                pos = 0
-                while True:
-                    idx = search_line.find(target, pos)
-                    if idx == -1:
-                        break
-                    matches.append((idx, idx + len(search_text)))
-                    pos = idx + len(search_text)
-
-            if matches:
-                results["matches"].append((i, line, matches))
-                results["file_find_count"] += len(matches)
+        for line_no, line, spans in found:
+            results["matches"].append((line_no, line, spans))
+            results["file_find_count"] += len(spans)
+
+        if ext == ".pdf":
+            results["pages"] = pdf_line_pages(buckets, [line_no for line_no, _, _ in results["matches"]])
 
     except Exception as e:
         results["error"] = str(e)
@@ -105,10 +64,12 @@ def find_in_file(file_path, search_text, case_sensitive=False, use_regex=False,
     return results
 
 
-def search_path(path, search_text, selected_type="file", case_sensitive=False, use_regex=False,
-                search_subfolders=False, txt_only=False, doc_only=False, pdf_only=False, content_type="all"):
-    results_list = []
-
+def collect_files(path, selected_type="file", search_subfolders=False,
+                  txt_only=False, doc_only=False, pdf_only=False):
+    """
+    Return the list of files to search, in a stable order
+    (folders walked top-down, names sorted inside each folder).
+    """
     extensions = []
     if txt_only: extensions.append(".txt")
     if doc_only: extensions.append(".docx")
@@ -117,302 +78,137 @@ def search_path(path, search_text, selected_type="file", case_sensitive=False, u
     def file_matches(name):
         return any(name.lower().endswith(ext) for ext in extensions) if extensions else True
 
+    files = []
     if selected_type == "file" and os.path.isfile(path):
-        results_list.append(find_in_file(path, search_text, case_sensitive, use_regex, content_type))
+        files.append(path)
 
     elif selected_type == "folder" and os.path.isdir(path):
-        if search_subfolders:
-            for root, _, files in os.walk(path):
-                for f in files:
-                    if file_matches(f):
-                        results_list.append(find_in_file(os.path.join(root, f), search_text, case_sensitive, use_regex, content_type))
-        else:
-            for f in os.listdir(path):
-                full = os.path.join(path, f)
-                if os.path.isfile(full) and file_matches(f):
-                    results_list.append(find_in_file(full, search_text, case_sensitive, use_regex, content_type))
-
-    return results_list
-
-
-def display_results(gui, results_list):
-    gui.text_results.config(state="normal")
-    gui.text_results.tag_remove("highlight", "1.0", "end")
-    gui.text_results.tag_remove("bold", "1.0", "end")
-    gui.text_results.tag_configure("bold", font=("TkDefaultFont", 10, "bold"))
-    gui.text_results.tag_configure("highlight", background="yellow")
-    gui.text_results.delete("1.0", "end")
-
-    total_finds = 0
-    files_with_finds = 0
-
-    for result in results_list:
-        file_path = result["file_path"]
-
-        if result["unsupported"]:
-            start = gui.text_results.index("end-1c")
-            gui.text_results.insert("end", f"Unsupported file type: {file_path}\n\n")
-            end = gui.text_results.index("end-1c")
-            gui.text_results.tag_add("bold", start, end)
-            continue
-
-        if result["error"]:
-            start = gui.text_results.index("end-1c")
-            gui.text_results.insert("end", f"Error reading file: {file_path} -> {result['error']}\n\n")
-            end = gui.text_results.index("end-1c")
-            gui.text_results.tag_add("bold", start, end)
-            continue
-
-        file_find_count = result["file_find_count"]
-        matches = result["matches"]
-
-        if file_find_count > 0:
-            files_with_finds += 1
-            total_finds += file_find_count
-
-            start = gui.text_results.index("end-1c")
-            gui.text_results.insert("end", f"{file_path} ({file_find_count} matches)\n")
-            end = gui.text_results.index("end-1c")
-            gui.text_results.tag_add("bold", start, end)
-
-            for line_no, text, line_matches in matches:
-                ln_start = gui.text_results.index("end-1c")
-                gui.text_results.insert("end", f"line [{line_no}]: ")
-                ln_end = gui.text_results.index("end-1c")
-                gui.text_results.tag_add("bold", ln_start, ln_end)
-
-                content_start = gui.text_results.index("end-1c")
-                gui.text_results.insert("end", text + "\n")
-
-                for s, e in line_matches:
-                    gui.text_results.tag_add(
-                        "highlight",
-                        f"{content_start}+{s}c",
-                        f"{content_start}+{e}c"
-                    )
-            gui.text_results.insert("end", "\n")
-        else:
-            start = gui.text_results.index("end-1c")
-            gui.text_results.insert("end", f"{file_path}\n")
-            end = gui.text_results.index("end-1c")
-            gui.text_results.tag_add("bold", start, end)
-            gui.text_results.insert("end", "No matches found in this file.\n\n")
+        for root, dirs, names in os.walk(path):
+            dirs.sort()
+            for f in sorted(names):
+                if file_matches(f):
+                    files.append(os.path.join(root, f))
+            if not search_subfolders:
+                break
 
-    gui.text_results.insert("end", f"Search complete.\nFiles with matches: {files_with_finds}\nTotal matches found: {total_finds}\n\n")
-    gui.text_results.config(state="disabled")
-    gui.text_results.see("1.0")
+    return files
 
 
-def run_search_file_paths_only(gui, path, search_text, selected_type="file",
-                               case_sensitive=False, use_regex=False, search_subfolders=False,
-                               txt_only=False, doc_only=False, pdf_only=False,
-                               content_type="all"):  # <-- added content_type
+def default_workers():
     """
-    Search a file or folder for text (supports regex and case sensitivity),
-    and insert only the file paths of files that contain matches into gui.text_results.
-    Skips unsupported files silently.
+    Default size of the search process pool (one worker per CPU core).
     """
+    return os.cpu_count() or 1
 
-    if not search_text.strip():
-        from tkinter import messagebox
-        messagebox.showwarning("Empty Find Field", "The Find field is empty. Please enter text to search.")
-        return
-
-    gui.text_results.config(state="normal")
-    gui.text_results.delete("1.0", "end")  # Clear previous results
-    gui.text_results.tag_remove("bold", "1.0", "end")
-    gui.text_results.tag_configure("bold", font=("TkDefaultFont", 10, "bold"))
-
-    def process_file(file_path):
-        try:
-            _, ext = os.path.splitext(file_path)
-            lines = []
-
-            if ext.lower() == ".txt":
-                with open(file_path, "r", encoding="utf-8") as f:
-                    lines = [line.rstrip("\n") for line in f if line.strip()]
-
-            elif ext.lower() == ".docx":
-                doc = Document(file_path)
-                lines = []
-
-                # Apply content_type filter
-                if content_type == "all":
-                    lines = [p.text for p in doc.paragraphs if p.text.strip()]
-                elif content_type == "tables":
-                    for table in doc.tables:
-                        for row in table.rows:
-                            for cell in row.cells:
-                                if cell.text.strip():
-                                    lines.append(cell.text)
-                elif content_type == "headings":
-                    for p in doc.paragraphs:
-                        if p.style.name.startswith("Heading") and p.text.strip():
-                            lines.append(p.text)
-                elif content_type == "tables_headings":
-                    for p in doc.paragraphs:
-                        if p.style.name.startswith("Heading") and p.text.strip():
-                            lines.append(p.text)
-                    for table in doc.tables:
-                        for row in table.rows:
-                            for cell in row.cells:
-                                if cell.text.strip():
-                                    lines.append(cell.text)
-
-            elif ext.lower() == ".pdf":
-                doc = fitz.open(file_path)
-                lines = [text_line for page in doc for text_line in page.get_text().splitlines() if text_line.strip()]
-            else:
-                return  # skip unsupported files
-
-            found = False
-            flags = 0 if case_sensitive else re.IGNORECASE
-
-            for line in lines:
-                if use_regex:
-                    try:
-                        if re.search(search_text, line, flags):
-                            found = True
-                            break
-                    except re.error:
-                        continue
-                else:
-                    line_to_search = line if case_sensitive else line.lower()
-                    search_for = search_text if case_sensitive else search_text.lower()
-                    if search_for in line_to_search:
-                        found = True
-                        break
-
-            if found:
-                start_index = gui.text_results.index("end-1c")
-                gui.text_results.insert("end", f"{file_path}\n")
-                end_index = gui.text_results.index("end-1c")
-                gui.text_results.tag_add("bold", start_index, end_index)
-
-        except Exception:
-            pass  # silently ignore read errors
-
-    # --- Process files/folders ---
-    if selected_type == "file" and os.path.isfile(path):
-        process_file(path)
-    elif selected_type == "folder" and os.path.isdir(path):
-        extensions = []
-        if txt_only: extensions.append(".txt")
-        if doc_only: extensions.append(".docx")
-        if pdf_only: extensions.append(".pdf")
 
-        def file_matches(filename):
-            return any(filename.lower().endswith(ext) for ext in extensions) if extensions else True
+def iter_search_path(path, search_text, selected_type="file", case_sensitive=False, use_regex=False,
+                     search_subfolders=False, txt_only=False, doc_only=False, pdf_only=False,
+                     content_type="all", workers=None, search_func=find_in_file, use_index=True,
+                     files=None, query=None):
+    """
+    Search a file or folder and yield one result dict per file (see find_in_file).
+
+    DOCX/PDF parsing is CPU-bound, so folder searches are spread over a
+    process pool of `workers` processes (default: one per core).
+    Results are yielded in the same order as collect_files(), as soon as
+    each one (and every file before it) is finished.
+    When the folder (or a parent) has a trigram index, literal searches
+    only open the files the index says can match (and the files changed
+    since it was built; the index itself is refreshed by Build Index).
+    Pass `files` (from collect_files) when the caller already listed them,
+    and `query` to hand search_func a prebuilt query (e.g. a TermsQuery).
+    """
+    if files is None:
+        files = collect_files(path, selected_type, search_subfolders, txt_only, doc_only, pdf_only)
+
+    # ----- Trigram index: files that cannot contain a literal query are not opened -----
+    to_search = files
+    if use_index and selected_type == "folder" and not use_regex and query is None:
+        index_root = find_index_root(path)
+        if index_root:
+            to_search = narrow_files(index_root, files, search_text)
+
+    # Compiled once here, pickled once per chunk of files for the workers
+    if query is None:
+        query = SearchQuery(search_text, case_sensitive, use_regex)
+    worker = partial(search_func, search_text=search_text, case_sensitive=case_sensitive,
+                     use_regex=use_regex, content_type=content_type, query=query)
+
+    workers = workers or default_workers()
+    workers = min(workers, len(to_search))
+
+    executor = None
+    if workers <= 1:
+        # Single file / single worker: no pool start-up cost
+        searched = map(worker, to_search)
+    else:
+        # Small chunks keep results streaming; bigger chunks cut IPC on huge folders
+        chunksize = max(1, min(16, len(to_search) // (workers * 8)))
+        executor = ProcessPoolExecutor(max_workers=workers)
+        searched = executor.map(worker, to_search, chunksize=chunksize)
+
+    try:
+        if to_search is files:
+            yield from searched
+        else:
+            candidates = set(to_search)
+            for file_path in files:
+                yield next(searched) if file_path in candidates else no_match_result(file_path)
+    finally:
+        # Also reached when the caller stops iterating early
+        if executor:
+            executor.shutdown(wait=True, cancel_futures=True)
 
-        for root, dirs, files in os.walk(path):
-            for f in files:
-                file_path = os.path.join(root, f)
-                if file_matches(f):
-                    process_file(file_path)
-            if not search_subfolders:
-                break
 
-    gui.text_results.config(state="disabled")
-    gui.text_results.see("1.0")
+def no_match_result(file_path):
+    """
+    Result dict for a file known to have no matches (see find_in_file).
+    """
+    return {
+        "file_path": file_path,
+        "matches": [],
+        "file_find_count": 0,
+        "error": None,
+        "unsupported": False
+    }
 
 
-# functions for insert
 # -----------------------------
-# Find text in a single file
+# Many terms in one pass
 # -----------------------------
-def find_in_file_insert(file_path, search_text, case_sensitive=False, use_regex=False, content_type="all"):
+def find_terms_in_file(file_path, search_text=None, case_sensitive=False, use_regex=False, content_type="all",
+                       query=None):
     """
-    Search for text in a file and return structured results.
-    Returns:
-        dict:
-            'file_path': str
-            'matches': list of tuples (line_number, line_text, [(start,end), ...])
-            'file_find_count': int
-            'error': str or None
-            'unsupported': bool
+    Search a file for every term of a TermsQuery, reading its text once.
+    search_text may be a list of terms when no query is passed.
+    Returns the find_in_file dict (spans of all terms together) plus
+        'term_counts': {term: hits in this file} for the terms that were found
     """
     results = {
         "file_path": file_path,
         "matches": [],
+        "term_counts": {},
         "file_find_count": 0,
         "error": None,
         "unsupported": False
     }
+    if query is None:
+        query = TermsQuery(search_text or [], case_sensitive, use_regex)
 
     try:
-        _, ext = os.path.splitext(file_path)
-        ext = ext.lower()
-        lines = []
-        primary_line_count = 0
-        flags = 0 if case_sensitive else re.IGNORECASE
-
-        # ----- TXT -----
+        ext = os.path.splitext(file_path)[1].lower()
         if ext == ".txt":
-            with open(file_path, "r", encoding="utf-8") as f:
-                lines = [line.rstrip("\n") for line in f]
-            primary_line_count = len(lines)
-
-        # ----- DOCX -----
-        elif ext == ".docx":
-            doc = Document(file_path)
-            primary_lines = []
-
-            if content_type in ("all", "text"):
-                for p in doc.paragraphs:
-                    if p.text.strip() and (content_type != "text" or not (p.style and p.style.name.startswith("Heading"))):
-                        primary_lines.append(p.text)
-
-            if content_type in ("headings", "tables_headings"):
-                for p in doc.paragraphs:
-                    if p.style and p.style.name.startswith("Heading") and p.text.strip():
-                        primary_lines.append(p.text)
-
-            if content_type in ("tables", "tables_headings", "all"):
-                for table in doc.tables:
-                    for row in table.rows:
-                        for cell in row.cells:
-                            if cell.text.strip():
-                                primary_lines.append(cell.text)
-
-            lines = primary_lines
-            primary_line_count = len(lines)
-
-        # ----- PDF -----
-        elif ext == ".pdf":
-            doc = fitz.open(file_path)
-            for page in doc:
-                text = page.get_text()
-                if text:
-                    lines.extend(text.splitlines())
-            primary_line_count = len(lines)
-
+            lines = list(iter_txt_lines(file_path))
+        elif ext in (".docx", ".pdf"):
+            lines = lines_for_content_type(load_buckets(file_path, ext), content_type)
         else:
             results["unsupported"] = True
             return results
 
-        # ----- SEARCH -----
-        for i, line in enumerate(lines, start=1):
-            matches = []
-
-            if use_regex:
-                try:
-                    matches = [m.span() for m in re.finditer(search_text, line, flags)]
-                except re.error as e:
-                    continue
-            else:
-                search_line = line if case_sensitive else line.lower()
-                target = search_text if case_sensitive else search_text.lower()
-                pos = 0
-                while True:
-                    idx = search_line.find(target, pos)
-                    if idx == -1:
-                        break
-                    matches.append((idx, idx + len(search_text)))
-                    pos = idx + len(search_text)
-
-            if matches:
-                results["matches"].append((i, line, matches))
-                results["file_find_count"] += len(matches)
+        matches, counts = query.find_in_lines(lines)
+        results["matches"] = matches
+        results["term_counts"] = {term: n for term, n in zip(query.terms, counts) if n}
+        results["file_find_count"] = sum(counts)
 
     except Exception as e:
         results["error"] = str(e)
@@ -420,34 +216,62 @@ def find_in_file_insert(file_path, search_text, case_sensitive=False, use_regex=
     return results
 
 
-# -----------------------------
-# Search files/folders
-# -----------------------------
-def search_path_insert(path, search_text, selected_type="file", case_sensitive=False, use_regex=False,
-                search_subfolders=False, txt_only=False, doc_only=False, pdf_only=False, content_type="all"):
-    results_list = []
+def iter_search_terms(path, terms, selected_type="file", case_sensitive=False, use_regex=False,
+                      search_subfolders=False, txt_only=False, doc_only=False, pdf_only=False,
+                      content_type="all", workers=None, files=None):
+    """
+    Search a file or folder for many terms at once and yield one
+    find_terms_in_file() dict per file (same order and pool as iter_search_path).
+    Every file is parsed and scanned once, whatever the number of terms.
+    Raises ValueError when a regex term does not compile.
+    """
+    query = TermsQuery(terms, case_sensitive, use_regex)
+    if query.error:
+        raise ValueError(query.error)
+    return iter_search_path(path, "", selected_type, case_sensitive, use_regex, search_subfolders,
+                            txt_only, doc_only, pdf_only, content_type, workers=workers,
+                            search_func=find_terms_in_file, files=files, query=query)
 
-    extensions = []
-    if txt_only: extensions.append(".txt")
-    if doc_only: extensions.append(".docx")
-    if pdf_only: extensions.append(".pdf")
 
-    def file_matches(name):
-        return any(name.lower().endswith(ext) for ext in extensions) if extensions else True
+def file_has_match(file_path, query, content_type="all"):
+    """
+    True when a TXT/DOCX/PDF contains at least one match.
+    Unsupported and unreadable files count as no match.
+    """
+    try:
+        ext = os.path.splitext(file_path)[1].lower()
+        if ext not in (".txt", ".docx", ".pdf"):
+            return False  # skip unsupported files
 
-    if selected_type == "file" and os.path.isfile(path):
-        results_list.append(find_in_file_insert(path, search_text, case_sensitive, use_regex, content_type))
+        # Lines are streamed, so reading stops at the first match
+        # (for PDFs, later pages are never decoded)
+        with closing(iter_search_lines(file_path, ext, content_type)) as stream:
+            lines = (line for line in stream if line.strip())
+            return query.any_match(lines)
 
-    elif selected_type == "folder" and os.path.isdir(path):
-        if search_subfolders:
-            for root, _, files in os.walk(path):
-                for f in files:
-                    if file_matches(f):
-                        results_list.append(find_in_file_insert(os.path.join(root, f), search_text, case_sensitive, use_regex, content_type))
-        else:
-            for f in os.listdir(path):
-                full = os.path.join(path, f)
-                if os.path.isfile(full) and file_matches(f):
-                    results_list.append(find_in_file_insert(full, search_text, case_sensitive, use_regex, content_type))
+    except Exception:
+        return False  # silently ignore read errors
 
-    return results_list
+
+def iter_matching_paths(path, search_text, selected_type="file", case_sensitive=False, use_regex=False,
+                        search_subfolders=False, txt_only=False, doc_only=False, pdf_only=False,
+                        content_type="all", files=None):
+    """
+    Yield (file_path, found) for every file of the search, in collect_files() order.
+    When the folder (or a parent) has a trigram index, files indexed and
+    unchanged since are answered from the index alone and never opened.
+    """
+    query = SearchQuery(search_text, case_sensitive, use_regex)
+    if files is None:
+        files = collect_files(path, selected_type, search_subfolders, txt_only, doc_only, pdf_only)
+    index_root = find_index_root(path) if selected_type == "folder" else None
+
+    if index_root:
+        for file_path, lines in iter_index_lines(index_root, files, search_text, use_regex, content_type):
+            if lines is None:
+                yield file_path, file_has_match(file_path, query, content_type)
+            else:
+                yield file_path, query.any_match(lines)
+    else:
+        for file_path in files:
+            yield file_path, file_has_match(file_path, query, content_type)
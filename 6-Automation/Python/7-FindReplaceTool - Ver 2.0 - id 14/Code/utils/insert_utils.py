@@ -1,6 +1,107 @@
-from docx import Document
-import os
-from collections import Counter
+from bisect import bisect_left, bisect_right
+
+from utils.docx_locator import LocatorResolver, text_runs
+
+
+# -----------------------------
+# Match index (built once per file)
+# -----------------------------
+def build_match_index(matches_list):
+    """
+    Map each matched line text to all of its match spans, so a paragraph
+    finds its matches with one dict lookup instead of rescanning the list.
+    A text that matched on several lines keeps the spans of every line.
+    """
+    index = {}
+    for line_no, line_text, ranges in matches_list:
+        index.setdefault(line_text, []).extend(ranges)
+    return index
+
+
+def run_offsets(runs):
+    """
+    Run-offset table of a paragraph: (run texts, start offset of each run).
+    """
+    texts = [run.text for run in runs]
+    starts = []
+    pos = 0
+    for text in texts:
+        starts.append(pos)
+        pos += len(text)
+    return texts, starts
+
+
+def iter_insert_paragraphs(doc, content_type="all"):
+    """
+    Yield every paragraph insert_at_matches may edit, each exactly once:
+    body paragraphs allowed by content_type, then table cell paragraphs
+    (merged cells, which python-docx repeats in row.cells, only once).
+    """
+    content_type = content_type.lower()
+    for p in doc.paragraphs:
+        if content_type == "text":
+            # Only normal paragraphs (not headings)
+            if p.style and p.style.name.startswith("Heading"):
+                continue
+        elif content_type in ("headings", "tables_headings"):
+            # Only heading paragraphs
+            if not (p.style and p.style.name.startswith("Heading")):
+                continue
+        # else: "all" -> everything, no need to check
+        yield p
+
+    if content_type in ("all", "tables", "tables_headings"):
+        seen_cells = set()
+        for table in doc.tables:
+            for row in table.rows:
+                for cell in row.cells:
+                    if cell._tc in seen_cells:
+                        continue
+                    seen_cells.add(cell._tc)
+                    yield from cell.paragraphs
+
+
+def insert_in_paragraph(p, spans, text, insert_reference, position, runs=None):
+    """
+    Insert text into one paragraph for each of its match spans.
+    Spans are offsets into the text of `runs` (default: p.runs).
+    Returns the number of insertions.
+    """
+    runs = p.runs if runs is None else runs
+    if not runs:
+        return 0
+
+    # ---------- MATCHED LINE: once per match at the start / end of the paragraph ----------
+    if insert_reference == "matched_line":
+        if position == "before":
+            runs[0].text = (text * len(spans)) + runs[0].text
+        else:
+            runs[-1].text = runs[-1].text + (text * len(spans))
+        return len(spans)
+
+    # ---------- MATCHED CONTENT: at each match start / end ----------
+    texts, starts = run_offsets(runs)
+    ends = [s + len(t) for s, t in zip(starts, texts)]
+    count = 0
+    # Right to left, so the offsets still to visit never move
+    for start, end in sorted(spans, reverse=True):
+        if position == "before":
+            # run containing start
+            i = bisect_right(starts, start) - 1
+            if i < 0 or start >= ends[i]:
+                continue
+            offset = start - starts[i]
+        else:
+            # first run whose end reaches the match end
+            i = bisect_left(ends, end)
+            if i >= len(runs) or starts[i] > end:
+                continue
+            offset = end - starts[i]
+
+        texts[i] = texts[i][:offset] + text + texts[i][offset:]
+        runs[i].text = texts[i]
+        count += 1
+    return count
 
 
 # -----------------------------
@@ -15,7 +116,8 @@ def insert_at_matches(
     position="before",
     line_offset=0,
     insert_reference="matched_line",
-    content_type="all",    
+    content_type="all",
+    locators=None,
 ):
     insert_text = {"space": " ", "newline": "\n"}.get(insert_type.lower(), content)
     prefix = insert_text * repeat
@@ -35,359 +137,55 @@ def insert_at_matches(
         return total_insertions, "\n".join(new_lines)
 
     # ================= DOCX =================
+    # Each paragraph is visited once and looks its matches up in the index,
+    # so the pass is linear in document size
     doc = doc_or_text
-    if insert_reference == "matched_line":
-        if position.lower() == "before":
-            # ---------- HANDLE NORMAL PARAGRAPHS ----------
-            for p in doc.paragraphs:
-                if not p.text.strip():
-                    continue
-                if len(p._element.xpath(".//w:drawing")) > 0:
-                    continue
-
-                # Check content type
-                if content_type.lower() == "text":
-                    # Only normal paragraphs (not headings)
-                    if p.style and p.style.name.startswith("Heading"):
-                        continue
-                elif content_type.lower() in ("headings", "tables_headings"):
-                    # Only heading paragraphs
-                    if not (p.style and p.style.name.startswith("Heading")):
-                        continue
-                # else: "all" -> everything, no need to check
-
-                # Count total occurrences for this paragraph
-                match_count = 0
-                for line_no, line_text, ranges in matches_list:
-                    if line_text == p.text:
-                        match_count += len(ranges)  # number of matches within the line
-
-                if match_count == 0:
-                    continue
-
-                if p.runs:
-                    p.runs[0].text = (insert_text * repeat * match_count) + p.runs[0].text
-                    total_insertions += match_count
-
-            if content_type.lower() in ("all", "tables", "tables_headings"):
-                # ---------- HANDLE TABLES ----------
-                for table in doc.tables:
-                    for row in table.rows:
-                        for cell in row.cells:
-                            for p in cell.paragraphs:
-                                if not p.text.strip():
-                                    continue
-                                if len(p._element.xpath(".//w:drawing")) > 0:
-                                    continue
-
-                                # Count total occurrences in this paragraph
-                                match_count = 0
-                                for line_no, line_text, ranges in matches_list:
-                                    if line_text == p.text:
-                                        match_count += len(ranges)
-
-                                if match_count == 0:
-                                    continue
-
-                                if p.runs:
-                                    p.runs[0].text = (insert_text * repeat * match_count) + p.runs[0].text
-                                    total_insertions += match_count
-        if position.lower() == "after":
-            print("after")
-            # ---------- HANDLE NORMAL PARAGRAPHS ----------
-            for p in doc.paragraphs:
-                if not p.text.strip():
-                    continue
-                if len(p._element.xpath(".//w:drawing")) > 0:
-                    continue
-
-                # Check content type
-                if content_type.lower() == "text":
-                    if p.style and p.style.name.startswith("Heading"):
-                        continue
-                elif content_type.lower() in ("headings", "tables_headings"):
-                    if not (p.style and p.style.name.startswith("Heading")):
-                        continue
-
-                match_count = 0
-                for line_no, line_text, ranges in matches_list:
-                    if line_text == p.text:
-                        match_count += len(ranges)
-
-                if match_count == 0:
-                    continue
-
-                if p.runs:
-                    p.runs[-1].text = p.runs[-1].text + (insert_text * repeat * match_count)
-                    total_insertions += match_count
-
-            if content_type.lower() in ("all", "tables", "tables_headings"):
-                # ---------- HANDLE TABLES ----------
-                for table in doc.tables:
-                    for row in table.rows:
-                        for cell in row.cells:
-                            for p in cell.paragraphs:
-                                if not p.text.strip():
-                                    continue
-                                if len(p._element.xpath(".//w:drawing")) > 0:
-                                    continue
-
-                                match_count = 0
-                                for line_no, line_text, ranges in matches_list:
-                                    if line_text == p.text:
-                                        match_count += len(ranges)
-
-                                if match_count == 0:
-                                    continue
-
-                                if p.runs:
-                                    p.runs[-1].text = p.runs[-1].text + (insert_text * repeat * match_count)
-                                    total_insertions += match_count
-    if insert_reference == "matched_content":
-        if position.lower() == "before":
-            # ---------- HANDLE NORMAL PARAGRAPHS ----------
-            for p in doc.paragraphs:
-                if not p.text.strip():
-                    continue
-                if len(p._element.xpath(".//w:drawing")) > 0:
-                    continue
-
-                # Check content type
-                if content_type.lower() == "text":
-                    if p.style and p.style.name.startswith("Heading"):
-                        continue
-                elif content_type.lower() in ("headings", "tables_headings"):
-                    if not (p.style and p.style.name.startswith("Heading")):
-                        continue
-
-                full_text = "".join(run.text for run in p.runs)
-                match_count = 0
-
-                for line_no, line_text, ranges in matches_list:
-                    if line_text == full_text:
-                        for start, end in sorted(ranges, reverse=True):
-                            # find run containing start
-                            char_pos = 0
-                            for run in p.runs:
-                                run_len = len(run.text)
-                                if char_pos <= start < char_pos + run_len:
-                                    offset = start - char_pos
-                                    run.text = (
-                                        run.text[:offset]
-                                        + (insert_text * repeat)
-                                        + run.text[offset:]
-                                    )
-                                    match_count += 1
-                                    break
-                                char_pos += run_len
-
-                if match_count > 0:
-                    total_insertions += match_count
-
-            if content_type.lower() in ("all", "tables", "tables_headings"):
-                # ---------- HANDLE TABLES ----------
-                for table in doc.tables:
-                    for row in table.rows:
-                        for cell in row.cells:
-                            for p in cell.paragraphs:
-                                if not p.text.strip():
-                                    continue
-                                if len(p._element.xpath(".//w:drawing")) > 0:
-                                    continue
+    position = position.lower()
+    if insert_reference not in ("matched_line", "matched_content") or position not in ("before", "after"):
+        return 0
 
-                                full_text = "".join(run.text for run in p.runs)
-                                match_count = 0
+    if locators is not None:
+        return _insert_at_locators(doc, matches_list, locators, prefix, insert_reference, position)
 
-                                for line_no, line_text, ranges in matches_list:
-                                    if line_text == full_text:
-                                        for start, end in sorted(ranges, reverse=True):
-                                            char_pos = 0
-                                            for run in p.runs:
-                                                run_len = len(run.text)
-                                                if char_pos <= start < char_pos + run_len:
-                                                    offset = start - char_pos
-                                                    run.text = (
-                                                        run.text[:offset]
-                                                        + (insert_text * repeat)
-                                                        + run.text[offset:]
-                                                    )
-                                                    match_count += 1
-                                                    break
-                                                char_pos += run_len
-
-                                if match_count > 0:
-                                    total_insertions += match_count
-        if position.lower() == "after":
-            # ---------- HANDLE NORMAL PARAGRAPHS ----------
-            for p in doc.paragraphs:
-                if not p.text.strip():
-                    continue
-                if len(p._element.xpath(".//w:drawing")) > 0:
-                    continue
-
-                # Check content type
-                if content_type.lower() == "text":
-                    if p.style and p.style.name.startswith("Heading"):
-                        continue
-                elif content_type.lower() in ("headings", "tables_headings"):
-                    if not (p.style and p.style.name.startswith("Heading")):
-                        continue
+    match_index = build_match_index(matches_list)
+    if not match_index:
+        return 0
 
-                full_text = "".join(run.text for run in p.runs)
-                match_count = 0
-
-                for line_no, line_text, ranges in matches_list:
-                    if line_text == full_text:
-                        for start, end in sorted(ranges, reverse=True):
-                            char_pos = 0
-                            for run in p.runs:
-                                run_len = len(run.text)
-                                if char_pos <= end <= char_pos + run_len:
-                                    offset = end - char_pos
-                                    run.text = (
-                                        run.text[:offset]
-                                        + (insert_text * repeat)
-                                        + run.text[offset:]
-                                    )
-                                    match_count += 1
-                                    break
-                                char_pos += run_len
-
-                if match_count > 0:
-                    total_insertions += match_count
-
-            if content_type.lower() in ("all", "tables", "tables_headings"):
-                # ---------- HANDLE TABLES ----------
-                for table in doc.tables:
-                    for row in table.rows:
-                        for cell in row.cells:
-                            for p in cell.paragraphs:
-                                if not p.text.strip():
-                                    continue
-                                if len(p._element.xpath(".//w:drawing")) > 0:
-                                    continue
-
-                                full_text = "".join(run.text for run in p.runs)
-                                match_count = 0
-
-                                for line_no, line_text, ranges in matches_list:
-                                    if line_text == full_text:
-                                        for start, end in sorted(ranges, reverse=True):
-                                            char_pos = 0
-                                            for run in p.runs:
-                                                run_len = len(run.text)
-                                                if char_pos <= end <= char_pos + run_len:
-                                                    offset = end - char_pos
-                                                    run.text = (
-                                                        run.text[:offset]
-                                                        + (insert_text * repeat)
-                                                        + run.text[offset:]
-                                                    )
-                                                    match_count += 1
-                                                    break
-                                                char_pos += run_len
-
-                                if match_count > 0:
-                                    total_insertions += match_count
+    for p in iter_insert_paragraphs(doc, content_type):
+        text = p.text
+        if not text.strip():
+            continue
 
+        # matched_line compares the paragraph text, matched_content the text of its runs
+        key = text if insert_reference == "matched_line" else "".join(run.text for run in p.runs)
+        spans = match_index.get(key)
+        if not spans:
+            continue
+        if len(p._element.xpath(".//w:drawing")) > 0:
+            continue
 
+        total_insertions += insert_in_paragraph(p, spans, prefix, insert_reference, position)
 
     return total_insertions
 
-# -----------------------------
-# Apply insert to all files
-# -----------------------------
-def insert_all_files(gui, search_path_func):
-    locked_files = []
-    total_insertions = 0
-    per_file_insertions = []
-
-    results = search_path_func(
-        path=gui.entry_path.get(),
-        search_text=gui.entry_search_text.get(),
-        selected_type=gui.selected_type.get(),
-        case_sensitive=gui.case_sensitive_var.get(),
-        use_regex=gui.enable_regex_var.get(),
-        search_subfolders=gui.subfolders_var.get(),
-        txt_only=gui.txt_var.get(),
-        doc_only=gui.doc_var.get(),
-        pdf_only=gui.pdf_var.get(),
-        content_type=gui.content_type_var.get()
-    )
-
-    if not results:
-        return 0, []
-
-    insert_type = gui.insert_content_type_var.get()
-    insert_reference = gui.insert_reference_var.get()
-    content = gui.insert_content_text_var.get()
-    try:
-        repeat = int(gui.insert_repeat_var.get())
-    except:
-        repeat = 1
-    position = gui.insert_position_var.get()
-    try:
-        line_offset = int(gui.insert_line_offset_var.get())
-    except:
-        line_offset = 0
-
-    for result in results:
-        if result.get("unsupported") or result.get("error"):
-            continue
-        matches = result.get("matches", [])
-        if not matches:
-            continue
 
-        file_path = result["file_path"]
-        ext = os.path.splitext(file_path)[1].lower()
-        count = 0
+def _insert_at_locators(doc, matches_list, locators, text, insert_reference, position):
+    """
+    DOCX insert driven by the search locators: every match goes straight to
+    its paragraph, so identical lines elsewhere in the document are not touched.
+    """
+    resolver = LocatorResolver(doc)
+    targets = {}   # paragraph element -> (paragraph, spans)
+    for (line_no, line_text, spans), locator in zip(matches_list, locators):
+        for siblings, i, local in resolver.locate(locator, line_text, spans):
+            p = siblings[i]
+            targets.setdefault(p._p, (p, []))[1].extend(local)
 
-        try:
-            if ext == ".txt":
-                with open(file_path, "r", encoding="utf-8") as f:
-                    text = f.read()
-                count, new_text = insert_at_matches(
-                    doc_or_text=text,
-                    matches_list=matches,
-                    insert_type=insert_type,
-                    content=content,
-                    repeat=repeat,
-                    position=position,
-                    line_offset=line_offset,
-                    insert_reference=insert_reference,
-                    content_type=gui.content_type_var.get()
-                )
-                if count > 0:
-                    with open(file_path, "w", encoding="utf-8") as f:
-                        f.write(new_text)
-
-            elif ext == ".docx":
-                doc = Document(file_path)
-                count = insert_at_matches(
-                    doc_or_text=doc,
-                    matches_list=matches,
-                    insert_type=insert_type,
-                    content=content,
-                    repeat=repeat,
-                    position=position,
-                    line_offset=line_offset,
-                    insert_reference=insert_reference,
-                    content_type=gui.content_type_var.get()
-                )
-                if count > 0:
-                    doc.save(file_path)
-        except PermissionError:
-            # File is open in another program
-            locked_files.append(file_path)
+    total_insertions = 0
+    for p, spans in targets.values():
+        if not p.text.strip():
             continue
-
-        except Exception as e:
-            print(f"Error processing file {file_path}: {e}")
+        if len(p._element.xpath(".//w:drawing")) > 0:
             continue
-
-
-        if count > 0:
-            total_insertions += count
-            per_file_insertions.append((file_path, count))
-    
-    return total_insertions, per_file_insertions, locked_files
+        total_insertions += insert_in_paragraph(p, spans, text, insert_reference, position, text_runs(p))
+    return total_insertions
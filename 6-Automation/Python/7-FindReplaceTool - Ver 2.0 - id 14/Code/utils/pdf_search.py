@@ -0,0 +1,90 @@
+import fitz  # PyMuPDF for PDFs
+
+from utils.file_search import find_in_file
+
+
+# -----------------------------
+# Character boxes of a page
+# -----------------------------
+def _page_char_lines(page):
+    """
+    Return [(line text, [char bbox, ...]), ...] for a page, in the same
+    line order and with the same text as page.get_text().splitlines().
+    """
+    lines = []
+    raw = page.get_text("rawdict", flags=fitz.TEXTFLAGS_TEXT)
+    for block in raw["blocks"]:
+        if block["type"] != 0:
+            continue
+        for line in block["lines"]:
+            chars = [c for span in line["spans"] for c in span["chars"]]
+            lines.append(("".join(c["c"] for c in chars), [c["bbox"] for c in chars]))
+    return lines
+
+
+def _union(boxes):
+    return (round(min(b[0] for b in boxes), 2), round(min(b[1] for b in boxes), 2),
+            round(max(b[2] for b in boxes), 2), round(max(b[3] for b in boxes), 2))
+
+
+def _span_rects(page, char_lines, line_in_page, line_text, spans):
+    """
+    One (x0, y0, x1, y1) box per span of a matched line.
+    """
+    boxes = None
+    if line_in_page <= len(char_lines) and char_lines[line_in_page - 1][0] == line_text:
+        boxes = char_lines[line_in_page - 1][1]
+    else:
+        # Extraction differed slightly: take the first line with the same text
+        boxes = next((b for text, b in char_lines if text == line_text), None)
+
+    rects = []
+    for start, end in spans:
+        if boxes is not None and end <= len(boxes) and start < end:
+            rects.append(_union(boxes[start:end]))
+        else:
+            found = page.search_for(line_text[start:end])
+            rects.append(tuple(round(v, 2) for v in found[0]) if found else None)
+    return rects
+
+
+def match_rects(file_path, pages, matches):
+    """
+    Boxes of PDF search hits: for each match (see find_in_file) the list of
+    (x0, y0, x1, y1) per span, in PDF points on its page (None if not found).
+    Only pages with hits are laid out, each once.
+    """
+    by_page = {}
+    for i, (page_no, line_in_page) in enumerate(pages):
+        by_page.setdefault(page_no, []).append((i, line_in_page))
+
+    rects = [None] * len(matches)
+    with fitz.open(file_path) as doc:
+        for page_no, items in by_page.items():
+            page = doc[page_no - 1]
+            char_lines = _page_char_lines(page)
+            for i, line_in_page in items:
+                _, line_text, spans = matches[i]
+                rects[i] = _span_rects(page, char_lines, line_in_page, line_text, spans)
+    return rects
+
+
+# -----------------------------
+# PDF search with hit positions
+# -----------------------------
+def find_in_pdf(file_path, search_text, case_sensitive=False, use_regex=False, content_type="all", query=None):
+    """
+    find_in_file() for a PDF, plus where each hit is on its page.
+    Returns the find_in_file dict with:
+        'pages': (page, line in page) per match, both 1-based
+        'rects': per match, one (x0, y0, x1, y1) box per span
+    Other file types are searched as find_in_file does.
+    Works as search_func of iter_search_path().
+    """
+    results = find_in_file(file_path, search_text, case_sensitive, use_regex, content_type, query)
+    if results.get("pages") and not results["error"]:
+        try:
+            results["rects"] = match_rects(file_path, results["pages"], results["matches"])
+        except Exception as e:
+            results["error"] = str(e)
+    return results
@@ -1,4 +1,7 @@
-def remove_blank_line_at_matches(doc_or_text, matches_list, position):
+from utils.docx_locator import LocatorResolver
+
+
+def remove_blank_line_at_matches(doc_or_text, matches_list, position, locators=None):
     removed_total = 0
 
     # ===================== TXT =====================
@@ -35,6 +38,9 @@ def remove_blank_line_at_matches(doc_or_text, matches_list, position):
 
     # ===================== DOCX =====================
     doc = doc_or_text
+    if locators is not None:
+        return _remove_at_locators(doc, matches_list, locators, position, remove_all=False), doc
+
     paragraphs = doc.paragraphs
 
     processed_paragraph_ids = set()
@@ -84,7 +90,7 @@ def remove_blank_line_at_matches(doc_or_text, matches_list, position):
 
     return removed_total, doc
 
-def remove_all_blank_lines_at_matches(doc_or_text, matches_list, position):
+def remove_all_blank_lines_at_matches(doc_or_text, matches_list, position, locators=None):
     removed_total = 0
 
     # ===================== TXT =====================
@@ -119,6 +125,9 @@ def remove_all_blank_lines_at_matches(doc_or_text, matches_list, position):
 
     # ===================== DOCX =====================
     doc = doc_or_text
+    if locators is not None:
+        return _remove_at_locators(doc, matches_list, locators, position, remove_all=True), doc
+
     paragraphs = doc.paragraphs
     processed_paragraph_ids = set()
 
@@ -170,3 +179,57 @@ def remove_all_blank_lines_at_matches(doc_or_text, matches_list, position):
                     print("[DEBUG] Removed ONE '\\n' inside paragraph")
 
     return removed_total, doc
+
+
+# -----------------------------
+# DOCX, driven by search locators
+# -----------------------------
+def _is_blank(p):
+    return p._element.getparent() is not None and not p.text.strip()
+
+
+def _remove_blank_around(paragraphs, i, position, remove_all):
+    """
+    Remove the blank paragraph(s) next to paragraphs[i]; when there is none
+    (or remove_all is set) also drop '\n' line breaks inside the paragraph.
+    paragraphs is a snapshot list, so indexes do not move while removing.
+    """
+    removed = 0
+    step = -1 if position == "before" else 1
+    j = i + step
+    while 0 <= j < len(paragraphs) and _is_blank(paragraphs[j]):
+        paragraphs[j]._element.getparent().remove(paragraphs[j]._element)
+        removed += 1
+        if not remove_all:
+            return removed
+        j += step
+
+    for run in paragraphs[i].runs:
+        while "\n" in run.text:
+            run.text = run.text.replace("\n", "", 1)
+            removed += 1
+            if not remove_all:
+                return removed
+    return removed
+
+
+def _remove_at_locators(doc, matches_list, locators, position, remove_all):
+    """
+    Blank-line removal that jumps to each matched paragraph through its
+    search locator: O(matches) instead of scanning every paragraph per match.
+    Body paragraphs look at their neighbours in the body, table paragraphs
+    at their neighbours inside the same cell.
+    """
+    resolver = LocatorResolver(doc)
+    processed = set()
+    removed_total = 0
+
+    for (_, line_text, spans), locator in zip(matches_list, locators):
+        for siblings, i, _ in resolver.locate(locator, line_text, spans):
+            element = siblings[i]._element
+            if element in processed:
+                continue
+            processed.add(element)
+            removed_total += _remove_blank_around(siblings, i, position, remove_all)
+
+    return removed_total
@@ -0,0 +1,345 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from tkinter import font as tkfont
+
+
+# -----------------------------
+# Row kinds
+# -----------------------------
+ROW_HEADER = 0      # "<path> (N matches)"      ref: file id
+ROW_MATCH = 1       # "line [n]: <text>"        ref: match id (PDFs: "page [p] line [n]")
+ROW_NO_MATCH = 2    # "No matches found ..."    ref: file id
+ROW_BLANK = 3
+ROW_TEXT = 4        # free text                 ref: index into texts
+ROW_BOLD_TEXT = 5   # free text, bold           ref: index into texts
+ROW_PATH = 6        # "<path>" (Paths Only)     ref: file id
+
+MAX_ROW_CHARS = 2000    # very long lines (minified TXT) are cut when shown
+NEWLINE_MARK = "\u21b5"  # table cells hold "\n"; shown as one char so every row is one line
+WHEEL_ROWS = 3
+
+
+class ResultStore:
+    """
+    Search results kept as flat arrays instead of widget text.
+
+    Each displayed row is (kind, ref) in row_kind/row_ref. Matches store their
+    file id and line number in arrays and their spans in one flat array
+    (start, end, start, end, ...); spans of match i are
+    spans[span_index[i]:span_index[i + 1]]. Only the matched line text itself
+    is kept as a Python string.
+    """
+    def __init__(self):
+        self.files = []                     # path per file id
+        self.file_counts = array("I")       # matches per file id
+        self.texts = []                     # free text rows (errors, summary)
+        self.lines = []                     # matched line text per match id
+        self.match_file = array("I")
+        self.match_line_no = array("I")     # line in the file (in the page for PDFs)
+        self.match_page = array("I")        # PDF page, 0 for other files
+        self.span_index = array("I", [0])
+        self.spans = array("I")
+        self.row_kind = array("B")
+        self.row_ref = array("I")
+        self.file_rows = array("I")         # row of every file with matches (jump targets)
+        self.total_matches = 0
+
+    def __len__(self):
+        return len(self.row_kind)
+
+    # -----------------------------
+    # Adding results
+    # -----------------------------
+    def _row(self, kind, ref=0):
+        self.row_kind.append(kind)
+        self.row_ref.append(ref)
+
+    def _file(self, file_path, count=0):
+        self.files.append(file_path)
+        self.file_counts.append(count)
+        return len(self.files) - 1
+
+    def add_text(self, text, bold=False):
+        self.texts.append(text)
+        self._row(ROW_BOLD_TEXT if bold else ROW_TEXT, len(self.texts) - 1)
+
+    def add_blank(self):
+        self._row(ROW_BLANK)
+
+    def add_path(self, file_path):
+        self.file_rows.append(len(self))
+        self._row(ROW_PATH, self._file(file_path))
+
+    def add_result(self, result, show_empty=True):
+        """
+        Add one result dict from find_in_file(); files without matches
+        only get rows when show_empty is set (Run Search vs Matches Only).
+        """
+        file_path = result["file_path"]
+
+        if result["unsupported"]:
+            self.add_text(f"Unsupported file type: {file_path}", bold=True)
+            self.add_blank()
+            return
+
+        if result["error"]:
+            self.add_text(f"Error reading file: {file_path} -> {result['error']}", bold=True)
+            self.add_blank()
+            return
+
+        count = result["file_find_count"]
+        if count == 0:
+            if show_empty:
+                file_id = self._file(file_path)
+                self._row(ROW_HEADER, file_id)
+                self._row(ROW_NO_MATCH, file_id)
+                self.add_blank()
+            return
+
+        file_id = self._file(file_path, count)
+        self.total_matches += count
+        self.file_rows.append(len(self))
+        self._row(ROW_HEADER, file_id)
+
+        pages = result.get("pages")
+        for i, (line_no, line_text, line_matches) in enumerate(result["matches"]):
+            page = 0
+            if pages:
+                page, line_no = pages[i]
+            self.lines.append(line_text)
+            self.match_file.append(file_id)
+            self.match_line_no.append(line_no)
+            self.match_page.append(page)
+            for s, e in line_matches:
+                self.spans.append(s)
+                self.spans.append(e)
+            self.span_index.append(len(self.spans))
+            self._row(ROW_MATCH, len(self.lines) - 1)
+
+        self.add_blank()
+
+    # -----------------------------
+    # Reading rows
+    # -----------------------------
+    def row(self, i):
+        """
+        Return (text, bold_chars, [(start, end), ...]) for row i.
+        Only the first bold_chars characters are bold; spans are highlight ranges.
+        """
+        kind = self.row_kind[i]
+        ref = self.row_ref[i]
+
+        if kind == ROW_MATCH:
+            prefix = f"line [{self.match_line_no[ref]}]: "
+            if self.match_page[ref]:
+                prefix = f"page [{self.match_page[ref]}] {prefix}"
+            text = self.lines[ref][:MAX_ROW_CHARS].replace("\n", NEWLINE_MARK)
+            flat = self.spans[self.span_index[ref]:self.span_index[ref + 1]]
+            size = len(prefix)
+            spans = [(size + s, size + min(e, len(text)))
+                     for s, e in zip(flat[0::2], flat[1::2]) if s < len(text)]
+            return prefix + text, size, spans
+        if kind == ROW_HEADER:
+            text = f"{self.files[ref]} ({self.file_counts[ref]} matches)" if self.file_counts[ref] else self.files[ref]
+            return text, len(text), []
+        if kind == ROW_PATH:
+            return self.files[ref], len(self.files[ref]), []
+        if kind == ROW_NO_MATCH:
+            return "No matches found in this file.", 0, []
+        if kind == ROW_BOLD_TEXT:
+            return self.texts[ref], len(self.texts[ref]), []
+        if kind == ROW_TEXT:
+            return self.texts[ref], 0, []
+        return "", 0, []
+
+    def file_choices(self):
+        """
+        Paths of the files with matches, in the order of file_rows.
+        """
+        return [self.files[self.row_ref[r]] for r in self.file_rows]
+
+
+class ResultsView:
+    """
+    Virtual view of a ResultStore inside gui.text_results.
+
+    While attached, the Text widget only holds the rows currently on screen;
+    the vertical scrollbar, mouse wheel and paging keys move a row offset
+    instead of scrolling the widget. detach() gives the widget back to
+    code that writes to it directly (replace / insert reports).
+    """
+    KEYS = ("<Prior>", "<Next>", "<Up>", "<Down>", "<Control-Home>", "<Control-End>")
+    WHEEL = ("<MouseWheel>", "<Button-4>", "<Button-5>")
+
+    def __init__(self, gui):
+        self.gui = gui
+        self.text = gui.text_results
+        self.vscroll = gui.results_vscroll
+        self.store = None
+        self.top = 0
+        self.attached = False
+        self._rendered = None
+        self._line_height = None
+
+    # -----------------------------
+    # Attach / detach
+    # -----------------------------
+    def attach(self, store):
+        self.store = store
+        self.top = 0
+        self._rendered = None
+
+        if not self.attached:
+            self.text.config(yscrollcommand="")
+            self.vscroll.config(command=self.on_scrollbar)
+            for seq in self.WHEEL:
+                self.text.bind(seq, self.on_wheel)
+            for seq in self.KEYS:
+                self.text.bind(seq, self.on_key)
+            self.text.bind("<Configure>", lambda event: self.refresh(force=True))
+            self.attached = True
+
+        self.update_file_list()
+        self.refresh(force=True)
+
+    def detach(self):
+        if not self.attached:
+            return
+        for seq in self.WHEEL + self.KEYS + ("<Configure>",):
+            self.text.unbind(seq)
+        self.text.config(yscrollcommand=self.vscroll.set)
+        self.vscroll.config(command=self.text.yview)
+        self.attached = False
+        self.store = None
+        self.update_file_list()
+
+    # -----------------------------
+    # Drawing
+    # -----------------------------
+    def visible_rows(self):
+        if self._line_height is None:
+            self._line_height = max(1, tkfont.Font(font=self.text.cget("font")).metrics("linespace"))
+        height = self.text.winfo_height()
+        if height <= 1:  # not mapped yet
+            return int(self.text.cget("height"))
+        return max(1, height // self._line_height)
+
+    def refresh(self, force=False):
+        """
+        Redraw the visible window if it changed (or force) and update the scrollbar.
+        Cheap to call on every tick: at most one screen of rows is drawn.
+        """
+        if not self.attached or self.store is None:
+            return
+        total = len(self.store)
+        rows = self.visible_rows()
+        self.top = max(0, min(self.top, total - rows))
+        end = min(total, self.top + rows)
+
+        state = (self.top, end)
+        if force or state != self._rendered:
+            self._draw(self.top, end)
+            self._rendered = state
+
+        if total:
+            self.vscroll.set(self.top / total, min(1.0, (self.top + rows) / total))
+        else:
+            self.vscroll.set(0.0, 1.0)
+
+    def _draw(self, start, end):
+        segments = []     # text, tags, text, tags, ... for one Text.insert call
+        highlights = []   # index1, index2, ... for one tag_add call
+
+        for line, i in enumerate(range(start, end), start=1):
+            text, bold, spans = self.store.row(i)
+            if bold:
+                segments.extend((text[:bold], ("bold",), text[bold:] + "\n", ()))
+            else:
+                segments.extend((text + "\n", ()))
+            for s, e in spans:
+                highlights.append(f"{line}.{s}")
+                highlights.append(f"{line}.{e}")
+
+        x = self.text.xview()[0]
+        self.text.config(state="normal")
+        self.text.delete("1.0", "end")
+        if segments:
+            self.text.insert("end", *segments)
+        if highlights:
+            self.text.tag_add("highlight", *highlights)
+        self.text.config(state="disabled")
+        self.text.xview_moveto(x)
+
+    # -----------------------------
+    # Scrolling
+    # -----------------------------
+    def scroll_to(self, row):
+        self.top = row
+        self.refresh()
+
+    def on_scrollbar(self, *args):
+        if self.store is None:
+            return
+        if args[0] == "moveto":
+            self.top = int(float(args[1]) * len(self.store))
+        elif args[0] == "scroll":
+            step = int(args[1])
+            self.top += step * (self.visible_rows() if args[2] == "pages" else 1)
+        self.refresh()
+
+    def on_wheel(self, event):
+        if event.num == 4:
+            step = -WHEEL_ROWS
+        elif event.num == 5:
+            step = WHEEL_ROWS
+        else:
+            step = -WHEEL_ROWS if event.delta > 0 else WHEEL_ROWS
+        self.scroll_to(self.top + step)
+        return "break"
+
+    def on_key(self, event):
+        page = self.visible_rows()
+        steps = {"Prior": -page, "Next": page, "Up": -1, "Down": 1}
+        if event.keysym == "Home":
+            self.scroll_to(0)
+        elif event.keysym == "End":
+            self.scroll_to(len(self.store))
+        else:
+            self.scroll_to(self.top + steps.get(event.keysym, 0))
+        return "break"
+
+    # -----------------------------
+    # Jump to file
+    # -----------------------------
+    def next_file(self):
+        if self.store is None:
+            return
+        rows = self.store.file_rows
+        idx = bisect_right(rows, self.top)
+        if idx < len(rows):
+            self.scroll_to(rows[idx])
+
+    def prev_file(self):
+        if self.store is None:
+            return
+        rows = self.store.file_rows
+        idx = bisect_left(rows, self.top) - 1
+        if idx >= 0:
+            self.scroll_to(rows[idx])
+
+    def jump_to_file(self, position):
+        """
+        Scroll to the position-th file with matches (the order of the file list).
+        """
+        if self.store is not None and 0 <= position < len(self.store.file_rows):
+            self.scroll_to(self.store.file_rows[position])
+
+    def update_file_list(self):
+        """
+        Fill the "Jump to file" list with the files that have matches.
+        """
+        combo = getattr(self.gui, "jump_file_combo", None)
+        if combo is None:
+            return
+        combo["values"] = self.store.file_choices() if self.store is not None else []
+        combo.set("")
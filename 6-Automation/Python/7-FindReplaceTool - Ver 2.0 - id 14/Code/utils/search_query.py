@@ -0,0 +1,282 @@
+import re
+from bisect import bisect_right
+
+
+class SearchQuery:
+    """
+    A Find request compiled once per search and handed to every file worker
+    (it pickles, so it can cross into the process pool).
+
+    - regex: the compiled pattern, or the validation error in .error
+    - literal: the needle, already case-folded when the search ignores case
+    """
+    def __init__(self, search_text, case_sensitive=False, use_regex=False):
+        self.search_text = search_text
+        self.case_sensitive = case_sensitive
+        self.use_regex = use_regex
+        self.flags = 0 if case_sensitive else re.IGNORECASE
+        self.pattern = None
+        self.error = None
+
+        if use_regex:
+            try:
+                self.pattern = re.compile(search_text, self.flags)
+            except re.error as e:
+                self.error = str(e)
+            self.needle = None
+            self.literal_pattern = None
+        else:
+            self.needle = search_text if case_sensitive else search_text.casefold()
+            # Used for the rare lines whose case-folded form changes length (e.g. "ß" -> "ss")
+            self.literal_pattern = re.compile(re.escape(search_text), self.flags)
+
+    @property
+    def valid(self):
+        return self.error is None and bool(self.search_text)
+
+    # -----------------------------
+    # Spans in one line
+    # -----------------------------
+    def spans(self, line):
+        """
+        Return [(start, end), ...] of the non-overlapping matches in one line.
+        """
+        if not self.valid:
+            return []
+        if self.use_regex:
+            return [m.span() for m in self.pattern.finditer(line)]
+
+        if not self.case_sensitive:
+            folded = line.casefold()
+            if len(folded) != len(line):
+                return [m.span() for m in self.literal_pattern.finditer(line)]
+            line = folded
+        return self._find_all(line, 0, len(line))
+
+    def _find_all(self, text, start, stop):
+        spans = []
+        needle = self.needle
+        size = len(needle)
+        pos = start
+        while True:
+            idx = text.find(needle, pos, stop)
+            if idx == -1:
+                break
+            spans.append((idx, idx + size))
+            pos = idx + size
+        return spans
+
+    # -----------------------------
+    # Whole documents
+    # -----------------------------
+    def find_in_lines(self, lines):
+        """
+        Search a list of lines.
+        Returns [(line_number, line_text, [(start, end), ...]), ...] (1-based line numbers).
+        """
+        if not self.valid:
+            return []
+        if self.use_regex or "\n" in self.needle:
+            return [(i, line, spans) for i, line in enumerate(lines, start=1)
+                    for spans in [self.spans(line)] if spans]
+        return self._find_in_buffer(lines)
+
+    def _find_in_buffer(self, lines):
+        """
+        Literal search over the whole document at once: one join and (when
+        ignoring case) one casefold, then matches are mapped back to lines.
+        """
+        buffer = "\n".join(lines)
+        if not self.case_sensitive:
+            folded = buffer.casefold()
+            if len(folded) != len(buffer):
+                # Offsets would not line up with the original text
+                return [(i, line, spans) for i, line in enumerate(lines, start=1)
+                        for spans in [self.spans(line)] if spans]
+            buffer = folded
+
+        starts = []
+        pos = 0
+        for line in lines:
+            starts.append(pos)
+            pos += len(line) + 1
+
+        found = {}
+        for start, end in self._find_all(buffer, 0, len(buffer)):
+            idx = bisect_right(starts, start) - 1
+            base = starts[idx]
+            found.setdefault(idx, []).append((start - base, end - base))
+
+        return [(idx + 1, lines[idx], spans) for idx, spans in sorted(found.items())]
+
+    def any_match(self, lines):
+        """
+        True as soon as one line matches; works on lazy line streams.
+        """
+        if not self.valid:
+            return False
+        if self.use_regex:
+            search = self.pattern.search
+            return any(search(line) for line in lines)
+        if self.case_sensitive:
+            return any(self.needle in line for line in lines)
+        return any(self.needle in line.casefold() for line in lines)
+
+
+class TermsQuery:
+    """
+    Many Find terms searched in one pass over each line (glossary audits).
+
+    - literal terms: one Aho-Corasick automaton, so a line is read once
+      whatever the number of terms
+    - regex terms: one compiled pattern per term, each run over the line
+      (an alternation would let one term hide the hits of another, e.g.
+      "colou?r" and "colour")
+
+    Hits of one term never overlap, as when that term is searched alone;
+    hits of different terms may.
+    It pickles, so it can cross into the process pool like SearchQuery.
+    """
+    def __init__(self, terms, case_sensitive=False, use_regex=False):
+        self.terms = list(dict.fromkeys(t for t in terms if t))
+        self.case_sensitive = case_sensitive
+        self.use_regex = use_regex
+        self.flags = 0 if case_sensitive else re.IGNORECASE
+        self.error = None
+
+        if use_regex:
+            self.term_patterns = []
+            for term in self.terms:
+                try:
+                    self.term_patterns.append(re.compile(term, self.flags))
+                except re.error as e:
+                    self.error = f"{term}: {e}"
+                    return
+        else:
+            self.needles = [t if case_sensitive else t.casefold() for t in self.terms]
+            # Used for the rare lines whose case-folded form changes length (e.g. "ß" -> "ss")
+            self.term_patterns = [re.compile(re.escape(t), self.flags) for t in self.terms]
+            self._build_automaton()
+
+    @property
+    def valid(self):
+        return self.error is None and bool(self.terms)
+
+    # -----------------------------
+    # Aho-Corasick automaton
+    # -----------------------------
+    def _build_automaton(self):
+        goto = [{}]      # state -> {char: next state}
+        out = [[]]       # state -> term indexes ending here
+        for i, needle in enumerate(self.needles):
+            state = 0
+            for ch in needle:
+                if ch not in goto[state]:
+                    goto.append({})
+                    out.append([])
+                    goto[state][ch] = len(goto) - 1
+                state = goto[state][ch]
+            out[state].append(i)
+
+        # Failure links, breadth first (depth-1 states fail to the root)
+        fail = [0] * len(goto)
+        level = list(goto[0].values())
+        while level:
+            next_level = []
+            for state in level:
+                for ch, child in goto[state].items():
+                    f = fail[state]
+                    while f and ch not in goto[f]:
+                        f = fail[f]
+                    fail[child] = goto[f].get(ch, 0)
+                    out[child] = out[child] + out[fail[child]]
+                    next_level.append(child)
+            level = next_level
+
+        self.goto, self.fail, self.out = goto, fail, out
+        self.lengths = [len(n) for n in self.needles]
+        # Jumps over text no term can start in while the automaton is at its root
+        self.first_chars = re.compile("[" + "".join(re.escape(ch) for ch in goto[0]) + "]") if goto[0] else None
+
+    def _scan(self, text):
+        """
+        All (start, end, term index) occurrences in text, ordered by end.
+        """
+        hits = []
+        if self.first_chars is None:
+            return hits
+        goto, fail, out, lengths = self.goto, self.fail, self.out, self.lengths
+        first = self.first_chars.search
+        size = len(text)
+        pos = 0
+        state = 0
+        while pos < size:
+            if state == 0:
+                m = first(text, pos)
+                if m is None:
+                    break
+                pos = m.start()
+            ch = text[pos]
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            pos += 1
+            for t in out[state]:
+                hits.append((pos - lengths[t], pos, t))
+        return hits
+
+    # -----------------------------
+    # Hits in one line
+    # -----------------------------
+    def hits(self, line):
+        """
+        Return [(start, end, term index), ...] of one line, sorted by start.
+        """
+        if not self.valid:
+            return []
+        if self.use_regex:
+            return self._pattern_hits(line)
+
+        if not self.case_sensitive:
+            folded = line.casefold()
+            if len(folded) != len(line):
+                return self._pattern_hits(line)
+            line = folded
+
+        hits = []
+        last_end = {}
+        for start, end, t in self._scan(line):
+            if start >= last_end.get(t, 0):
+                hits.append((start, end, t))
+                last_end[t] = end
+        hits.sort()
+        return hits
+
+    def _pattern_hits(self, line):
+        return sorted((m.start(), m.end(), t) for t, p in enumerate(self.term_patterns)
+                      for m in p.finditer(line))
+
+    def find_in_lines(self, lines):
+        """
+        Search a list of lines for every term.
+        Returns (matches, counts): matches as SearchQuery.find_in_lines gives them
+        (spans of all terms together), counts = hits per term index.
+        """
+        matches = []
+        counts = [0] * len(self.terms)
+        for i, line in enumerate(lines, start=1):
+            hits = self.hits(line)
+            if hits:
+                # Two regex terms can hit the same span: it is shown once, counted per term
+                matches.append((i, line, sorted({(s, e) for s, e, _ in hits})))
+                for _, _, t in hits:
+                    counts[t] += 1
+        return matches, counts
+
+
+def load_terms(file_path):
+    """
+    Read a terms file: one term per line, blank lines ignored.
+    """
+    with open(file_path, "r", encoding="utf-8-sig") as f:
+        return [line.strip() for line in f if line.strip()]
@@ -0,0 +1,257 @@
+import queue
+import threading
+import time
+from contextlib import closing
+
+from utils.file_search import collect_files, iter_search_path, iter_matching_paths
+from utils.results_view import ResultStore
+from utils.trigram_index import update_index
+
+
+# -----------------------------
+# Settings
+# -----------------------------
+POLL_MS = 50              # how often the Tk thread drains the result queue
+TICK_BUDGET_S = 0.03      # max time one tick spends on results, so the GUI stays responsive
+MAX_RESULTS_PER_TICK = 500
+
+
+class BackgroundSearch:
+    """
+    Run a search on a worker thread and show its results in a ResultsView.
+
+    The worker only produces result dicts into a queue; it never touches Tk.
+    The Tk thread drains the queue every POLL_MS into a ResultStore and then
+    redraws the view, which only ever holds one screen of rows.
+
+    mode:
+        'results'      : every file (like Run Search)
+        'matches_only' : only files with matches
+        'paths'        : only the paths of files with matches
+    """
+    def __init__(self, gui, view, mode="results", **search_kwargs):
+        self.gui = gui
+        self.view = view
+        self.mode = mode
+        self.search_kwargs = search_kwargs
+        self.store = ResultStore()
+        self.queue = queue.Queue()
+        self.cancel_event = threading.Event()
+        self.thread = None
+        self.detached = False   # True once another search owns the view
+
+        self.files_total = 0
+        self.files_done = 0
+        self.files_with_finds = 0
+        self.error = None
+        self.finished = False
+
+    @property
+    def running(self):
+        return not self.finished
+
+    # -----------------------------
+    # Start / cancel (Tk thread)
+    # -----------------------------
+    def start(self):
+        text = self.gui.text_results
+        text.tag_configure("bold", font=("TkDefaultFont", 10, "bold"))
+        text.tag_configure("highlight", background="yellow")
+        self.view.attach(self.store)
+        self.gui.status_label.config(text="Searching...", fg="blue")
+
+        self.thread = threading.Thread(target=self._work, daemon=True)
+        self.thread.start()
+        text.after(POLL_MS, self._poll)
+
+    def cancel(self, detach=False):
+        """
+        Stop the search; files already in progress finish, queued ones are dropped.
+        With detach=True nothing more is shown (a new search took the view over).
+        """
+        self.cancel_event.set()
+        if detach:
+            self.detached = True
+
+    # -----------------------------
+    # Worker thread
+    # -----------------------------
+    def _work(self):
+        try:
+            kw = self.search_kwargs
+            files = collect_files(kw["path"], kw["selected_type"], kw["search_subfolders"],
+                                  kw["txt_only"], kw["doc_only"], kw["pdf_only"])
+            self.queue.put(("total", len(files)))
+
+            if self.mode == "paths":
+                kw = {k: v for k, v in kw.items() if k != "workers"}
+                results = iter_matching_paths(files=files, **kw)
+            else:
+                results = iter_search_path(files=files, **kw)
+
+            # closing() shuts the process pool down (pending files are cancelled)
+            with closing(results):
+                for item in results:
+                    self.queue.put(("result", item))
+                    if self.cancel_event.is_set():
+                        break
+        except Exception as e:
+            self.queue.put(("error", str(e)))
+        finally:
+            self.queue.put(("done", None))
+
+    # -----------------------------
+    # Results (Tk thread)
+    # -----------------------------
+    def _poll(self):
+        if self.detached:
+            return
+
+        done = False
+        deadline = time.perf_counter() + TICK_BUDGET_S
+
+        for _ in range(MAX_RESULTS_PER_TICK):
+            try:
+                kind, item = self.queue.get_nowait()
+            except queue.Empty:
+                break
+
+            if kind == "total":
+                self.files_total = item
+            elif kind == "result":
+                self.files_done += 1
+                if not self.cancel_event.is_set():
+                    self._add(item)
+            elif kind == "error":
+                self.error = item
+            elif kind == "done":
+                done = True
+                break
+
+            if time.perf_counter() > deadline:
+                break
+
+        if done:
+            self._add_summary()
+            self.finished = True
+            self.view.update_file_list()
+            self.view.refresh(force=True)
+            self._show_final_status()
+        else:
+            self.view.refresh()
+            self._show_progress()
+            self.gui.text_results.after(POLL_MS, self._poll)
+
+    def _add(self, item):
+        if self.mode == "paths":
+            file_path, found = item
+            if found:
+                self.files_with_finds += 1
+                self.store.add_path(file_path)
+            return
+
+        if item["file_find_count"] > 0:
+            self.files_with_finds += 1
+        self.store.add_result(item, show_empty=(self.mode == "results"))
+
+    def _add_summary(self):
+        if self.error:
+            self.store.add_text(f"Search failed: {self.error}", bold=True)
+            return
+        if self.mode == "paths":
+            return
+
+        if self.cancel_event.is_set():
+            self.store.add_text(f"Search cancelled after {self.files_done} of {self.files_total} file(s).")
+        else:
+            self.store.add_text("Search complete.")
+        self.store.add_text(f"Files with matches: {self.files_with_finds}")
+        self.store.add_text(f"Total matches found: {self.store.total_matches}")
+
+    def _found_text(self):
+        if self.mode == "paths":
+            return f"{self.files_with_finds} matching file(s)"
+        return f"{self.store.total_matches} match(es) in {self.files_with_finds} file(s)"
+
+    def _show_progress(self):
+        self.gui.status_label.config(
+            text=f"Scanned {self.files_done}/{self.files_total} files - {self._found_text()}",
+            fg="blue"
+        )
+
+    def _show_final_status(self):
+        if self.error:
+            self.gui.status_label.config(text=f"Search failed: {self.error}", fg="red")
+        elif self.cancel_event.is_set():
+            self.gui.status_label.config(
+                text=f"Search cancelled ({self.files_done}/{self.files_total} files scanned, {self._found_text()})",
+                fg="orange"
+            )
+        else:
+            self.gui.status_label.config(
+                text=f"Search complete ({self.files_done} files, {self._found_text()})",
+                fg="green"
+            )
+
+
+class BackgroundIndexBuild:
+    """
+    Build / refresh the trigram index of a folder on a worker thread.
+    Like BackgroundSearch, the worker only feeds a queue; the Tk thread
+    polls it every POLL_MS and updates the status line, so the window
+    stays responsive on large trees.
+    """
+    def __init__(self, gui, root):
+        self.gui = gui
+        self.root = root
+        self.queue = queue.Queue()
+        self.thread = None
+        self.finished = False
+
+    @property
+    def running(self):
+        return not self.finished
+
+    def start(self):
+        self.gui.status_label.config(text="Indexing...", fg="blue")
+        self.thread = threading.Thread(target=self._work, daemon=True)
+        self.thread.start()
+        self.gui.status_label.after(POLL_MS, self._poll)
+
+    def _work(self):
+        def progress(done, total):
+            if done % 50 == 0 or done == total:
+                self.queue.put(("progress", (done, total)))
+
+        try:
+            self.queue.put(("done", update_index(self.root, progress=progress)))
+        except Exception as e:
+            self.queue.put(("error", str(e)))
+
+    def _poll(self):
+        last = None
+        while True:
+            try:
+                last = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if last[0] != "progress":
+                break
+
+        if last is None or last[0] == "progress":
+            if last:
+                done, total = last[1]
+                self.gui.status_label.config(text=f"Indexing {done}/{total} files...", fg="blue")
+            self.gui.status_label.after(POLL_MS, self._poll)
+            return
+
+        self.finished = True
+        kind, item = last
+        if kind == "error":
+            self.gui.status_label.config(text=f"Indexing failed: {item}", fg="red")
+            return
+        indexed, removed, skipped = item
+        text = f"Index ready ({indexed} file(s) indexed, {removed} removed"
+        if skipped:
+            text += f", {len(skipped)} unreadable skipped"
+        self.gui.status_label.config(text=text + ")", fg="orange" if skipped else "green")
@@ -0,0 +1,168 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+from utils.text_extract import buckets_current, extract_buckets, iter_lines, lines_for_content_type
+
+
+# -----------------------------
+# Settings
+# -----------------------------
+# Set FINDAPPLY_CACHE_DIR to move the cache, FINDAPPLY_NO_CACHE=1 to turn it off.
+CACHE_DIR = os.environ.get("FINDAPPLY_CACHE_DIR") or os.path.join(os.path.expanduser("~"), ".find_apply_tool")
+CACHE_FILE = os.path.join(CACHE_DIR, "text_cache.sqlite3")
+CACHE_ENABLED = os.environ.get("FINDAPPLY_NO_CACHE", "") not in ("1", "true", "yes")
+MAX_CACHE_BYTES = 512 * 1024 * 1024   # size cap of the stored (compressed) text
+EVICT_CHECK_EVERY = 100               # puts between two size checks
+
+_local = threading.local()  # one sqlite connection per thread / worker process
+_puts_since_check = 0
+
+
+def _connect():
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        conn = sqlite3.connect(CACHE_FILE, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")    # readers never block the writer
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " path TEXT PRIMARY KEY,"
+            " mtime_ns INTEGER NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " nbytes INTEGER NOT NULL,"
+            " last_used REAL NOT NULL,"
+            " data BLOB NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used)")
+        conn.commit()
+        _local.conn = conn
+    return conn
+
+
+def _cache_key(file_path):
+    """
+    Return (path, mtime_ns, size) for a file; any change on disk gives a new key.
+    """
+    st = os.stat(file_path)
+    return os.path.normcase(os.path.abspath(file_path)), st.st_mtime_ns, st.st_size
+
+
+# -----------------------------
+# Get / Put
+# -----------------------------
+def get_cached_buckets(file_path, key=None):
+    """
+    Return the cached text buckets of a file, or None if missing or out of date.
+    """
+    if not CACHE_ENABLED:
+        return None
+    try:
+        path, mtime_ns, size = key or _cache_key(file_path)
+        conn = _connect()
+        row = conn.execute(
+            "SELECT mtime_ns, size, data FROM entries WHERE path = ?", (path,)
+        ).fetchone()
+        if row is None or row[0] != mtime_ns or row[1] != size:
+            return None
+
+        buckets = json.loads(zlib.decompress(row[2]).decode("utf-8"))
+        if not buckets_current(buckets):
+            return None  # stored in an older layout
+        conn.execute("UPDATE entries SET last_used = ? WHERE path = ?", (time.time(), path))
+        conn.commit()
+        return buckets
+    except (OSError, sqlite3.Error, ValueError, zlib.error):
+        return None
+
+
+def put_cached_buckets(file_path, buckets, key=None):
+    """
+    Store the text buckets of a file. Pass the key taken *before* the file
+    was parsed, so an edit made during parsing is never cached as current.
+    """
+    global _puts_since_check
+    if not CACHE_ENABLED:
+        return
+    try:
+        path, mtime_ns, size = key or _cache_key(file_path)
+        data = zlib.compress(json.dumps(buckets, ensure_ascii=False).encode("utf-8"))
+        conn = _connect()
+        conn.execute(
+            "INSERT OR REPLACE INTO entries (path, mtime_ns, size, nbytes, last_used, data)"
+            " VALUES (?, ?, ?, ?, ?, ?)",
+            (path, mtime_ns, size, len(data), time.time(), data)
+        )
+        conn.commit()
+
+        _puts_since_check += 1
+        if _puts_since_check >= EVICT_CHECK_EVERY:
+            _puts_since_check = 0
+            evict_to_size(MAX_CACHE_BYTES)
+    except (OSError, sqlite3.Error):
+        pass  # the cache is only an accelerator, never fail a search on it
+
+
+def evict_to_size(max_bytes=MAX_CACHE_BYTES):
+    """
+    Drop least-recently-used entries until the cache fits in max_bytes.
+    """
+    conn = _connect()
+    total = conn.execute("SELECT COALESCE(SUM(nbytes), 0) FROM entries").fetchone()[0]
+    if total <= max_bytes:
+        return
+
+    to_free = total - max_bytes
+    doomed = []
+    for path, nbytes in conn.execute("SELECT path, nbytes FROM entries ORDER BY last_used"):
+        doomed.append((path,))
+        to_free -= nbytes
+        if to_free <= 0:
+            break
+    conn.executemany("DELETE FROM entries WHERE path = ?", doomed)
+    conn.commit()
+
+
+def clear_cache():
+    conn = _connect()
+    conn.execute("DELETE FROM entries")
+    conn.commit()
+    conn.execute("VACUUM")
+
+
+# -----------------------------
+# Cached extraction
+# -----------------------------
+def load_buckets(file_path, ext):
+    """
+    Return the text buckets of a DOCX/PDF (see utils.text_extract),
+    parsing the file only when it is not cached or has changed on disk.
+    """
+    try:
+        key = _cache_key(file_path)
+    except OSError:
+        key = None
+
+    buckets = get_cached_buckets(file_path, key)
+    if buckets is None:
+        buckets = extract_buckets(file_path, ext)
+        if key:
+            put_cached_buckets(file_path, buckets, key)
+    return buckets
+
+
+def iter_search_lines(file_path, ext, content_type="all"):
+    """
+    Lines to search in a file: from the cache when it is up to date,
+    otherwise streamed straight from the file. Nothing is cached on the
+    streamed path, so a caller that stops at the first hit never parses the rest.
+    """
+    if ext in (".docx", ".pdf"):
+        buckets = get_cached_buckets(file_path)
+        if buckets is not None:
+            return (line for line in lines_for_content_type(buckets, content_type))
+    return iter_lines(file_path, ext, content_type)
@@ -0,0 +1,226 @@
+import multiprocessing
+import os
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+import fitz  # PyMuPDF for PDFs
+from utils.docx_stream import iter_docx_blocks, iter_docx_lines
+from utils.txt_scan import sniff_encoding
+
+
+# -----------------------------
+# Settings
+# -----------------------------
+PARALLEL_PDF_PAGES = 200    # PDFs with this many pages are extracted by several processes
+PDF_PAGES_PER_TASK = 50
+
+
+# -----------------------------
+# Extract searchable text, split by content type
+# -----------------------------
+def extract_docx_buckets(file_path):
+    """
+    Read a DOCX and split its text into the buckets the content_type filter uses.
+    Returns:
+        dict:
+            'paragraphs': list of non-blank body paragraph texts (document order)
+            'headings': list of indexes into 'paragraphs' that are Heading styles
+            'tables': list of non-blank table cell texts (nested tables included)
+            'paragraph_ids': body ordinal (doc.paragraphs index) per paragraph, or None
+            'table_ids': cell path [table, row, cell, ...] per table cell, or None
+    """
+    return docx_buckets(iter_docx_blocks(file_path))
+
+
+def docx_buckets(blocks):
+    """
+    Build the DOCX buckets from (kind, text, locator) blocks, either streamed
+    from a file (iter_docx_blocks) or walked in an open document (iter_tree_blocks).
+    """
+    paragraphs = []
+    headings = []
+    tables = []
+    paragraph_ids = []
+    table_ids = []
+
+    for kind, text, locator in blocks:
+        if kind == "table":
+            tables.append(text)
+            table_ids.append(list(locator[1:]) if locator else None)
+            continue
+        if kind == "heading":
+            headings.append(len(paragraphs))
+        paragraphs.append(text)
+        paragraph_ids.append(locator[1] if locator else None)
+
+    return {"paragraphs": paragraphs, "headings": headings, "tables": tables,
+            "paragraph_ids": paragraph_ids, "table_ids": table_ids}
+
+
+def _pdf_page_lines(file_path, start, stop):
+    """
+    Text lines of pages [start, stop) of a PDF, one list per page.
+    """
+    with fitz.open(file_path) as doc:
+        return [doc[i].get_text().splitlines() for i in range(start, stop)]
+
+
+def extract_pdf_buckets(file_path, workers=None):
+    """
+    Read a PDF page by page.
+    Returns:
+        dict:
+            'pdf': list of text lines of every page (document order)
+            'pdf_pages': number of lines of each page, so a line maps back to its page
+    Large PDFs (PARALLEL_PDF_PAGES pages or more) are split into page ranges
+    read by a process pool, unless this already runs inside a worker process
+    (folder searches are parallel per file instead).
+    """
+    with fitz.open(file_path) as doc:
+        page_count = doc.page_count
+
+    workers = workers or os.cpu_count() or 1
+    if page_count >= PARALLEL_PDF_PAGES and workers > 1 and multiprocessing.parent_process() is None:
+        starts = range(0, page_count, PDF_PAGES_PER_TASK)
+        stops = [min(start + PDF_PAGES_PER_TASK, page_count) for start in starts]
+        with ProcessPoolExecutor(max_workers=min(workers, len(starts))) as executor:
+            pages = [page for chunk in executor.map(_pdf_page_lines, repeat(file_path), starts, stops)
+                     for page in chunk]
+    else:
+        pages = _pdf_page_lines(file_path, 0, page_count)
+
+    return {"pdf": [line for page in pages for line in page], "pdf_pages": [len(page) for page in pages]}
+
+
+def pdf_line_pages(buckets, line_numbers):
+    """
+    Map 1-based PDF line numbers (as in search matches) to (page, line in page), both 1-based.
+    """
+    starts = []
+    pos = 0
+    for count in buckets["pdf_pages"]:
+        starts.append(pos)
+        pos += count
+
+    located = []
+    for line_no in line_numbers:
+        page = bisect_right(starts, line_no - 1) - 1
+        # Empty pages share their start with the next page; take the last one
+        located.append((page + 1, line_no - starts[page]))
+    return located
+
+
+def buckets_current(buckets):
+    """
+    False for cache entries written before the current bucket layout
+    (DOCX without locators, PDF without page line counts).
+    """
+    if "paragraphs" in buckets and "paragraph_ids" not in buckets:
+        return False
+    if "pdf" in buckets and "pdf_pages" not in buckets:
+        return False
+    return True
+
+
+def extract_buckets(file_path, ext):
+    if ext == ".docx":
+        return extract_docx_buckets(file_path)
+    if ext == ".pdf":
+        return extract_pdf_buckets(file_path)
+    raise ValueError(f"No text extractor for {ext} files")
+
+
+def _pick(buckets, content_type, paragraphs, tables):
+    """
+    Select from per-paragraph / per-cell lists the items a content_type searches,
+    in search order (body paragraphs, then table cells).
+    """
+    heading_ids = set(buckets["headings"])
+    picked = []
+
+    if content_type == "all":
+        picked.extend(paragraphs)
+    elif content_type == "text":
+        picked.extend(p for i, p in enumerate(paragraphs) if i not in heading_ids)
+    elif content_type in ("headings", "tables_headings"):
+        picked.extend(paragraphs[i] for i in buckets["headings"])
+
+    if content_type in ("tables", "tables_headings", "all"):
+        picked.extend(tables)
+
+    return picked
+
+
+def lines_for_content_type(buckets, content_type="all"):
+    """
+    Build the list of lines to search from extracted buckets.
+    PDF and TXT text has no structure, so every content_type searches all of it.
+    """
+    for key in ("pdf", "txt"):
+        if key in buckets:
+            return buckets[key]
+    return _pick(buckets, content_type, buckets["paragraphs"], buckets["tables"])
+
+
+def locators_for_content_type(buckets, content_type="all"):
+    """
+    Locators aligned with lines_for_content_type() (see docx_stream.iter_docx_blocks).
+    PDF/TXT lines are addressed by their line number, so they get None.
+    """
+    if "paragraphs" not in buckets:
+        return [None] * len(lines_for_content_type(buckets, content_type))
+    paragraphs = [("body", n) if n is not None else None for n in buckets["paragraph_ids"]]
+    tables = [("cell",) + tuple(path) if path is not None else None for path in buckets["table_ids"]]
+    return _pick(buckets, content_type, paragraphs, tables)
+
+
+# -----------------------------
+# Lazy line streams (stop reading as soon as the caller stops)
+# -----------------------------
+# Kinds from iter_docx_lines() searched by each content_type
+CONTENT_KINDS = {
+    "all": ("heading", "body", "table"),
+    "text": ("body",),
+    "headings": ("heading",),
+    "tables": ("table",),
+    "tables_headings": ("heading", "table"),
+}
+
+
+def iter_docx_content_lines(file_path, content_type="all"):
+    kinds = CONTENT_KINDS.get(content_type, ())
+    for kind, text in iter_docx_lines(file_path):
+        if kind in kinds:
+            yield text
+
+
+def iter_pdf_lines(file_path):
+    """
+    Yield the text lines of a PDF one page at a time;
+    pages after the point where the caller stops are never decoded.
+    """
+    with fitz.open(file_path) as doc:
+        for page in doc:
+            text = page.get_text()
+            if text:
+                yield from text.splitlines()
+
+
+def iter_txt_lines(file_path):
+    with open(file_path, "r", encoding=sniff_encoding(file_path), errors="replace") as f:
+        for line in f:
+            yield line.rstrip("\n")
+
+
+def iter_lines(file_path, ext, content_type="all"):
+    """
+    Stream the lines of a TXT/DOCX/PDF for content_type, in document order.
+    """
+    if ext == ".txt":
+        return iter_txt_lines(file_path)
+    if ext == ".docx":
+        return iter_docx_content_lines(file_path, content_type)
+    if ext == ".pdf":
+        return iter_pdf_lines(file_path)
+    raise ValueError(f"No text extractor for {ext} files")
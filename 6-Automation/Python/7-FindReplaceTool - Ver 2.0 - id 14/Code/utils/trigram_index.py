@@ -0,0 +1,268 @@
+import hashlib
+import json
+import os
+import sqlite3
+import zlib
+
+from utils.text_cache import CACHE_DIR, load_buckets
+from utils.text_extract import iter_txt_lines, lines_for_content_type
+
+
+# -----------------------------
+# Settings
+# -----------------------------
+INDEX_DIR = os.path.join(CACHE_DIR, "indexes")
+INDEXED_EXTS = (".txt", ".docx", ".pdf")
+MAX_QUERY_GRAMS = 64      # enough to narrow; keeps the SQL IN (...) list short
+COMMIT_EVERY = 200        # files between commits while (re)indexing
+
+
+def _norm(path):
+    return os.path.normcase(os.path.abspath(path))
+
+
+def index_file_for(root):
+    """
+    Path of the index database of a folder (kept in the cache dir, not in the folder).
+    """
+    digest = hashlib.sha1(_norm(root).encode("utf-8")).hexdigest()
+    return os.path.join(INDEX_DIR, f"{digest}.sqlite3")
+
+
+def has_index(root):
+    return os.path.isfile(index_file_for(root))
+
+
+def find_index_root(path):
+    """
+    Return the indexed folder that contains `path` (itself or a parent), or None.
+    """
+    current = _norm(path)
+    while True:
+        if has_index(current):
+            return current
+        parent = os.path.dirname(current)
+        if parent == current:
+            return None
+        current = parent
+
+
+def _connect(root):
+    os.makedirs(INDEX_DIR, exist_ok=True)
+    conn = sqlite3.connect(index_file_for(root), timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS files ("
+        " id INTEGER PRIMARY KEY,"
+        " path TEXT UNIQUE NOT NULL,"
+        " mtime_ns INTEGER NOT NULL,"
+        " size INTEGER NOT NULL,"
+        " data BLOB NOT NULL)"
+    )
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS postings ("
+        " gram TEXT NOT NULL,"
+        " file_id INTEGER NOT NULL,"
+        " PRIMARY KEY (gram, file_id)) WITHOUT ROWID"
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS postings_file ON postings (file_id)")
+    return conn
+
+
+# -----------------------------
+# Trigrams
+# -----------------------------
+def trigrams(text):
+    """
+    Case-folded trigrams of a text; indexing and queries both fold,
+    so one index serves case-sensitive and case-insensitive searches.
+    """
+    text = text.casefold()
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _file_trigrams(buckets):
+    grams = set()
+    for lines in buckets.values():
+        for line in lines:
+            if isinstance(line, str):   # skip the int heading indexes
+                grams.update(trigrams(line))
+    return grams
+
+
+def _read_buckets(file_path, ext):
+    if ext == ".txt":
+        return {"txt": list(iter_txt_lines(file_path))}   # any encoding, as the search reads it
+    return load_buckets(file_path, ext)
+
+
+# -----------------------------
+# Build / incremental update
+# -----------------------------
+def update_index(root, progress=None):
+    """
+    Create or refresh the trigram index of a folder tree (subfolders included).
+    Only new or changed files (path + mtime + size) are read again;
+    deleted files are dropped. progress(done, total) is called per file.
+    Returns (files_indexed, files_removed, skipped) where skipped lists
+    (path, error) for the files that could not be read.
+    """
+    root = _norm(root)
+    conn = _connect(root)
+    try:
+        known = {path: (file_id, mtime_ns, size)
+                 for file_id, path, mtime_ns, size in conn.execute("SELECT id, path, mtime_ns, size FROM files")}
+
+        on_disk = []
+        for dirpath, dirs, names in os.walk(root):
+            dirs.sort()
+            for name in sorted(names):
+                if name.lower().endswith(INDEXED_EXTS):
+                    on_disk.append(os.path.join(dirpath, name))
+
+        indexed = 0
+        skipped = []
+        seen = set()
+        for done, file_path in enumerate(on_disk, start=1):
+            if progress:
+                progress(done, len(on_disk))
+            path = _norm(file_path)
+            seen.add(path)
+            try:
+                st = os.stat(file_path)
+                old = known.get(path)
+                if old and old[1] == st.st_mtime_ns and old[2] == st.st_size:
+                    continue  # unchanged
+
+                buckets = _read_buckets(file_path, os.path.splitext(file_path)[1].lower())
+            except Exception as e:
+                skipped.append((file_path, str(e)))
+                continue
+
+            data = zlib.compress(json.dumps(buckets, ensure_ascii=False).encode("utf-8"))
+            if old:
+                file_id = old[0]
+                conn.execute("DELETE FROM postings WHERE file_id = ?", (file_id,))
+                conn.execute("UPDATE files SET mtime_ns = ?, size = ?, data = ? WHERE id = ?",
+                             (st.st_mtime_ns, st.st_size, data, file_id))
+            else:
+                file_id = conn.execute("INSERT INTO files (path, mtime_ns, size, data) VALUES (?, ?, ?, ?)",
+                                       (path, st.st_mtime_ns, st.st_size, data)).lastrowid
+            conn.executemany("INSERT INTO postings (gram, file_id) VALUES (?, ?)",
+                             ((gram, file_id) for gram in _file_trigrams(buckets)))
+
+            indexed += 1
+            if indexed % COMMIT_EVERY == 0:
+                conn.commit()
+
+        removed = [(file_id,) for path, (file_id, _, _) in known.items() if path not in seen]
+        conn.executemany("DELETE FROM postings WHERE file_id = ?", removed)
+        conn.executemany("DELETE FROM files WHERE id = ?", removed)
+        conn.commit()
+        return indexed, len(removed), skipped
+    finally:
+        conn.close()
+
+
+def drop_index(root):
+    for suffix in ("", "-wal", "-shm"):
+        try:
+            os.remove(index_file_for(root) + suffix)
+        except FileNotFoundError:
+            pass
+
+
+# -----------------------------
+# Queries
+# -----------------------------
+def _candidate_ids(conn, search_text):
+    """
+    Ids of the files that contain every trigram of search_text,
+    or None when the text is too short to narrow anything.
+    """
+    grams = sorted(trigrams(search_text))[:MAX_QUERY_GRAMS]
+    if not grams:
+        return None
+    marks = ",".join("?" * len(grams))
+    rows = conn.execute(
+        f"SELECT file_id FROM postings WHERE gram IN ({marks})"
+        f" GROUP BY file_id HAVING COUNT(*) = ?",
+        (*grams, len(grams))
+    )
+    return {row[0] for row in rows}
+
+
+def _indexed_ids(conn, files):
+    """
+    {path: file id} for the files whose index entry is up to date
+    (same mtime and size as on disk). New and changed files are left out,
+    so callers open them instead of trusting stale index data; this costs
+    one stat per file, not a walk of the whole indexed tree.
+    """
+    entries = {path: (file_id, mtime_ns, size)
+               for file_id, path, mtime_ns, size in conn.execute("SELECT id, path, mtime_ns, size FROM files")}
+    ids = {}
+    for file_path in files:
+        entry = entries.get(_norm(file_path))
+        if entry is None:
+            continue
+        try:
+            st = os.stat(file_path)
+        except OSError:
+            continue
+        if st.st_mtime_ns == entry[1] and st.st_size == entry[2]:
+            ids[file_path] = entry[0]
+    return ids
+
+
+def narrow_files(root, files, search_text):
+    """
+    Keep only the files that can contain the literal search_text.
+    Files the index does not cover (other extensions, unreadable files,
+    files changed since the index was built) are kept.
+    """
+    conn = _connect(root)
+    try:
+        ids = _candidate_ids(conn, search_text)
+        if ids is None:
+            return files
+        path_ids = _indexed_ids(conn, files)
+    finally:
+        conn.close()
+
+    kept = []
+    for f in files:
+        file_id = path_ids.get(f)
+        if file_id is None or file_id in ids:
+            kept.append(f)
+    return kept
+
+
+def iter_index_lines(root, files, search_text, use_regex=False, content_type="all"):
+    """
+    Yield (file_path, lines) for the given files straight from the index,
+    without opening any document. Literal queries only visit trigram candidates.
+    Files missing from the index or changed since it was built are yielded
+    with lines=None, files the trigrams rule out with lines=[] (so callers
+    can still count them).
+    """
+    conn = _connect(root)
+    try:
+        ids = None if use_regex else _candidate_ids(conn, search_text)
+        path_ids = _indexed_ids(conn, files)
+
+        for file_path in files:
+            file_id = path_ids.get(file_path)
+            if file_id is None:
+                yield file_path, None
+                continue
+            if ids is not None and file_id not in ids:
+                yield file_path, []
+                continue
+
+            (data,) = conn.execute("SELECT data FROM files WHERE id = ?", (file_id,)).fetchone()
+            buckets = json.loads(zlib.decompress(data).decode("utf-8"))
+            yield file_path, lines_for_content_type(buckets, content_type)
+    finally:
+        conn.close()
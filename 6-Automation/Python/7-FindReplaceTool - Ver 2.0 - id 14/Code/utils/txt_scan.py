@@ -0,0 +1,239 @@
+import codecs
+import mmap
+import re
+
+
+# -----------------------------
+# Settings
+# -----------------------------
+SNIFF_BYTES = 1024 * 1024          # bytes looked at to guess the encoding
+WINDOW_BYTES = 16 * 1024 * 1024    # raw bytes searched at a time (cut at a line break)
+
+BOMS = (
+    (codecs.BOM_UTF32_LE, "utf-32"),   # before UTF-16 LE: it starts with the same bytes
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+
+# Encodings where '\n' is the byte 0x0A and never part of another character,
+# so the raw bytes can be searched and split into lines directly
+ASCII_COMPATIBLE = ("utf-8", "utf-8-sig", "cp1252")
+
+# Non-ASCII characters that case-fold to an ASCII letter (Kelvin sign, long s), as UTF-8 bytes
+_FOLDS_TO_ASCII = {"k": "\u212a".encode("utf-8"), "s": "\u017f".encode("utf-8")}
+
+
+# -----------------------------
+# Encoding
+# -----------------------------
+def detect_encoding(head):
+    """
+    Guess the encoding of a text file from its first bytes.
+    Returns (encoding, BOM length): a BOM wins; NUL bytes mean UTF-16;
+    otherwise UTF-8 when the bytes decode as UTF-8, else cp1252.
+    """
+    for bom, encoding in BOMS:
+        if head.startswith(bom):
+            return encoding, len(bom) if encoding == "utf-8-sig" else 0
+
+    if b"\x00" in head:
+        # ASCII text in UTF-16 has its NULs on the high byte
+        even = head[0::2].count(0)
+        odd = head[1::2].count(0)
+        return ("utf-16-be" if even > odd else "utf-16-le"), 0
+
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(head, final=False)
+        return "utf-8", 0
+    except UnicodeDecodeError:
+        return "cp1252", 0
+
+
+def sniff_encoding(file_path):
+    with open(file_path, "rb") as f:
+        return detect_encoding(f.read(SNIFF_BYTES))[0]
+
+
+# -----------------------------
+# Whole-file round trip (rewriting a TXT)
+# -----------------------------
+# BOM -> codec of the text after it (fixed byte order, writes no BOM itself)
+_BOM_CODECS = (
+    (codecs.BOM_UTF32_LE, "utf-32-le"),
+    (codecs.BOM_UTF32_BE, "utf-32-be"),
+    (codecs.BOM_UTF8, "utf-8"),
+    (codecs.BOM_UTF16_LE, "utf-16-le"),
+    (codecs.BOM_UTF16_BE, "utf-16-be"),
+)
+
+
+def decode_txt(raw):
+    """
+    Decode the bytes of a whole TXT file so that encode_txt() gives them
+    back unchanged. Returns (text, bom, codec).
+    In UTF-8 / cp1252 files, bytes that do not decode are carried as
+    lone surrogates (surrogateescape) instead of being dropped;
+    malformed UTF-16 / UTF-32 raises UnicodeDecodeError.
+    """
+    for bom, codec in _BOM_CODECS:
+        if raw.startswith(bom):
+            break
+    else:
+        bom, codec = b"", detect_encoding(raw[:SNIFF_BYTES])[0]
+    return raw[len(bom):].decode(codec, _errors_for(codec)), bom, codec
+
+
+def encode_txt(text, bom, codec):
+    return bom + text.encode(codec, _errors_for(codec))
+
+
+def _errors_for(codec):
+    return "surrogateescape" if codec in ASCII_COMPATIBLE else "strict"
+
+
+# -----------------------------
+# Raw byte search
+# -----------------------------
+def _byte_needle(query, encoding):
+    """
+    Turn a literal query into (needle bytes, ignore case, fold pattern) for a
+    raw byte search that finds every line the query can match (lines are
+    checked again after decoding). Ignoring case, the needle is ASCII and is
+    looked for in lower-cased bytes; fold pattern also catches the non-ASCII
+    letters that fold to it (None when there are none).
+    Returns None when the query cannot be searched as bytes
+    (regex, non-ASCII text ignoring case, multi-line text).
+    """
+    if encoding not in ASCII_COMPATIBLE or query.use_regex or not query.valid:
+        return None
+    text = query.search_text
+    if "\n" in text:
+        return None
+    if query.case_sensitive:
+        try:
+            # (encoding with utf-8-sig would put a BOM in front of the needle)
+            return text.encode("utf-8" if encoding == "utf-8-sig" else encoding), False, None
+        except UnicodeEncodeError:
+            return None
+    if not text.isascii():
+        return None
+
+    fold_pattern = None
+    if encoding != "cp1252" and any(ch.lower() in _FOLDS_TO_ASCII for ch in text):
+        parts = []
+        for ch in text:
+            part = re.escape(ch.encode("ascii"))
+            folded = _FOLDS_TO_ASCII.get(ch.lower())
+            if folded:
+                part = b"(?:" + part + b"|" + re.escape(folded) + b")"
+            parts.append(part)
+        fold_pattern = re.compile(b"".join(parts), re.IGNORECASE)
+    return text.lower().encode("ascii"), True, fold_pattern
+
+
+def _windows(mm, offset):
+    """
+    Yield (start, end) byte ranges of about WINDOW_BYTES that end on a line break.
+    """
+    size = len(mm)
+    pos = offset
+    while pos < size:
+        end = min(pos + WINDOW_BYTES, size)
+        if end < size:
+            cut = mm.rfind(b"\n", pos, end)
+            if cut == -1:
+                cut = mm.find(b"\n", end)   # one line longer than a window
+            end = size if cut == -1 else cut + 1
+        yield pos, end
+        pos = end
+
+
+def _scan_mapped(mm, offset, encoding, query, needle, ignore_case, fold_pattern):
+    """
+    Search the mapped file window by window as raw bytes; only the lines
+    holding a hit are decoded. Pages already scanned are dropped again,
+    so memory stays flat whatever the file size.
+    """
+    line_no = 1
+    released = 0
+    can_release = hasattr(mm, "madvise") and hasattr(mmap, "MADV_DONTNEED")
+
+    for start, end in _windows(mm, offset):
+        window = mm[start:end]
+
+        if fold_pattern is not None and any(f in window for f in _FOLDS_TO_ASCII.values()):
+            def search(pos):
+                m = fold_pattern.search(window, pos)
+                return m.start() if m else -1
+        else:
+            hay = window.lower() if ignore_case else window
+            def search(pos):
+                return hay.find(needle, pos)
+
+        counted = 0
+        hit = search(0)
+        while hit != -1:
+            line_start = window.rfind(b"\n", 0, hit) + 1
+            line_end = window.find(b"\n", hit)
+            if line_end == -1:
+                line_end = len(window)
+            line_no += window.count(b"\n", counted, line_start)
+            counted = line_start
+
+            line = window[line_start:line_end].decode(encoding, errors="replace")
+            if line.endswith("\r"):
+                line = line[:-1]
+            spans = query.spans(line)
+            if spans:
+                yield line_no, line, spans
+            hit = search(line_end + 1)
+
+        line_no += window.count(b"\n", counted)
+        del window
+
+        if can_release:
+            page_end = end - end % mmap.PAGESIZE
+            if page_end > released:
+                mm.madvise(mmap.MADV_DONTNEED, released, page_end - released)
+                released = page_end
+
+
+def _scan_decoded(file_path, encoding, query):
+    """
+    Fallback for queries that cannot run on raw bytes: decode the file as
+    a stream, one line at a time.
+    """
+    with open(file_path, "r", encoding=encoding, errors="replace") as f:
+        for line_no, line in enumerate(f, start=1):
+            line = line.rstrip("\n")
+            spans = query.spans(line)
+            if spans:
+                yield line_no, line, spans
+
+
+def scan_txt(file_path, query):
+    """
+    Search a text file of any size with a SearchQuery, keeping memory flat.
+    Yields (line_number, line_text, [(start, end), ...]) like
+    SearchQuery.find_in_lines, lazily and in file order.
+
+    The file is memory-mapped and searched as raw bytes; only the lines
+    holding a hit are decoded. The encoding comes from the BOM or a guess
+    (see detect_encoding), and bytes that do not decode are replaced
+    instead of failing the file.
+    """
+    if not query.valid:
+        return
+    with open(file_path, "rb") as f:
+        head = f.read(SNIFF_BYTES)
+        if not head:
+            return
+        encoding, offset = detect_encoding(head)
+        byte_needle = _byte_needle(query, encoding)
+        if byte_needle is None:
+            yield from _scan_decoded(file_path, encoding, query)
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            yield from _scan_mapped(mm, offset, encoding, query, *byte_needle)
@@ -1,28 +1,18 @@
+import multiprocessing
+import queue
+import threading
 import tkinter as tk
-import re
+from contextlib import closing
 from tkinter import filedialog, colorchooser, messagebox, ttk
-from docx import Document
-from docx.shared import Pt, RGBColor
-from docx.oxml.ns import qn
-from docx.enum.text import WD_UNDERLINE, WD_COLOR_INDEX
+from docx.enum.text import WD_COLOR_INDEX
 from tkinter import filedialog
 import os
 
+from doc_text_formatter_core import (APPLY_OPTIONS, FILTER_OPTIONS, WORD_HIGHLIGHT_COLORS, FormatJob, FormatPlan,
+                                     ParagraphFilter, collect_docx_files, iter_format_files)
 
-WORD_HIGHLIGHT_COLORS = {
-    "None": None,                # No highlight
-    "Yellow": WD_COLOR_INDEX.YELLOW,
-    "Bright Green": WD_COLOR_INDEX.BRIGHT_GREEN,
-    "Red": WD_COLOR_INDEX.RED,
-    "Blue": WD_COLOR_INDEX.BLUE,
-    "Pink": WD_COLOR_INDEX.PINK,
-    "Turquoise": WD_COLOR_INDEX.TURQUOISE,
-    "Gray": WD_COLOR_INDEX.GRAY_25,
-    "Dark Blue": WD_COLOR_INDEX.DARK_BLUE,
-    "Dark Red": WD_COLOR_INDEX.DARK_RED,
-    "Teal": WD_COLOR_INDEX.TEAL,
-    "Violet": WD_COLOR_INDEX.VIOLET
-}
+
+POLL_MS = 100   # how often the Tk thread picks up finished files of a run
 
 # Color preview for GUI
 PREVIEW_COLORS = {
@@ -50,171 +40,6 @@ def browse_target():
     file_path.set(path)
 
 
-def paragraph_matches_filter(paragraph):
-    filter_text = text_filter.get().strip()
-    option = text_filter_option.get()
-    use_regex = enable_regex.get()
-    
-    if not filter_text:
-        return True  # no filter applied
-
-    match_found = False
-    if use_regex:
-        try:
-            # re.IGNORECASE makes it case-insensitive
-            pattern = re.compile(filter_text, re.IGNORECASE)
-            match_found = bool(pattern.search(paragraph.text))
-        except re.error:
-            match_found = False  # invalid regex -> no match
-    else:
-        match_found = filter_text.lower() in paragraph.text.lower()  # exact text match, case-insensitive
-
-    if option == "Included":
-        return match_found
-    elif option == "Excluded":
-        return not match_found
-
-
-
-# Function to apply styles
-def apply_text_style(file_path, font_name, font_size, bold, italic, underline, color,
-                     include_headings, include_images, include_tables, option_choice, highlight):
-    
-    doc = Document(file_path)
-
-    # ---------------- Run Styling Function ----------------
-    def style_run(run):
-        run.font.name = font_name
-        run._element.rPr.rFonts.set(qn('w:eastAsia'), font_name)
-        run.font.size = Pt(font_size)
-        run.font.bold = bold
-        run.font.italic = italic
-        run.font.underline = WD_UNDERLINE.SINGLE if underline else None
-        run.font.color.rgb = RGBColor(*color)
-        run.font.highlight_color = highlight  # None removes any previous highlight
-
-    # ---------------- Check if paragraph has an image ----------------
-    def paragraph_has_image(paragraph):
-        return bool(paragraph._element.xpath('.//pic:pic'))
-
-    # ---------------- Text Filter ----------------
-    def paragraph_matches_filter(paragraph):
-        filter_text_value = text_filter.get().strip()  # text from GUI entry
-        filter_option = text_filter_option.get()       # Included / Excluded
-        use_regex = enable_regex.get()                 # regex checkbox
-
-        if not filter_text_value:
-            return True  # no filter, match all
-
-        match_found = False
-        if use_regex:
-            try:
-                pattern = re.compile(filter_text_value, re.IGNORECASE)
-                match_found = bool(pattern.search(paragraph.text))
-            except re.error:
-                match_found = False
-        else:
-            match_found = filter_text_value.lower() in paragraph.text.lower()
-
-        if filter_option == "Included":
-            return match_found
-        elif filter_option == "Excluded":
-            return not match_found
-
-    # ---------------- Helper to apply styling to entire paragraph ----------------
-    def apply_to_paragraph(paragraph):
-        for run in paragraph.runs:
-            style_run(run)
-
-    # ---------------- Apply Styles Based on Option ----------------
-    if option_choice == "Headings Only":
-        for paragraph in doc.paragraphs:
-            if paragraph.style.name.startswith("Heading") and paragraph_matches_filter(paragraph):
-                apply_to_paragraph(paragraph)
-
-    elif option_choice == "Text and Tables Only":
-        # Normal text (outside tables, not headings, not images)
-        for paragraph in doc.paragraphs:
-            if paragraph.style.name.startswith("Heading"):
-                continue
-            if paragraph_has_image(paragraph):
-                continue
-            in_table = any(
-                paragraph in cell.paragraphs
-                for table in doc.tables
-                for row in table.rows
-                for cell in row.cells
-            )
-            if in_table:
-                continue
-            if paragraph_matches_filter(paragraph):
-                apply_to_paragraph(paragraph)
-
-        # Tables
-        for table in doc.tables:
-            for row in table.rows:
-                for cell in row.cells:
-                    for paragraph in cell.paragraphs:
-                        if paragraph_matches_filter(paragraph):
-                            apply_to_paragraph(paragraph)
-
-    elif option_choice == "Tables Only":
-        for table in doc.tables:
-            for row in table.rows:
-                for cell in row.cells:
-                    for paragraph in cell.paragraphs:
-                        if paragraph_matches_filter(paragraph):
-                            apply_to_paragraph(paragraph)
-
-    elif option_choice == "Images Only":
-        for paragraph in doc.paragraphs:
-            if paragraph_has_image(paragraph) and paragraph_matches_filter(paragraph):
-                apply_to_paragraph(paragraph)
-        for table in doc.tables:
-            for row in table.rows:
-                for cell in row.cells:
-                    for paragraph in cell.paragraphs:
-                        if paragraph_has_image(paragraph) and paragraph_matches_filter(paragraph):
-                            apply_to_paragraph(paragraph)
-
-    elif option_choice == "Text Only":
-        for paragraph in doc.paragraphs:
-            if paragraph.style.name.startswith("Heading"):
-                continue
-            if paragraph_has_image(paragraph):
-                continue
-            in_table = any(paragraph in cell.paragraphs for table in doc.tables
-                           for row in table.rows for cell in row.cells)
-            if in_table:
-                continue
-            if paragraph_matches_filter(paragraph):
-                apply_to_paragraph(paragraph)
-
-    elif option_choice == "All":
-        for paragraph in doc.paragraphs:
-            if paragraph.style.name.startswith("Heading") and not include_headings.get():
-                continue
-            if paragraph_has_image(paragraph) and not include_images.get():
-                continue
-            if paragraph_matches_filter(paragraph):
-                apply_to_paragraph(paragraph)
-        if include_tables.get():
-            for table in doc.tables:
-                for row in table.rows:
-                    for cell in row.cells:
-                        for paragraph in cell.paragraphs:
-                            if paragraph.style.name.startswith("Heading") and not include_headings.get():
-                                continue
-                            if paragraph_has_image(paragraph) and not include_images.get():
-                                continue
-                            if paragraph_matches_filter(paragraph):
-                                apply_to_paragraph(paragraph)
-
-    # ---------------- Save ----------------
-    doc.save(file_path)
-    # Success message is optional, can be handled outside this function
-
-
 def on_highlight_select(event=None):
     global highlight_color
     global PREVIEW_COLORS
@@ -244,1195 +69,514 @@ def on_highlight_select(event=None):
     highlight_color_preview.config(bg=PREVIEW_COLORS[selected])
 
 
-# GUI Setup
-# GUI Setup
-root = tk.Tk()
-root.title("Word Text Styler")
-root.geometry("600x700")
-
-# ===== Scrollable Window =====
-main_frame = tk.Frame(root)
-main_frame.pack(fill="both", expand=True)
-
-canvas = tk.Canvas(main_frame)
-scrollbar = ttk.Scrollbar(main_frame, orient="vertical", command=canvas.yview)
-
-scrollable_frame = tk.Frame(canvas)
-
-scrollable_frame.bind(
-    "<Configure>",
-    lambda e: canvas.configure(scrollregion=canvas.bbox("all"))
-)
-
-canvas_window = canvas.create_window(
-    (0, 0),
-    window=scrollable_frame,
-    anchor="nw"
-)
-
-def resize_frame(event):
-    canvas.itemconfig(canvas_window, width=event.width)
-
-canvas.bind("<Configure>", resize_frame)
-
-canvas.configure(yscrollcommand=scrollbar.set)
-
-canvas.pack(side="left", fill="both", expand=True)
-scrollbar.pack(side="right", fill="y")
-
-
-# Mouse wheel scrolling
-def _on_mousewheel(event):
-    canvas.yview_scroll(int(-1 * (event.delta / 120)), "units")
-
-scrollable_frame.bind("<Enter>", lambda e: canvas.bind_all("<MouseWheel>", _on_mousewheel))
-scrollable_frame.bind("<Leave>", lambda e: canvas.unbind_all("<MouseWheel>"))
+# The batch process pool re-imports this script in every worker (Windows spawn),
+# so the window must only be built in the main process.
+if __name__ == "__main__":
+    multiprocessing.freeze_support()  # needed for the pyinstaller .exe
 
-file_path = tk.StringVar()
-font_name = tk.StringVar(value="Calibri")
-font_size = tk.IntVar(value=12)
-bold = tk.BooleanVar()
-italic = tk.BooleanVar()
-underline = tk.BooleanVar()
-include_headings = tk.BooleanVar(value=True)
-include_images = tk.BooleanVar(value=True)
-include_tables = tk.BooleanVar(value=True)
-text_color = (0, 0, 0)
-option_var = tk.StringVar(value="All")
+    # GUI Setup
+    # GUI Setup
+    root = tk.Tk()
+    root.title("Word Text Styler")
+    root.geometry("600x700")
 
-highlight_color = None
-highlight_enabled = tk.BooleanVar(value=False)
+    # ===== Scrollable Window =====
+    main_frame = tk.Frame(root)
+    main_frame.pack(fill="both", expand=True)
 
-highlight_enabled = tk.BooleanVar(value=False)
-highlight_var = tk.StringVar(value="Yellow")
-highlight_color = WD_COLOR_INDEX.YELLOW
+    canvas = tk.Canvas(main_frame)
+    scrollbar = ttk.Scrollbar(main_frame, orient="vertical", command=canvas.yview)
 
-text_filter = tk.StringVar()
-text_filter_option = tk.StringVar(value="Included")
+    scrollable_frame = tk.Frame(canvas)
 
-enable_regex = tk.BooleanVar(value=False)  # default unchecked
+    scrollable_frame.bind(
+        "<Configure>",
+        lambda e: canvas.configure(scrollregion=canvas.bbox("all"))
+    )
 
-file_or_folder = tk.StringVar(value="file")  # default to file
+    canvas_window = canvas.create_window(
+        (0, 0),
+        window=scrollable_frame,
+        anchor="nw"
+    )
 
+    def resize_frame(event):
+        canvas.itemconfig(canvas_window, width=event.width)
 
-def update_checkboxes(*args):
-    choice = option_var.get()
-    if choice == "All":
-        cb_headings.config(state="normal")
-        cb_images.config(state="normal")
-        cb_tables.config(state="normal")
-    else:
-        cb_headings.config(state="disabled")
-        cb_images.config(state="disabled")
-        cb_tables.config(state="disabled")
+    canvas.bind("<Configure>", resize_frame)
 
-# GUI Functions
-def browse_file():
-    path = filedialog.askopenfilename(filetypes=[("Word Documents", "*.docx")])
-    file_path.set(path)
+    canvas.configure(yscrollcommand=scrollbar.set)
 
-def choose_color():
-    global text_color
-    color_code = colorchooser.askcolor(title="Choose Text Color")
-    if color_code[0]:
-        text_color = tuple(int(c) for c in color_code[0])
-        text_color_preview.config(bg=color_code[1])
+    canvas.pack(side="left", fill="both", expand=True)
+    scrollbar.pack(side="right", fill="y")
 
 
-def choose_highlight():
-    global highlight_color
-    color_code = colorchooser.askcolor(title="Choose Highlight Color")
-    if color_code[0]:
-        # Map approximate RGB to nearest WD_COLOR_INDEX
-        # Limited predefined colors
-        r, g, b = [int(c) for c in color_code[0]]
-        # Simplified mapping for demo purposes
-        highlight_color_preview.config(bg=color_code[1])
-        highlight_color = WD_COLOR_INDEX.YELLOW  # Can be expanded for more colors
-        
-
-def apply_styles():
-    path = file_path.get()
-    if not path:
-        messagebox.showerror("Error", "Please select a file or folder")
-        return
-
-    docx_files = []
+    # Mouse wheel scrolling
+    def _on_mousewheel(event):
+        canvas.yview_scroll(int(-1 * (event.delta / 120)), "units")
 
-    if file_or_folder.get() == "file":
-        docx_files = [path]
-    else:  # folder
-        if include_subfolders.get():
-            for root_dir, dirs, files in os.walk(path):
-                for f in files:
-                    if f.lower().endswith(".docx"):
-                        docx_files.append(os.path.join(root_dir, f))
-        else:
-            for f in os.listdir(path):
-                full_path = os.path.join(path, f)
-                if os.path.isfile(full_path) and f.lower().endswith(".docx"):
-                    docx_files.append(full_path)
-
-    if not docx_files:
-        messagebox.showinfo("Info", "No .docx files found.")
-        return
-
-    # Apply styles to all files
-    for file in docx_files:
-        apply_text_style(
-            file,
-            font_name.get(),
-            font_size.get(),
-            bold.get(),
-            italic.get(),
-            underline.get(),
-            text_color,
-            include_headings,
-            include_images,
-            include_tables,
-            option_var.get(),
-            highlight_color
-        )
-
-    # Show ONE success message after processing
-    if file_or_folder.get() == "file":
-        messagebox.showinfo("Success", f"Styles applied to:\n{docx_files[0]}")
-    else:
-        messagebox.showinfo(
-            "Success",
-            f"Styles applied to {len(docx_files)} file(s) in the folder:\n{path}"
-        )
-
-def apply_text_only():
-    path = file_path.get()
-    if not path:
-        messagebox.showerror("Error", "Please select a file or folder")
-        return
+    scrollable_frame.bind("<Enter>", lambda e: canvas.bind_all("<MouseWheel>", _on_mousewheel))
+    scrollable_frame.bind("<Leave>", lambda e: canvas.unbind_all("<MouseWheel>"))
 
+    file_path = tk.StringVar()
+    font_name = tk.StringVar(value="Calibri")
+    font_size = tk.IntVar(value=12)
+    bold = tk.BooleanVar()
+    italic = tk.BooleanVar()
+    underline = tk.BooleanVar()
+    include_headings = tk.BooleanVar(value=True)
+    include_images = tk.BooleanVar(value=True)
+    include_tables = tk.BooleanVar(value=True)
+    text_color = (0, 0, 0)
+    option_var = tk.StringVar(value="All")
 
-    # -------- Helper to validate DOCX files --------
-    def is_valid_docx(file_name):
-        return file_name.lower().endswith(".docx") and not file_name.startswith("~$")
+    highlight_color = None
+    highlight_enabled = tk.BooleanVar(value=False)
 
+    highlight_enabled = tk.BooleanVar(value=False)
+    highlight_var = tk.StringVar(value="Yellow")
+    highlight_color = WD_COLOR_INDEX.YELLOW
 
-    # ---------------- Collect DOCX files ----------------
-    docx_files = []
-    if file_or_folder.get() == "file":
-        if is_valid_docx(os.path.basename(path)):
-            docx_files = [path]
-    else:
-        if include_subfolders.get():
-            for root_dir, dirs, files in os.walk(path):
-                for f in files:
-                    if is_valid_docx(f):
-                        docx_files.append(os.path.join(root_dir, f))
-        else:
-            for f in os.listdir(path):
-                full_path = os.path.join(path, f)
-                if os.path.isfile(full_path) and is_valid_docx(f):
-                    docx_files.append(full_path)
+    text_filter = tk.StringVar()
+    text_filter_option = tk.StringVar(value="Included")
 
-    if not docx_files:
-        messagebox.showinfo("Info", "No valid .docx files found.")
-        return
+    enable_regex = tk.BooleanVar(value=False)  # default unchecked
 
-    selected_size = Pt(font_size.get())
-    option_choice = option_var.get()
+    file_or_folder = tk.StringVar(value="file")  # default to file
 
-    # ---------------- Helpers ----------------
-    def paragraph_has_image(paragraph):
-        return bool(paragraph._element.xpath('.//pic:pic'))
 
-    def paragraph_matches_filter(paragraph):
-        filter_text_value = text_filter.get().strip()
-        filter_option = text_filter_option.get()
-        use_regex = enable_regex.get()
-
-        if not filter_text_value:
-            return True
-
-        if use_regex:
-            try:
-                pattern = re.compile(filter_text_value, re.IGNORECASE)
-                match_found = bool(pattern.search(paragraph.text))
-            except re.error:
-                return False
-        else:
-            match_found = filter_text_value.lower() in paragraph.text.lower()
-
-        return match_found if filter_option == "Included" else not match_found
-
-    def apply_font_only(paragraph):
-        selected_font = font_name.get()  # <-- get font from GUI
-        for run in paragraph.runs:
-            run.font.name = selected_font
-            run._element.rPr.rFonts.set(qn('w:eastAsia'), selected_font)
-
-            # DO NOT touch anything else
-
-    # ---------------- Process files ----------------
-    for file in docx_files:
-        doc = Document(file)
-
-        # ===== HEADINGS ONLY =====
-        if option_choice == "Headings Only":
-            for p in doc.paragraphs:
-                if p.style.name.startswith("Heading") and paragraph_matches_filter(p):
-                    apply_font_only(p)
-
-        # ===== TABLES ONLY =====
-        elif option_choice == "Tables Only":
-            for table in doc.tables:
-                for row in table.rows:
-                    for cell in row.cells:
-                        for p in cell.paragraphs:
-                            if paragraph_matches_filter(p):
-                                apply_font_only(p)
-
-        # ===== IMAGES ONLY =====
-        elif option_choice == "Images Only":
-            for p in doc.paragraphs:
-                if paragraph_has_image(p) and paragraph_matches_filter(p):
-                    apply_font_only(p)
-
-            for table in doc.tables:
-                for row in table.rows:
-                    for cell in row.cells:
-                        for p in cell.paragraphs:
-                            if paragraph_has_image(p) and paragraph_matches_filter(p):
-                                apply_font_only(p)
-
-        # ===== TEXT ONLY =====
-        elif option_choice == "Text Only":
-            for p in doc.paragraphs:
-
-                # ❌ Skip headings
-                if p.style.name.startswith("Heading"):
-                    continue
-
-                # ❌ Skip images
-                if paragraph_has_image(p):
-                    continue
-
-                # ❌ Skip tables
-                in_table = any(
-                    p in cell.paragraphs
-                    for table in doc.tables
-                    for row in table.rows
-                    for cell in row.cells
-                )
-                if in_table:
-                    continue
-
-                if paragraph_matches_filter(p):
-                    apply_font_only(p)
-
-        elif option_var.get() == "Text and Tables Only":
-            # Text outside tables
-            for paragraph in doc.paragraphs:
-                if paragraph.style.name.startswith("Heading"):
-                    continue
-                if paragraph_has_image(paragraph):
-                    continue
-                in_table = any(
-                    paragraph in cell.paragraphs
-                    for table in doc.tables
-                    for row in table.rows
-                    for cell in row.cells
-                )
-                if in_table:
-                    continue
-                if paragraph_matches_filter(paragraph):
-                    for run in paragraph.runs:
-                        run.font.name = font_name.get()
-                        run._element.rPr.rFonts.set(qn('w:eastAsia'), font_name.get())
-
-            # Tables
-            for table in doc.tables:
-                for row in table.rows:
-                    for cell in row.cells:
-                        for paragraph in cell.paragraphs:
-                            if paragraph_matches_filter(paragraph):
-                                for run in paragraph.runs:
-                                    run.font.name = font_name.get()
-                                    run._element.rPr.rFonts.set(qn('w:eastAsia'), font_name.get())
-
-
-        # ===== ALL =====
-        elif option_choice == "All":
-            for p in doc.paragraphs:
-                if p.style.name.startswith("Heading") and not include_headings.get():
-                    continue
-                if paragraph_has_image(p) and not include_images.get():
-                    continue
-                if paragraph_matches_filter(p):
-                    apply_font_only(p)
-
-            if include_tables.get():
-                for table in doc.tables:
-                    for row in table.rows:
-                        for cell in row.cells:
-                            for p in cell.paragraphs:
-                                if p.style.name.startswith("Heading") and not include_headings.get():
-                                    continue
-                                if paragraph_has_image(p) and not include_images.get():
-                                    continue
-                                if paragraph_matches_filter(p):
-                                    apply_font_only(p)
-
-        doc.save(file)
-
-    # ---------------- ONE success message ----------------
-    if file_or_folder.get() == "file":
-        messagebox.showinfo(
-            "Success",
-            f"Text font applied to:\n{docx_files[0]}"
-        )
-    else:
-        messagebox.showinfo(
-            "Success",
-            f"Text font applied to {len(docx_files)} file(s) in folder:\n{path}"
-        )
-
-def apply_text_size_only():
-    path = file_path.get()
-    if not path:
-        messagebox.showerror("Error", "Please select a file or folder")
-        return
-
-    # -------- Helper to validate DOCX files --------
-    def is_valid_docx(file_name):
-        return file_name.lower().endswith(".docx") and not file_name.startswith("~$")
-
-    # -------- Collect DOCX files --------
-    docx_files = []
-    if file_or_folder.get() == "file":
-        if is_valid_docx(os.path.basename(path)):
-            docx_files = [path]
-    else:
-        if include_subfolders.get():
-            for root_dir, dirs, files in os.walk(path):
-                for f in files:
-                    if is_valid_docx(f):
-                        docx_files.append(os.path.join(root_dir, f))
+    def update_checkboxes(*args):
+        choice = option_var.get()
+        if choice == "All":
+            cb_headings.config(state="normal")
+            cb_images.config(state="normal")
+            cb_tables.config(state="normal")
         else:
-            for f in os.listdir(path):
-                full_path = os.path.join(path, f)
-                if os.path.isfile(full_path) and is_valid_docx(f):
-                    docx_files.append(full_path)
-
-    if not docx_files:
-        messagebox.showinfo("Info", "No valid .docx files found.")
-        return
-
-    selected_size = Pt(font_size.get())
-    option_choice = option_var.get()
+            cb_headings.config(state="disabled")
+            cb_images.config(state="disabled")
+            cb_tables.config(state="disabled")
 
-    # -------- Helpers --------
-    def paragraph_has_image(paragraph):
-        return bool(paragraph._element.xpath('.//pic:pic'))
-
-    def paragraph_matches_filter(paragraph):
-        filter_text_value = text_filter.get().strip()
-        filter_option = text_filter_option.get()
-        use_regex = enable_regex.get()
-
-        if not filter_text_value:
-            return True
-
-        if use_regex:
-            try:
-                pattern = re.compile(filter_text_value, re.IGNORECASE)
-                match_found = bool(pattern.search(paragraph.text))
-            except re.error:
-                return False
-        else:
-            match_found = filter_text_value.lower() in paragraph.text.lower()
-
-        return match_found if filter_option == "Included" else not match_found
-
-    def apply_size_only(paragraph):
-        for run in paragraph.runs:
-            run.font.size = selected_size
-            # DO NOT touch anything else
-
-    # -------- Process files --------
-    for file in docx_files:
-        doc = Document(file)
-
-        # ===== HEADINGS ONLY =====
-        if option_choice == "Headings Only":
-            for p in doc.paragraphs:
-                if p.style.name.startswith("Heading") and paragraph_matches_filter(p):
-                    apply_size_only(p)
-
-        # ===== TABLES ONLY =====
-        elif option_choice == "Tables Only":
-            for table in doc.tables:
-                for row in table.rows:
-                    for cell in row.cells:
-                        for p in cell.paragraphs:
-                            if paragraph_matches_filter(p):
-                                apply_size_only(p)
-
-        # ===== IMAGES ONLY =====
-        elif option_choice == "Images Only":
-            for p in doc.paragraphs:
-                if paragraph_has_image(p) and paragraph_matches_filter(p):
-                    apply_size_only(p)
-
-            for table in doc.tables:
-                for row in table.rows:
-                    for cell in row.cells:
-                        for p in cell.paragraphs:
-                            if paragraph_has_image(p) and paragraph_matches_filter(p):
-                                apply_size_only(p)
-
-        # ===== TEXT ONLY =====
-        elif option_choice == "Text Only":
-            for p in doc.paragraphs:
-                if p.style.name.startswith("Heading"):
-                    continue
-                if paragraph_has_image(p):
-                    continue
-
-                in_table = any(
-                    p in cell.paragraphs
-                    for table in doc.tables
-                    for row in table.rows
-                    for cell in row.cells
-                )
-                if in_table:
-                    continue
-
-                if paragraph_matches_filter(p):
-                    apply_size_only(p)
-
-        elif option_var.get() == "Text and Tables Only":
-            for paragraph in doc.paragraphs:
-                if paragraph.style.name.startswith("Heading"):
-                    continue
-                if paragraph_has_image(paragraph):
-                    continue
-                in_table = any(paragraph in cell.paragraphs for table in doc.tables for row in table.rows for cell in row.cells)
-                if in_table:
-                    continue
-                if paragraph_matches_filter(paragraph):
-                    for run in paragraph.runs:
-                        run.font.size = Pt(font_size.get())
-
-            for table in doc.tables:
-                for row in table.rows:
-                    for cell in row.cells:
-                        for paragraph in cell.paragraphs:
-                            if paragraph_matches_filter(paragraph):
-                                for run in paragraph.runs:
-                                    run.font.size = Pt(font_size.get())
-
-        # ===== ALL =====
-        elif option_choice == "All":
-            for p in doc.paragraphs:
-                if p.style.name.startswith("Heading") and not include_headings.get():
-                    continue
-                if paragraph_has_image(p) and not include_images.get():
-                    continue
-                if paragraph_matches_filter(p):
-                    apply_size_only(p)
-
-            if include_tables.get():
-                for table in doc.tables:
-                    for row in table.rows:
-                        for cell in row.cells:
-                            for p in cell.paragraphs:
-                                if p.style.name.startswith("Heading") and not include_headings.get():
-                                    continue
-                                if paragraph_has_image(p) and not include_images.get():
-                                    continue
-                                if paragraph_matches_filter(p):
-                                    apply_size_only(p)
-
-        doc.save(file)
-
-    # -------- ONE success message --------
-    if file_or_folder.get() == "file":
-        messagebox.showinfo(
-            "Success",
-            f"Text size applied to:\n{docx_files[0]}"
-        )
-    else:
-        messagebox.showinfo(
-            "Success",
-            f"Text size applied to {len(docx_files)} file(s) in folder:\n{path}"
-        )
-
-def apply_text_style_only():
-    path = file_path.get()
-    if not path:
-        messagebox.showerror("Error", "Please select a file or folder")
-        return
-    
-    # ---------- Helper: valid DOCX ----------
-    def is_valid_docx(filename):
-        return filename.lower().endswith(".docx") and not os.path.basename(filename).startswith("~$")
-
-    # -------- Collect DOCX files --------
-    docx_files = []
-    if file_or_folder.get() == "file":
-        if is_valid_docx(path):
-            docx_files = [path]
-    else:
-        if include_subfolders.get():
-            for root_dir, dirs, files in os.walk(path):
-                for f in files:
-                    full_path = os.path.join(root_dir, f)
-                    if is_valid_docx(full_path):
-                        docx_files.append(full_path)
-        else:
-            for f in os.listdir(path):
-                full_path = os.path.join(path, f)
-                if os.path.isfile(full_path) and is_valid_docx(full_path):
-                    docx_files.append(full_path)
-
-    if not docx_files:
-        messagebox.showinfo("Info", "No valid .docx files found.")
-        return
-
-    option_choice = option_var.get()
-
-    # -------- Helpers --------
-    def paragraph_has_image(paragraph):
-        return bool(paragraph._element.xpath('.//pic:pic'))
-
-    def paragraph_matches_filter(paragraph):
-        filter_text_value = text_filter.get().strip()
-        filter_option = text_filter_option.get()
-        use_regex = enable_regex.get()
-
-        if not filter_text_value:
-            return True
-
-        if use_regex:
+    # GUI Functions
+    def browse_file():
+        path = filedialog.askopenfilename(filetypes=[("Word Documents", "*.docx")])
+        file_path.set(path)
+
+    def choose_color():
+        global text_color
+        color_code = colorchooser.askcolor(title="Choose Text Color")
+        if color_code[0]:
+            text_color = tuple(int(c) for c in color_code[0])
+            text_color_preview.config(bg=color_code[1])
+
+
+    def choose_highlight():
+        global highlight_color
+        color_code = colorchooser.askcolor(title="Choose Highlight Color")
+        if color_code[0]:
+            # Map approximate RGB to nearest WD_COLOR_INDEX
+            # Limited predefined colors
+            r, g, b = [int(c) for c in color_code[0]]
+            # Simplified mapping for demo purposes
+            highlight_color_preview.config(bg=color_code[1])
+            highlight_color = WD_COLOR_INDEX.YELLOW  # Can be expanded for more colors
+
+
+    # ================= Batch run =================
+    batch_cancel = None  # threading.Event of the run in progress (None when idle)
+
+
+    def start_batch(plan, done_text):
+        """
+        Format the selected file / folder with plan on worker processes.
+        A background thread collects the results into a queue that the Tk
+        thread polls, so the window stays responsive and the run can be cancelled.
+        """
+        global batch_cancel
+        if batch_cancel is not None:
+            messagebox.showinfo("Info", "Formatting is already running.")
+            return
+
+        path = file_path.get()
+        if not path:
+            messagebox.showerror("Error", "Please select a file or folder")
+            return
+
+        is_folder = file_or_folder.get() == "folder"
+        docx_files = collect_docx_files(path, is_folder, include_subfolders.get())
+        if not docx_files:
+            messagebox.showinfo("Info", "No valid .docx files found.")
+            return
+
+        # Every Tk variable is read here, once; the workers only get plain values
+        try:
+            paragraph_filter = ParagraphFilter(text_filter.get(), text_filter_option.get(), enable_regex.get())
+        except ValueError as e:
+            messagebox.showerror("Error", f"Text Filter: {e}")
+            return
+        job = FormatJob(plan, option_var.get(), include_headings.get(), include_images.get(), include_tables.get(),
+                        paragraph_filter or None, style_level.get())
+
+        results = queue.Queue()
+        cancel = threading.Event()
+        batch_cancel = cancel
+
+        def work():
             try:
-                pattern = re.compile(filter_text_value, re.IGNORECASE)
-                match_found = bool(pattern.search(paragraph.text))
-            except re.error:
-                return False
-        else:
-            match_found = filter_text_value.lower() in paragraph.text.lower()
-
-        return match_found if filter_option == "Included" else not match_found
-
-    # -------- Apply style ONLY if checkbox is checked --------
-    def apply_style_only(paragraph):
-        for run in paragraph.runs:
-            # Bold
-            run.font.bold = True if bold.get() else False
-
-            # Italic
-            run.font.italic = True if italic.get() else False
-
-            # Underline
-            run.font.underline = (
-                WD_UNDERLINE.SINGLE if underline.get() else None
-            )
-
-
-    # -------- Process files --------
-    for file in docx_files:
-        doc = Document(file)
-
-        # ===== HEADINGS ONLY =====
-        if option_choice == "Headings Only":
-            for p in doc.paragraphs:
-                if p.style.name.startswith("Heading") and paragraph_matches_filter(p):
-                    apply_style_only(p)
-
-        # ===== TABLES ONLY =====
-        elif option_choice == "Tables Only":
-            for table in doc.tables:
-                for row in table.rows:
-                    for cell in row.cells:
-                        for p in cell.paragraphs:
-                            if paragraph_matches_filter(p):
-                                apply_style_only(p)
-
-        # ===== IMAGES ONLY =====
-        elif option_choice == "Images Only":
-            for p in doc.paragraphs:
-                if paragraph_has_image(p) and paragraph_matches_filter(p):
-                    apply_style_only(p)
-
-            for table in doc.tables:
-                for row in table.rows:
-                    for cell in row.cells:
-                        for p in cell.paragraphs:
-                            if paragraph_has_image(p) and paragraph_matches_filter(p):
-                                apply_style_only(p)
-
-        # ===== TEXT ONLY =====
-        elif option_choice == "Text Only":
-            for p in doc.paragraphs:
-                if p.style.name.startswith("Heading"):
-                    continue
-                if paragraph_has_image(p):
-                    continue
-
-                in_table = any(
-                    p in cell.paragraphs
-                    for table in doc.tables
-                    for row in table.rows
-                    for cell in row.cells
-                )
-                if in_table:
-                    continue
-
-                if paragraph_matches_filter(p):
-                    apply_style_only(p)
-        elif option_var.get() == "Text and Tables Only":
-            for paragraph in doc.paragraphs:
-                if paragraph.style.name.startswith("Heading") or paragraph_has_image(paragraph):
-                    continue
-                in_table = any(paragraph in cell.paragraphs for table in doc.tables for row in table.rows for cell in row.cells)
-                if in_table:
-                    continue
-                if paragraph_matches_filter(paragraph):
-                    for run in paragraph.runs:
-                        if bold.get(): run.font.bold = True
-                        if italic.get(): run.font.italic = True
-                        if underline.get(): run.font.underline = WD_UNDERLINE.SINGLE
-
-            for table in doc.tables:
-                for row in table.rows:
-                    for cell in row.cells:
-                        for paragraph in cell.paragraphs:
-                            if paragraph_matches_filter(paragraph):
-                                for run in paragraph.runs:
-                                    if bold.get(): run.font.bold = True
-                                    if italic.get(): run.font.italic = True
-                                    if underline.get(): run.font.underline = WD_UNDERLINE.SINGLE
-        # ===== ALL =====
-        elif option_choice == "All":
-            for p in doc.paragraphs:
-                if p.style.name.startswith("Heading") and not include_headings.get():
-                    continue
-                if paragraph_has_image(p) and not include_images.get():
-                    continue
-                if paragraph_matches_filter(p):
-                    apply_style_only(p)
-
-            if include_tables.get():
-                for table in doc.tables:
-                    for row in table.rows:
-                        for cell in row.cells:
-                            for p in cell.paragraphs:
-                                if p.style.name.startswith("Heading") and not include_headings.get():
-                                    continue
-                                if paragraph_has_image(p) and not include_images.get():
-                                    continue
-                                if paragraph_matches_filter(p):
-                                    apply_style_only(p)
-
-        doc.save(file)
-
-    # -------- ONE success message --------
-    if file_or_folder.get() == "file":
-        messagebox.showinfo(
-            "Success",
-            f"Text style applied to:\n{docx_files[0]}"
-        )
-    else:
-        messagebox.showinfo(
-            "Success",
-            f"Text style applied to {len(docx_files)} file(s) in folder:\n{path}"
-        )
+                # closing() shuts the process pool down (files not started are dropped)
+                with closing(iter_format_files(docx_files, job)) as entries:
+                    for entry in entries:
+                        results.put(("result", entry))
+                        if cancel.is_set():
+                            break
+            except Exception as e:
+                results.put(("failed", str(e)))
+            finally:
+                results.put(("done", None))
+
+        total = len(docx_files)
+        done = [0]
+        changed = [0]   # files saved; the others already had the formatting
+        problems = []
+        failed = []
+        batch_log.delete(0, "end")
+        batch_progress.config(maximum=total, value=0)
+        cancel_button.config(state="normal")
+        batch_status.config(text=f"Formatting 0/{total} file(s)...", fg="blue")
+
+        def poll():
+            finished = False
+            while True:
+                try:
+                    kind, item = results.get_nowait()
+                except queue.Empty:
+                    break
+                if kind == "result":
+                    done[0] += 1
+                    if item["locked"]:
+                        problems.append(f"Locked (open in Word): {item['path']}")
+                        batch_log.insert("end", problems[-1])
+                    elif item["error"]:
+                        problems.append(f"Error: {item['path']}: {item['error']}")
+                        batch_log.insert("end", problems[-1])
+                    elif item["saved"]:
+                        changed[0] += 1
+                elif kind == "failed":
+                    failed.append(item)
+                else:
+                    finished = True
+                    break
+
+            batch_progress.config(value=done[0])
+            status = f"Formatting {done[0]}/{total} file(s)..."
+            if problems:
+                status += f" {len(problems)} problem(s)"
+            batch_status.config(text=status, fg="blue")
+
+            if finished:
+                finish_batch()
+            else:
+                root.after(POLL_MS, poll)
+
+        def finish_batch():
+            global batch_cancel
+            batch_cancel = None
+            cancel_button.config(state="disabled")
+
+            if failed:
+                batch_status.config(text=f"Formatting failed: {failed[0]}", fg="red")
+                messagebox.showerror("Error", f"Formatting failed after {done[0]} of {total} file(s):\n{failed[0]}")
+                return
+            if cancel.is_set():
+                batch_status.config(text=f"Cancelled after {done[0]} of {total} file(s)", fg="orange")
+                messagebox.showinfo("Cancelled", f"Cancelled after {done[0]} of {total} file(s).")
+                return
 
-def apply_text_color_only():
-    path = file_path.get()
-    if not path:
-        messagebox.showerror("Error", "Please select a file or folder")
-        return
+            unchanged = total - changed[0] - len(problems)
+            batch_status.config(text=f"Done: {changed[0]} file(s) changed, {unchanged} unchanged, "
+                                     f"{len(problems)} problem(s)",
+                                fg="red" if problems else "green")
+            if is_folder:
+                message = f"{done_text} to {total - len(problems)} file(s) in folder:\n{path}"
+            else:
+                message = f"{done_text} to:\n{docx_files[0]}"
+            message += f"\n\nChanged and saved: {changed[0]} file(s)\nAlready formatted (not saved): {unchanged} file(s)"
+            if problems:
+                # The full list is in the log under the progress bar
+                message += f"\n\n{len(problems)} file(s) not formatted:\n" + "\n".join(problems[:10])
+                messagebox.showwarning("Done", message)
+            else:
+                messagebox.showinfo("Success", message)
 
-    # -------- Helper to validate DOCX files --------
-    def is_valid_docx(file_name):
-        return file_name.lower().endswith(".docx") and not file_name.startswith("~$")
+        threading.Thread(target=work, daemon=True).start()
+        root.after(POLL_MS, poll)
 
-    docx_files = []
 
-    # -------- Collect DOCX files --------
-    docx_files = []
-    if file_or_folder.get() == "file":
-        if is_valid_docx(path):
-            docx_files = [path]
-    else:
-        if include_subfolders.get():
-            for root_dir, dirs, files in os.walk(path):
-                for f in files:
-                    full_path = os.path.join(root_dir, f)
-                    if is_valid_docx(full_path):
-                        docx_files.append(full_path)
-        else:
-            for f in os.listdir(path):
-                full_path = os.path.join(path, f)
-                if os.path.isfile(full_path) and is_valid_docx(full_path):
-                    docx_files.append(full_path)
+    def cancel_batch():
+        """
+        Stop the run; files already being formatted finish, the rest are skipped.
+        """
+        if batch_cancel is not None:
+            batch_cancel.set()
+            batch_status.config(text="Cancelling...", fg="orange")
 
-    if not docx_files:
-        messagebox.showinfo("Info", "No valid .docx files found.")
-        return
 
-    option_choice = option_var.get()
+    def apply_styles():
+        plan = (FormatPlan()
+                .set_font(font_name.get())
+                .set_size(font_size.get())
+                .set_styles(bold.get(), italic.get(), underline.get())
+                .set_color(text_color)
+                .set_highlight(highlight_color))
+        start_batch(plan, "Styles applied")
 
-    # -------- Helpers --------
-    def paragraph_has_image(paragraph):
-        return bool(paragraph._element.xpath('.//pic:pic'))
 
-    def paragraph_matches_filter(paragraph):
-        filter_text_value = text_filter.get().strip()
-        filter_option = text_filter_option.get()
-        use_regex = enable_regex.get()
+    def apply_text_only():
+        start_batch(FormatPlan().set_font(font_name.get()), "Text font applied")
 
-        if not filter_text_value:
-            return True
 
-        if use_regex:
-            try:
-                pattern = re.compile(filter_text_value, re.IGNORECASE)
-                match_found = bool(pattern.search(paragraph.text))
-            except re.error:
-                return False
-        else:
-            match_found = filter_text_value.lower() in paragraph.text.lower()
-
-        return match_found if filter_option == "Included" else not match_found
-
-    # -------- Apply COLOR ONLY --------
-    def apply_color_only(paragraph):
-        for run in paragraph.runs:
-            run.font.color.rgb = RGBColor(*text_color)
-
-    # -------- Process files --------
-    for file in docx_files:
-        doc = Document(file)
-
-        # ===== HEADINGS ONLY =====
-        if option_choice == "Headings Only":
-            for p in doc.paragraphs:
-                if p.style.name.startswith("Heading") and paragraph_matches_filter(p):
-                    apply_color_only(p)
-
-        # ===== TABLES ONLY =====
-        elif option_choice == "Tables Only":
-            for table in doc.tables:
-                for row in table.rows:
-                    for cell in row.cells:
-                        for p in cell.paragraphs:
-                            if paragraph_matches_filter(p):
-                                apply_color_only(p)
-
-        # ===== IMAGES ONLY =====
-        elif option_choice == "Images Only":
-            for p in doc.paragraphs:
-                if paragraph_has_image(p) and paragraph_matches_filter(p):
-                    apply_color_only(p)
-
-            for table in doc.tables:
-                for row in table.rows:
-                    for cell in row.cells:
-                        for p in cell.paragraphs:
-                            if paragraph_has_image(p) and paragraph_matches_filter(p):
-                                apply_color_only(p)
-
-        # ===== TEXT ONLY =====
-        elif option_choice == "Text Only":
-            for p in doc.paragraphs:
-                if p.style.name.startswith("Heading"):
-                    continue
-                if paragraph_has_image(p):
-                    continue
-
-                in_table = any(
-                    p in cell.paragraphs
-                    for table in doc.tables
-                    for row in table.rows
-                    for cell in row.cells
-                )
-                if in_table:
-                    continue
-
-                if paragraph_matches_filter(p):
-                    apply_color_only(p)
-        elif option_var.get() == "Text and Tables Only":
-            for paragraph in doc.paragraphs:
-                if paragraph.style.name.startswith("Heading") or paragraph_has_image(paragraph):
-                    continue
-                in_table = any(paragraph in cell.paragraphs for table in doc.tables for row in table.rows for cell in row.cells)
-                if in_table:
-                    continue
-                if paragraph_matches_filter(paragraph):
-                    for run in paragraph.runs:
-                        run.font.color.rgb = RGBColor(*text_color)
-
-            for table in doc.tables:
-                for row in table.rows:
-                    for cell in row.cells:
-                        for paragraph in cell.paragraphs:
-                            if paragraph_matches_filter(paragraph):
-                                for run in paragraph.runs:
-                                    run.font.color.rgb = RGBColor(*text_color)
-        # ===== ALL =====
-        elif option_choice == "All":
-            for p in doc.paragraphs:
-                if p.style.name.startswith("Heading") and not include_headings.get():
-                    continue
-                if paragraph_has_image(p) and not include_images.get():
-                    continue
-                if paragraph_matches_filter(p):
-                    apply_color_only(p)
-
-            if include_tables.get():
-                for table in doc.tables:
-                    for row in table.rows:
-                        for cell in row.cells:
-                            for p in cell.paragraphs:
-                                if p.style.name.startswith("Heading") and not include_headings.get():
-                                    continue
-                                if paragraph_has_image(p) and not include_images.get():
-                                    continue
-                                if paragraph_matches_filter(p):
-                                    apply_color_only(p)
-
-        doc.save(file)
-
-    # -------- ONE success message --------
-    if file_or_folder.get() == "file":
-        messagebox.showinfo(
-            "Success",
-            f"Text color applied to:\n{docx_files[0]}"
-        )
-    else:
-        messagebox.showinfo(
-            "Success",
-            f"Text color applied to {len(docx_files)} file(s) in folder:\n{path}"
-        )
+    def apply_text_size_only():
+        start_batch(FormatPlan().set_size(font_size.get()), "Text size applied")
 
-def apply_highlight_only():
-    path = file_path.get()
-    if not path:
-        messagebox.showerror("Error", "Please select a file or folder")
-        return
 
-    docx_files = []
+    def apply_text_style_only():
+        # "Text and Tables Only" only ever turned styles on
+        plan = FormatPlan().set_styles(bold.get(), italic.get(), underline.get(),
+                                       turn_on_only=(option_var.get() == "Text and Tables Only"))
+        start_batch(plan, "Text style applied")
 
-    # ---------- Collect DOCX files ----------
-    def is_valid_docx(filename):
-        return filename.lower().endswith(".docx") and not os.path.basename(filename).startswith("~$")
 
-    if file_or_folder.get() == "file":
-        if is_valid_docx(path):
-            docx_files = [path]
-    else:
-        if include_subfolders.get():
-            for root_dir, dirs, files in os.walk(path):
-                for f in files:
-                    full_path = os.path.join(root_dir, f)
-                    if is_valid_docx(full_path):
-                        docx_files.append(full_path)
-        else:
-            for f in os.listdir(path):
-                full_path = os.path.join(path, f)
-                if os.path.isfile(full_path) and is_valid_docx(full_path):
-                    docx_files.append(full_path)
-
-    if not docx_files:
-        messagebox.showinfo("Info", "No valid .docx files found.")
-        return
-
-    # ---------- Text Filter ----------
-    def paragraph_matches_filter(paragraph):
-        filter_text_value = text_filter.get().strip()
-        filter_option = text_filter_option.get()  # Included / Excluded
-        use_regex = enable_regex.get()
-
-        if not filter_text_value:
-            return True
-
-        match_found = False
-        if use_regex:
-            try:
-                pattern = re.compile(filter_text_value, re.IGNORECASE)
-                match_found = bool(pattern.search(paragraph.text))
-            except re.error:
-                return False
-        else:
-            match_found = filter_text_value.lower() in paragraph.text.lower()
+    def apply_text_color_only():
+        start_batch(FormatPlan().set_color(text_color), "Text color applied")
 
-        return match_found if filter_option == "Included" else not match_found
 
-    # ---------- Image Detection ----------
-    def paragraph_has_image(paragraph):
-        return bool(paragraph._element.xpath('.//pic:pic'))
+    def apply_highlight_only():
+        start_batch(FormatPlan().set_highlight(highlight_color), "Highlight applied")  # None removes highlight
 
-    # ---------- Apply Highlight ----------
-    for file in docx_files:
-        doc = Document(file)
 
-        def apply_to_paragraph(paragraph):
-            if not paragraph_matches_filter(paragraph):
-                return
-            for run in paragraph.runs:
-                run.font.highlight_color = highlight_color  # None removes highlight
-
-        # ===== OPTIONS =====
-        if option_var.get() == "Headings Only":
-            for p in doc.paragraphs:
-                if p.style.name.startswith("Heading"):
-                    apply_to_paragraph(p)
-
-        elif option_var.get() == "Tables Only":
-            for table in doc.tables:
-                for row in table.rows:
-                    for cell in row.cells:
-                        for p in cell.paragraphs:
-                            apply_to_paragraph(p)
-
-        elif option_var.get() == "Images Only":
-            for p in doc.paragraphs:
-                if paragraph_has_image(p):
-                    apply_to_paragraph(p)
-            for table in doc.tables:
-                for row in table.rows:
-                    for cell in row.cells:
-                        for p in cell.paragraphs:
-                            if paragraph_has_image(p):
-                                apply_to_paragraph(p)
-
-        elif option_var.get() == "Text Only":
-            for p in doc.paragraphs:
-                if p.style.name.startswith("Heading"):
-                    continue
-                if paragraph_has_image(p):
-                    continue
-                in_table = any(
-                    p in cell.paragraphs
-                    for table in doc.tables
-                    for row in table.rows
-                    for cell in row.cells
-                )
-                if not in_table:
-                    apply_to_paragraph(p)
-
-        elif option_var.get() == "Text and Tables Only":
-            for paragraph in doc.paragraphs:
-                if paragraph.style.name.startswith("Heading") or paragraph_has_image(paragraph):
-                    continue
-                in_table = any(paragraph in cell.paragraphs for table in doc.tables for row in table.rows for cell in row.cells)
-                if in_table:
-                    continue
-                if paragraph_matches_filter(paragraph):
-                    for run in paragraph.runs:
-                        run.font.highlight_color = highlight_color
-
-            for table in doc.tables:
-                for row in table.rows:
-                    for cell in row.cells:
-                        for paragraph in cell.paragraphs:
-                            if paragraph_matches_filter(paragraph):
-                                for run in paragraph.runs:
-                                    run.font.highlight_color = highlight_color
-
-        elif option_var.get() == "All":
-            for p in doc.paragraphs:
-                if p.style.name.startswith("Heading") and not include_headings.get():
-                    continue
-                if paragraph_has_image(p) and not include_images.get():
-                    continue
-                apply_to_paragraph(p)
-
-            if include_tables.get():
-                for table in doc.tables:
-                    for row in table.rows:
-                        for cell in row.cells:
-                            for p in cell.paragraphs:
-                                if p.style.name.startswith("Heading") and not include_headings.get():
-                                    continue
-                                if paragraph_has_image(p) and not include_images.get():
-                                    continue
-                                apply_to_paragraph(p)
-
-        doc.save(file)
-
-    # ---------- ONE Success Message ----------
-    if file_or_folder.get() == "file":
-        messagebox.showinfo("Success", f"Highlight applied to:\n{docx_files[0]}")
-    else:
-        messagebox.showinfo(
-            "Success",
-            f"Highlight applied to {len(docx_files)} file(s) in folder:\n{path}"
-        )
+    def apply_checked_attributes():
+        """
+        Apply every attribute ticked under "Apply Together" in one pass per document.
+        """
+        plan = FormatPlan()
+        if together_font.get():
+            plan.set_font(font_name.get())
+        if together_size.get():
+            plan.set_size(font_size.get())
+        if together_style.get():
+            plan.set_styles(bold.get(), italic.get(), underline.get())
+        if together_color.get():
+            plan.set_color(text_color)
+        if together_highlight.get():
+            plan.set_highlight(highlight_color)
+        if not plan:
+            messagebox.showinfo("Info", "Tick at least one attribute to apply.")
+            return
+        start_batch(plan, "Attributes applied")
 
 
-# ================= GUI WIDGETS =================
+    # ================= GUI WIDGETS =================
 
-# ================= File/Folder Selection =================
+    # ================= File/Folder Selection =================
 
-tk.Label(scrollable_frame, text="Select Target:").pack(pady=5)
+    tk.Label(scrollable_frame, text="Select Target:").pack(pady=5)
 
-# Radio buttons to select File or Folder
-file_or_folder = tk.StringVar(value="file")  # default to file
+    # Radio buttons to select File or Folder
+    file_or_folder = tk.StringVar(value="file")  # default to file
 
-tk.Radiobutton(scrollable_frame, text="File", variable=file_or_folder, value="file", command=lambda: update_subfolder_state()).pack()
-tk.Radiobutton(scrollable_frame, text="Folder", variable=file_or_folder, value="folder", command=lambda: update_subfolder_state()).pack()
+    tk.Radiobutton(scrollable_frame, text="File", variable=file_or_folder, value="file", command=lambda: update_subfolder_state()).pack()
+    tk.Radiobutton(scrollable_frame, text="Folder", variable=file_or_folder, value="folder", command=lambda: update_subfolder_state()).pack()
 
-# Entry and Browse button
-tk.Entry(scrollable_frame, textvariable=file_path, width=45).pack(pady=5)
-tk.Button(scrollable_frame, text="Browse", command=lambda: browse_target()).pack(pady=5)
+    # Entry and Browse button
+    tk.Entry(scrollable_frame, textvariable=file_path, width=45).pack(pady=5)
+    tk.Button(scrollable_frame, text="Browse", command=lambda: browse_target()).pack(pady=5)
 
-# Subfolders checkbox
-include_subfolders = tk.BooleanVar(value=False)
-cb_subfolders = tk.Checkbutton(scrollable_frame, text="Include Subfolders", variable=include_subfolders)
-cb_subfolders.pack(pady=5)
+    # Subfolders checkbox
+    include_subfolders = tk.BooleanVar(value=False)
+    cb_subfolders = tk.Checkbutton(scrollable_frame, text="Include Subfolders", variable=include_subfolders)
+    cb_subfolders.pack(pady=5)
 
-# Function to enable/disable subfolders checkbox
-def update_subfolder_state():
-    if file_or_folder.get() == "file":
-        cb_subfolders.config(state="disabled")
-    else:
-        cb_subfolders.config(state="normal")
-
-update_subfolder_state()  # initialize checkbox state
-
-# ================= Font Selection =================
-tk.Label(scrollable_frame, text="Font Name:").pack()
-common_fonts = [
-    "Roboto Mono", "Arial", "Calibri", "Calibri Light", "Times New Roman", "Verdana", "Tahoma",
-    "Courier New", "Georgia", "Trebuchet MS", "Impact", "Comic Sans MS"
-]
-font_combobox = ttk.Combobox(scrollable_frame, textvariable=font_name, values=common_fonts)
-font_combobox.pack(pady=5)
-font_combobox['state'] = 'normal'
-
-tk.Label(scrollable_frame, text="Font Size:").pack()
-common_sizes = [8, 9, 10, 11, 12, 14, 16, 18, 20, 22, 24, 26, 28, 36, 48, 72]
-size_combobox = ttk.Combobox(scrollable_frame, textvariable=font_size, values=common_sizes)
-size_combobox.pack(pady=5)
-size_combobox['state'] = 'normal'
-
-# ================= Formatting =================
-tk.Checkbutton(scrollable_frame, text="Bold", variable=bold).pack()
-tk.Checkbutton(scrollable_frame, text="Italic", variable=italic).pack()
-tk.Checkbutton(scrollable_frame, text="Underline", variable=underline).pack()
-
-# ================= Apply Options =================
-tk.Label(scrollable_frame, text="Apply Options:").pack(pady=5)
-option_menu = ttk.Combobox(
-    scrollable_frame,
-    textvariable=option_var,
-    values=["All", "Headings Only", "Tables Only", "Images Only", "Text Only", "Text and Tables Only"]
-)
-option_menu.pack(pady=5)
-option_menu.bind("<<ComboboxSelected>>", update_checkboxes)
-
-# Checkboxes
-cb_headings = tk.Checkbutton(scrollable_frame, text="Include Headings", variable=include_headings)
-cb_headings.pack(pady=2)
-
-cb_images = tk.Checkbutton(scrollable_frame, text="Include Images", variable=include_images)
-cb_images.pack(pady=2)
-
-cb_tables = tk.Checkbutton(scrollable_frame, text="Include Tables", variable=include_tables)
-cb_tables.pack(pady=2)
-
-# ================= Color Selection =================
-tk.Button(scrollable_frame, text="Choose Text Color", command=choose_color).pack(pady=5)
-
-# Preview frame
-preview_frame = tk.Frame(scrollable_frame)
-preview_frame.pack(pady=5)
-
-tk.Label(preview_frame, text="Text Color:").grid(row=0, column=0, padx=5)
-text_color_preview = tk.Label(preview_frame, width=4, height=1, bg="black", relief="solid")
-text_color_preview.grid(row=0, column=1, padx=5)
-
-tk.Label(preview_frame, text="Highlight:").grid(row=0, column=2, padx=5)
-highlight_combo = ttk.Combobox(
-    preview_frame,
-    textvariable=highlight_var,
-    values=list(WORD_HIGHLIGHT_COLORS.keys()),  # includes "None"
-    state="readonly",
-    width=12
-)
-highlight_combo.grid(row=0, column=3, padx=5)
-highlight_combo.bind("<<ComboboxSelected>>", on_highlight_select)
-highlight_combo.current(1)  # default "Yellow"
-
-highlight_color_preview = tk.Label(preview_frame, width=4, height=1, bg="yellow", relief="solid")
-highlight_color_preview.grid(row=0, column=4, padx=5)
-
-# ================= Text Filter Section =================
-tk.Label(scrollable_frame, text="Text Filter:").pack(pady=5)
-
-text_filter_entry = tk.Entry(scrollable_frame, textvariable=text_filter, width=40)
-text_filter_entry.pack(pady=5)
-
-tk.Checkbutton(scrollable_frame, text="Enable Regex", variable=enable_regex).pack(pady=5)
-
-text_filter_option_menu = ttk.Combobox(
-    scrollable_frame,
-    textvariable=text_filter_option,
-    values=["Included", "Excluded"],
-    state="readonly"
-)
-text_filter_option_menu.pack(pady=5)
-text_filter_option_menu.current(0)  # default "Included"
-
-# ================= Apply Button =================
-tk.Button(scrollable_frame, text="Apply All Styles", command=apply_styles).pack(pady=10)
-
-# Frame to hold both buttons in one row
-text_buttons_frame = tk.Frame(scrollable_frame)
-text_buttons_frame.pack(pady=5)
-
-# Apply Text Only button
-tk.Button(
-    text_buttons_frame,
-    text="Apply Text font Only",
-    command=apply_text_only,
-    width=20
-).pack(side="left", padx=5)
-
-# Apply Text Size Only button
-tk.Button(
-    text_buttons_frame,
-    text="Apply Text Size Only",
-    command=apply_text_size_only,
-    width=20
-).pack(side="left", padx=5)
-
-tk.Button(
-    text_buttons_frame,
-    text="Apply Text Style Only",
-    command=apply_text_style_only,
-    width=22
-).pack(side="left", padx=5)
-
-tk.Button(
-    text_buttons_frame,
-    text="Apply Text Color Only",
-    command=apply_text_color_only,
-    width=22
-).pack(side="left", padx=5)
-
-tk.Button(
-    text_buttons_frame,
-    text="Apply Highlight Only",
-    command=apply_highlight_only,
-    width=22
-).pack(side="left", padx=5)
-
-# Initialize states
-update_checkboxes()
-on_highlight_select()
-
-
-
-root.mainloop()
+    # Function to enable/disable subfolders checkbox
+    def update_subfolder_state():
+        if file_or_folder.get() == "file":
+            cb_subfolders.config(state="disabled")
+        else:
+            cb_subfolders.config(state="normal")
+
+    update_subfolder_state()  # initialize checkbox state
+
+    # ================= Font Selection =================
+    tk.Label(scrollable_frame, text="Font Name:").pack()
+    common_fonts = [
+        "Roboto Mono", "Arial", "Calibri", "Calibri Light", "Times New Roman", "Verdana", "Tahoma",
+        "Courier New", "Georgia", "Trebuchet MS", "Impact", "Comic Sans MS"
+    ]
+    font_combobox = ttk.Combobox(scrollable_frame, textvariable=font_name, values=common_fonts)
+    font_combobox.pack(pady=5)
+    font_combobox['state'] = 'normal'
+
+    tk.Label(scrollable_frame, text="Font Size:").pack()
+    common_sizes = [8, 9, 10, 11, 12, 14, 16, 18, 20, 22, 24, 26, 28, 36, 48, 72]
+    size_combobox = ttk.Combobox(scrollable_frame, textvariable=font_size, values=common_sizes)
+    size_combobox.pack(pady=5)
+    size_combobox['state'] = 'normal'
+
+    # ================= Formatting =================
+    tk.Checkbutton(scrollable_frame, text="Bold", variable=bold).pack()
+    tk.Checkbutton(scrollable_frame, text="Italic", variable=italic).pack()
+    tk.Checkbutton(scrollable_frame, text="Underline", variable=underline).pack()
+
+    # ================= Apply Options =================
+    tk.Label(scrollable_frame, text="Apply Options:").pack(pady=5)
+    option_menu = ttk.Combobox(
+        scrollable_frame,
+        textvariable=option_var,
+        values=APPLY_OPTIONS
+    )
+    option_menu.pack(pady=5)
+    option_menu.bind("<<ComboboxSelected>>", update_checkboxes)
+
+    # Checkboxes
+    cb_headings = tk.Checkbutton(scrollable_frame, text="Include Headings", variable=include_headings)
+    cb_headings.pack(pady=2)
+
+    cb_images = tk.Checkbutton(scrollable_frame, text="Include Images", variable=include_images)
+    cb_images.pack(pady=2)
+
+    cb_tables = tk.Checkbutton(scrollable_frame, text="Include Tables", variable=include_tables)
+    cb_tables.pack(pady=2)
+
+    # Format the paragraph styles (Heading N, Normal, ...) and drop the runs' direct formatting,
+    # where no other paragraph uses the style; smaller documents than per-run formatting
+    style_level = tk.BooleanVar(value=False)
+    tk.Checkbutton(scrollable_frame, text="Format Styles Instead of Runs", variable=style_level).pack(pady=2)
+
+    # ================= Color Selection =================
+    tk.Button(scrollable_frame, text="Choose Text Color", command=choose_color).pack(pady=5)
+
+    # Preview frame
+    preview_frame = tk.Frame(scrollable_frame)
+    preview_frame.pack(pady=5)
+
+    tk.Label(preview_frame, text="Text Color:").grid(row=0, column=0, padx=5)
+    text_color_preview = tk.Label(preview_frame, width=4, height=1, bg="black", relief="solid")
+    text_color_preview.grid(row=0, column=1, padx=5)
+
+    tk.Label(preview_frame, text="Highlight:").grid(row=0, column=2, padx=5)
+    highlight_combo = ttk.Combobox(
+        preview_frame,
+        textvariable=highlight_var,
+        values=list(WORD_HIGHLIGHT_COLORS.keys()),  # includes "None"
+        state="readonly",
+        width=12
+    )
+    highlight_combo.grid(row=0, column=3, padx=5)
+    highlight_combo.bind("<<ComboboxSelected>>", on_highlight_select)
+    highlight_combo.current(1)  # default "Yellow"
+
+    highlight_color_preview = tk.Label(preview_frame, width=4, height=1, bg="yellow", relief="solid")
+    highlight_color_preview.grid(row=0, column=4, padx=5)
+
+    # ================= Text Filter Section =================
+    tk.Label(scrollable_frame, text="Text Filter:").pack(pady=5)
+
+    text_filter_entry = tk.Entry(scrollable_frame, textvariable=text_filter, width=40)
+    text_filter_entry.pack(pady=5)
+
+    tk.Checkbutton(scrollable_frame, text="Enable Regex", variable=enable_regex).pack(pady=5)
+
+    text_filter_option_menu = ttk.Combobox(
+        scrollable_frame,
+        textvariable=text_filter_option,
+        values=FILTER_OPTIONS,
+        state="readonly"
+    )
+    text_filter_option_menu.pack(pady=5)
+    text_filter_option_menu.current(0)  # default "Included"
+
+    # ================= Apply Button =================
+    tk.Button(scrollable_frame, text="Apply All Styles", command=apply_styles).pack(pady=10)
+
+    # Frame to hold both buttons in one row
+    text_buttons_frame = tk.Frame(scrollable_frame)
+    text_buttons_frame.pack(pady=5)
+
+    # Apply Text Only button
+    tk.Button(
+        text_buttons_frame,
+        text="Apply Text font Only",
+        command=apply_text_only,
+        width=20
+    ).pack(side="left", padx=5)
+
+    # Apply Text Size Only button
+    tk.Button(
+        text_buttons_frame,
+        text="Apply Text Size Only",
+        command=apply_text_size_only,
+        width=20
+    ).pack(side="left", padx=5)
+
+    tk.Button(
+        text_buttons_frame,
+        text="Apply Text Style Only",
+        command=apply_text_style_only,
+        width=22
+    ).pack(side="left", padx=5)
+
+    tk.Button(
+        text_buttons_frame,
+        text="Apply Text Color Only",
+        command=apply_text_color_only,
+        width=22
+    ).pack(side="left", padx=5)
+
+    tk.Button(
+        text_buttons_frame,
+        text="Apply Highlight Only",
+        command=apply_highlight_only,
+        width=22
+    ).pack(side="left", padx=5)
+
+    # ================= Apply Together =================
+    # Ticked attributes are applied in one open / save per document
+    together_frame = tk.Frame(scrollable_frame)
+    together_frame.pack(pady=5)
+
+    tk.Label(together_frame, text="Apply Together:").pack(side="left", padx=5)
+    together_font = tk.BooleanVar(value=True)
+    together_size = tk.BooleanVar(value=True)
+    together_style = tk.BooleanVar(value=False)
+    together_color = tk.BooleanVar(value=False)
+    together_highlight = tk.BooleanVar(value=False)
+    for label, var in (("Font", together_font), ("Size", together_size), ("Style", together_style),
+                       ("Color", together_color), ("Highlight", together_highlight)):
+        tk.Checkbutton(together_frame, text=label, variable=var).pack(side="left")
+
+    tk.Button(
+        scrollable_frame,
+        text="Apply Checked Together",
+        command=apply_checked_attributes,
+        width=22
+    ).pack(pady=5)
+
+    # ================= Progress =================
+    batch_progress = ttk.Progressbar(scrollable_frame, length=400, mode="determinate")
+    batch_progress.pack(pady=5)
+
+    batch_status = tk.Label(scrollable_frame, text="")
+    batch_status.pack()
+
+    cancel_button = tk.Button(scrollable_frame, text="Cancel", command=cancel_batch, state="disabled", width=12)
+    cancel_button.pack(pady=5)
+
+    # Files that could not be formatted, shown while the run goes on
+    batch_log = tk.Listbox(scrollable_frame, width=80, height=5)
+    batch_log.pack(pady=5)
+
+    # Initialize states
+    update_checkboxes()
+    on_highlight_select()
+
+
+
+    root.mainloop()
@@ -0,0 +1,639 @@
+"""
+Core functions of DocTextFormatter that do not need the GUI.
+Finds the paragraphs each "Apply Options" mode works on and applies
+a FormatPlan (all requested run attributes) to them in one pass.
+Folders are formatted on a process pool (iter_format_files), also
+from the command line:
+
+    python doc_text_formatter_core.py D:/Standards --subfolders --font Arial --size 11
+    python doc_text_formatter_core.py D:/Standards --option "Tables Only" --highlight None
+    python doc_text_formatter_core.py D:/Standards --color 1F3864 --filter "^Note" --regex
+    python doc_text_formatter_core.py D:/Standards --option "Headings Only" --font Arial --style-level
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from docx import Document
+from docx.enum.dml import MSO_COLOR_TYPE
+from docx.enum.style import WD_STYLE_TYPE
+from docx.enum.text import WD_COLOR_INDEX, WD_UNDERLINE
+from docx.opc.constants import CONTENT_TYPE as CT
+from docx.oxml import parse_xml
+from docx.oxml.ns import qn
+from docx.shared import Pt, RGBColor
+from docx.table import Table, _Cell
+from docx.text.paragraph import Paragraph
+
+WORD_HIGHLIGHT_COLORS = {
+    "None": None,                # No highlight
+    "Yellow": WD_COLOR_INDEX.YELLOW,
+    "Bright Green": WD_COLOR_INDEX.BRIGHT_GREEN,
+    "Red": WD_COLOR_INDEX.RED,
+    "Blue": WD_COLOR_INDEX.BLUE,
+    "Pink": WD_COLOR_INDEX.PINK,
+    "Turquoise": WD_COLOR_INDEX.TURQUOISE,
+    "Gray": WD_COLOR_INDEX.GRAY_25,
+    "Dark Blue": WD_COLOR_INDEX.DARK_BLUE,
+    "Dark Red": WD_COLOR_INDEX.DARK_RED,
+    "Teal": WD_COLOR_INDEX.TEAL,
+    "Violet": WD_COLOR_INDEX.VIOLET
+}
+
+FILTER_OPTIONS = ["Included", "Excluded"]
+
+# FormatPlan attributes a paragraph style can carry (Word ignores highlight in styles)
+STYLE_ATTRIBUTES = ("font_name", "font_size", "styles", "color")
+FONT_NAME_ATTRIBUTES = ("w:ascii", "w:hAnsi", "w:eastAsia")   # the rFonts a font name sets
+# Theme fonts win over the names above in Word, so setting a name removes them
+FONT_THEME_ATTRIBUTES = ("w:asciiTheme", "w:hAnsiTheme", "w:eastAsiaTheme", "w:cstheme")
+
+# Parts holding paragraphs that use the document's paragraph styles
+STORY_CONTENT_TYPES = (CT.WML_DOCUMENT_MAIN, CT.WML_HEADER, CT.WML_FOOTER, CT.WML_FOOTNOTES,
+                       CT.WML_ENDNOTES, CT.WML_COMMENTS)
+
+APPLY_OPTIONS = ["All", "Headings Only", "Tables Only", "Images Only", "Text Only", "Text and Tables Only"]
+
+W_P = qn("w:p")
+W_TBL = qn("w:tbl")
+W_TR = qn("w:tr")
+W_TC = qn("w:tc")
+
+
+class ClassifiedParagraph(NamedTuple):
+    paragraph: Paragraph
+    in_table: bool
+    is_heading: bool
+    has_image: bool
+
+
+# ---------------- Files ----------------
+def is_valid_docx(file_name: str) -> bool:
+    """.docx files, without Word's "~$" lock files."""
+    return file_name.lower().endswith(".docx") and not os.path.basename(file_name).startswith("~$")
+
+
+def collect_docx_files(path: str, is_folder: bool, include_subfolders=False) -> List[str]:
+    """The .docx files of a file / folder path (subfolders optional)."""
+    if not is_folder:
+        return [path] if is_valid_docx(path) else []
+    docx_files = []
+    if include_subfolders:
+        for root_dir, dirs, files in os.walk(path):
+            for f in files:
+                if is_valid_docx(f):
+                    docx_files.append(os.path.join(root_dir, f))
+    else:
+        for f in os.listdir(path):
+            full_path = os.path.join(path, f)
+            if os.path.isfile(full_path) and is_valid_docx(f):
+                docx_files.append(full_path)
+    return docx_files
+
+
+# ---------------- Paragraph classification ----------------
+def paragraph_style_names(doc) -> Dict[str, str]:
+    """
+    Map paragraph style id -> UI name (as paragraph.style.name gives it),
+    read once per document; '' is the name of the default style.
+    """
+    names = {}
+    for style in doc.styles:
+        if style.type == WD_STYLE_TYPE.PARAGRAPH:
+            names[style.style_id] = style.name or ""
+    default = doc.styles.default(WD_STYLE_TYPE.PARAGRAPH)
+    names[""] = (default.name or "") if default is not None else ""
+    return names
+
+
+def paragraph_has_image(paragraph: Paragraph) -> bool:
+    return bool(paragraph._element.xpath('.//pic:pic'))
+
+
+def classify_paragraphs(doc) -> List[ClassifiedParagraph]:
+    """
+    Walk the document body once, in document order, and tag every paragraph:
+    in a table (nested tables included), heading style, holds an image.
+    Body paragraphs are the ones of doc.paragraphs; every table cell is
+    visited once, also when it is merged across rows / columns.
+    """
+    style_names = paragraph_style_names(doc)
+    default_name = style_names[""]
+    classified: List[ClassifiedParagraph] = []
+
+    def add(p_elm, parent, in_table):
+        paragraph = Paragraph(p_elm, parent)
+        style_id = p_elm.style
+        name = style_names.get(style_id, default_name) if style_id else default_name
+        classified.append(ClassifiedParagraph(paragraph, in_table, name.startswith("Heading"),
+                                              paragraph_has_image(paragraph)))
+
+    def walk_table(tbl, parent):
+        table = Table(tbl, parent)
+        for tr in tbl.iterchildren(W_TR):
+            for tc in tr.iterchildren(W_TC):
+                cell = _Cell(tc, table)
+                for child in tc.iterchildren(W_P, W_TBL):
+                    if child.tag == W_P:
+                        add(child, cell, True)
+                    else:
+                        walk_table(child, cell)
+
+    body = doc._body
+    for child in doc.element.body.iterchildren(W_P, W_TBL):
+        if child.tag == W_P:
+            add(child, body, False)
+        else:
+            walk_table(child, body)
+    return classified
+
+
+def in_scope(item: ClassifiedParagraph, option_choice: str, include_headings=True,
+             include_images=True, include_tables=True) -> bool:
+    """
+    True when the "Apply Options" choice covers the paragraph
+    (the include_* checkboxes only count for "All").
+    """
+    if option_choice == "Headings Only":
+        return item.is_heading and not item.in_table
+    if option_choice == "Tables Only":
+        return item.in_table
+    if option_choice == "Images Only":
+        return item.has_image
+    if option_choice == "Text Only":
+        return not (item.in_table or item.is_heading or item.has_image)
+    if option_choice == "Text and Tables Only":
+        return item.in_table or not (item.is_heading or item.has_image)
+    if option_choice == "All":
+        return ((include_tables or not item.in_table)
+                and (include_headings or not item.is_heading)
+                and (include_images or not item.has_image))
+    return False
+
+
+def select_paragraphs(classified: Iterable[ClassifiedParagraph], option_choice: str,
+                      include_headings=True, include_images=True, include_tables=True) -> Iterator[Paragraph]:
+    """
+    The paragraphs an "Apply Options" choice works on, from classify_paragraphs().
+    """
+    for item in classified:
+        if in_scope(item, option_choice, include_headings, include_images, include_tables):
+            yield item.paragraph
+
+
+# ---------------- Format plan ----------------
+class FormatPlan:
+    """
+    The run attributes to change, collected before any file is opened, so
+    one open / classify / format / save per document applies all of them.
+    Only requested attributes are touched; highlight None removes it.
+    """
+    def __init__(self):
+        self.changes: Dict[str, object] = {}
+
+    def set_font(self, font_name: str) -> "FormatPlan":
+        self.changes["font_name"] = font_name
+        return self
+
+    def set_size(self, font_size) -> "FormatPlan":
+        self.changes["font_size"] = font_size
+        return self
+
+    def set_styles(self, bold: bool, italic: bool, underline: bool, turn_on_only=False) -> "FormatPlan":
+        """
+        Bold / italic / underline as checked; with turn_on_only unchecked
+        styles are left as they are instead of being turned off.
+        """
+        self.changes["styles"] = (bool(bold), bool(italic), bool(underline), bool(turn_on_only))
+        return self
+
+    def set_color(self, color: Tuple[int, int, int]) -> "FormatPlan":
+        self.changes["color"] = tuple(color)
+        return self
+
+    def set_highlight(self, highlight) -> "FormatPlan":
+        self.changes["highlight"] = highlight
+        return self
+
+    def __bool__(self):
+        return bool(self.changes)
+
+    def apply_to_run(self, run) -> bool:
+        """
+        Set the planned attributes on a run, each only when it differs
+        from what the run already has. Returns True when anything changed.
+        """
+        return self._apply(run, self.changes)
+
+    def apply_to_style(self, style) -> bool:
+        """
+        Set the planned attributes on a paragraph style, like apply_to_run.
+        Highlight is left out: Word ignores highlight in styles.
+        """
+        return self._apply(style, {key: value for key, value in self.changes.items() if key in STYLE_ATTRIBUTES})
+
+    def strip_from_run(self, run) -> bool:
+        """
+        Style-level mode: remove the run's direct values of the attributes
+        set on its paragraph style (so the style shows through) and apply
+        the ones a style cannot hold. Returns True when anything changed.
+        """
+        changed = False
+        rPr = run._element.rPr
+        if rPr is not None:
+            tags = []
+            if "font_size" in self.changes:
+                tags.append("w:sz")
+            if "styles" in self.changes:
+                for tag, value in zip(("w:b", "w:i", "w:u"), self.changes["styles"]):
+                    if not self.changes["styles"][3] or value:
+                        tags.append(tag)
+            if "color" in self.changes:
+                tags.append("w:color")
+            for tag in tags:
+                element = rPr.find(qn(tag))
+                if element is not None:
+                    rPr.remove(element)
+                    changed = True
+
+            rFonts = rPr.rFonts
+            if "font_name" in self.changes and rFonts is not None:
+                for attr in FONT_NAME_ATTRIBUTES + FONT_THEME_ATTRIBUTES:
+                    if rFonts.get(qn(attr)) is not None:
+                        del rFonts.attrib[qn(attr)]
+                        changed = True
+                if not rFonts.attrib:
+                    rPr.remove(rFonts)
+
+        direct = {key: value for key, value in self.changes.items() if key not in STYLE_ATTRIBUTES}
+        return self._apply(run, direct) or changed
+
+    def _apply(self, target, changes) -> bool:
+        """
+        Set changes on a run or a style (both have .font and an rPr),
+        compare before set.
+        """
+        font = target.font
+        changed = False
+        if "font_name" in changes:
+            name = changes["font_name"]
+            rPr = target._element.rPr
+            rFonts = rPr.rFonts if rPr is not None else None
+            if (rFonts is None or any(rFonts.get(qn(attr)) != name for attr in FONT_NAME_ATTRIBUTES)
+                    or any(rFonts.get(qn(attr)) is not None for attr in FONT_THEME_ATTRIBUTES)):
+                font.name = name
+                rFonts = target._element.rPr.rFonts
+                rFonts.set(qn('w:eastAsia'), name)
+                for attr in FONT_THEME_ATTRIBUTES:
+                    rFonts.attrib.pop(qn(attr), None)
+                changed = True
+        if "font_size" in changes:
+            size = Pt(changes["font_size"])
+            if font.size != size:
+                font.size = size
+                changed = True
+        if "styles" in changes:
+            bold, italic, underline, turn_on_only = changes["styles"]
+            if (not turn_on_only or bold) and font.bold is not bold:
+                font.bold = bold
+                changed = True
+            if (not turn_on_only or italic) and font.italic is not italic:
+                font.italic = italic
+                changed = True
+            # font.underline reads a single underline back as True
+            if (not turn_on_only or underline) and font.underline is not (True if underline else None):
+                font.underline = WD_UNDERLINE.SINGLE if underline else None
+                changed = True
+        if "color" in changes:
+            rgb = RGBColor(*changes["color"])
+            # A theme color also carries an rgb value; setting rgb drops the theme
+            if font.color.type != MSO_COLOR_TYPE.RGB or font.color.rgb != rgb:
+                font.color.rgb = rgb
+                changed = True
+        if "highlight" in changes:
+            highlight = changes["highlight"]  # None removes any previous highlight
+            if font.highlight_color != highlight:
+                font.highlight_color = highlight
+                changed = True
+        return changed
+
+
+class FormatCounts(NamedTuple):
+    paragraphs: int         # paragraphs in scope and accepted by the filter
+    runs: int               # their runs
+    runs_changed: int       # runs that got at least one new attribute value (or lost a direct one)
+    styles_changed: int = 0 # paragraph styles formatted (style-level mode)
+
+
+# ---------------- Style level ----------------
+def style_level_styles(doc, selected: List[Paragraph]) -> Dict[str, object]:
+    """
+    The paragraph styles of the selected paragraphs that can be formatted
+    as a whole: no other paragraph (body, text boxes, headers / footers,
+    notes, comments) uses the style, or a style based on it.
+    Returns {style id: style}.
+    """
+    styles = {style.style_id: style for style in doc.styles if style.type == WD_STYLE_TYPE.PARAGRAPH}
+    default = doc.styles.default(WD_STYLE_TYPE.PARAGRAPH)
+    default_id = default.style_id if default is not None else None
+    based_on = {s.styleId: s.basedOn_val for s in doc.styles.element.style_lst}
+
+    def style_id_of(p_elm):
+        # A missing / unknown style id means the default style, as in Word
+        style_id = p_elm.style
+        return style_id if style_id in styles else default_id
+
+    def chain(style_id):
+        seen = []
+        while style_id and style_id not in seen:
+            seen.append(style_id)
+            style_id = based_on.get(style_id)
+        return seen
+
+    selected_elements = {paragraph._p for paragraph in selected}
+    blocked = set()
+    for part in doc.part.package.iter_parts():
+        if part.content_type not in STORY_CONTENT_TYPES:
+            continue
+        element = part.element if hasattr(part, "element") else parse_xml(part.blob)
+        for p_elm in element.iter(W_P):
+            if p_elm not in selected_elements:
+                blocked.update(chain(style_id_of(p_elm)))
+
+    result = {}
+    for p_elm in selected_elements:
+        style_id = style_id_of(p_elm)
+        if style_id is not None and style_id not in blocked:
+            result[style_id] = styles[style_id]
+    return result
+
+
+def apply_format_plan(file_path: str, plan: FormatPlan, option_choice: str, include_headings=True,
+                      include_images=True, include_tables=True,
+                      paragraph_filter: Optional[Callable[[Paragraph], bool]] = None,
+                      style_level=False) -> FormatCounts:
+    """
+    Open a document once, format the runs of every paragraph in scope
+    (and accepted by paragraph_filter) with the whole plan, save it once.
+    A document in which nothing changed is not saved (the file, and its
+    modification time, stay as they were).
+
+    style_level: format the paragraph styles (Heading N, Normal, ...) of
+    the selected paragraphs instead of every run, and remove the runs'
+    direct values of those attributes. Only styles no other paragraph
+    depends on are formatted; paragraphs of the others, runs with a
+    character style and highlight are still formatted run by run.
+    """
+    doc = Document(file_path)
+    selected = [paragraph for paragraph in select_paragraphs(classify_paragraphs(doc), option_choice,
+                                                             include_headings, include_images, include_tables)
+                if paragraph_filter is None or paragraph_filter(paragraph)]
+
+    styled = style_level_styles(doc, selected) if style_level else {}
+    styles_changed = sum(1 for style in styled.values() if plan.apply_to_style(style))
+
+    runs = runs_changed = 0
+    for paragraph in selected:
+        by_style = bool(styled) and paragraph.style.style_id in styled
+        for run in paragraph.runs:
+            runs += 1
+            if by_style and run._element.style is None:
+                changed = plan.strip_from_run(run)
+            else:
+                changed = plan.apply_to_run(run)
+            if changed:
+                runs_changed += 1
+    if runs_changed or styles_changed:
+        doc.save(file_path)
+    return FormatCounts(len(selected), runs, runs_changed, styles_changed)
+
+
+# ---------------- Text filter ----------------
+class ParagraphFilter:
+    """
+    The "Text Filter" (case-insensitive), prepared once per run: the regex
+    is compiled, or the literal lowered, when the filter is built, so
+    testing a paragraph is a single search. With "Included" paragraphs
+    holding the text pass, with "Excluded" the others do; an empty filter
+    passes everything. Plain values only, so it pickles for the workers.
+    Raises ValueError for an invalid regex or filter option.
+    """
+    def __init__(self, filter_text="", filter_option="Included", use_regex=False):
+        if filter_option not in FILTER_OPTIONS:
+            raise ValueError(f"Unknown filter option: {filter_option}")
+        self.filter_text = filter_text.strip()
+        self.include = filter_option == "Included"
+        self.pattern = None
+        self.needle = None
+        if self.filter_text and use_regex:
+            try:
+                self.pattern = re.compile(self.filter_text, re.IGNORECASE)
+            except re.error as e:
+                raise ValueError(f"Invalid regex: {e}") from None
+        elif self.filter_text:
+            self.needle = self.filter_text.lower()
+
+    def __bool__(self):
+        return bool(self.filter_text)
+
+    def matches_text(self, text: str) -> bool:
+        if self.pattern is not None:
+            found = self.pattern.search(text) is not None
+        elif self.needle is not None:
+            found = self.needle in text.lower()
+        else:
+            return True
+        return found == self.include
+
+    def __call__(self, paragraph: Paragraph) -> bool:
+        return self.matches_text(paragraph.text)
+
+
+# ---------------- Batch ----------------
+class FormatJob(NamedTuple):
+    """
+    What to do with every file of a batch; sent to the worker processes,
+    so it only holds plain values (no Tk variables).
+    """
+    plan: FormatPlan
+    option_choice: str = "All"
+    include_headings: bool = True
+    include_images: bool = True
+    include_tables: bool = True
+    paragraph_filter: Optional[ParagraphFilter] = None
+    style_level: bool = False
+
+
+def format_file(file_path: str, job: FormatJob) -> dict:
+    """
+    Apply a FormatJob to one document.
+    Returns {'path', 'paragraphs', 'runs', 'runs_changed', 'styles_changed', 'saved', 'locked', 'error'};
+    never raises. 'saved' is False for a document that needed no change.
+    """
+    entry = {"path": file_path, "paragraphs": 0, "runs": 0, "runs_changed": 0, "styles_changed": 0,
+             "saved": False, "locked": False, "error": None}
+    try:
+        counts = apply_format_plan(file_path, job.plan, job.option_choice, job.include_headings,
+                                   job.include_images, job.include_tables, job.paragraph_filter, job.style_level)
+        entry.update(counts._asdict(), saved=counts.runs_changed > 0 or counts.styles_changed > 0)
+    except PermissionError:
+        entry["locked"] = True   # open in Word
+    except Exception as e:
+        entry["error"] = str(e)
+    return entry
+
+
+def iter_format_files(files: List[str], job: FormatJob, workers: Optional[int] = None) -> Iterator[dict]:
+    """
+    Format files on a process pool (one worker per core by default) and
+    yield each format_file() entry as soon as its file is done, so in
+    completion order. Closing the generator early (cancel) drops the files
+    not started yet; the ones in progress are finished.
+    """
+    workers = min(workers or os.cpu_count() or 1, len(files))
+    if workers <= 1:
+        # One file / one worker: no pool start-up cost
+        for file_path in files:
+            yield format_file(file_path, job)
+        return
+
+    executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        futures = [executor.submit(format_file, file_path, job) for file_path in files]
+        for future in as_completed(futures):
+            yield future.result()
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+# ---------------- Command line ----------------
+def parse_color(value: str) -> Tuple[int, int, int]:
+    value = value.lstrip("#")
+    if not re.fullmatch(r"[0-9A-Fa-f]{6}", value):
+        raise argparse.ArgumentTypeError(f"not an RRGGBB color: {value}")
+    return int(value[0:2], 16), int(value[2:4], 16), int(value[4:6], 16)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="DocTextFormatter without the GUI (JSON Lines output).")
+    parser.add_argument("path", help=".docx file or folder")
+    parser.add_argument("--subfolders", action="store_true", help="include subfolders")
+
+    group = parser.add_argument_group("attributes (at least one)")
+    group.add_argument("--font", help="font name")
+    group.add_argument("--size", type=int, help="font size in points")
+    group.add_argument("--styles", action="store_true",
+                       help="apply bold / italic / underline (the ones not given are turned off)")
+    group.add_argument("--bold", action="store_true", help="implies --styles")
+    group.add_argument("--italic", action="store_true", help="implies --styles")
+    group.add_argument("--underline", action="store_true", help="implies --styles")
+    group.add_argument("--color", type=parse_color, help="text color as RRGGBB")
+    group.add_argument("--highlight", choices=list(WORD_HIGHLIGHT_COLORS), help="None removes the highlight")
+
+    group = parser.add_argument_group("scope")
+    group.add_argument("--option", choices=APPLY_OPTIONS, default="All", help="Apply Options (default: All)")
+    group.add_argument("--no-headings", action="store_true", help='with "All": skip headings')
+    group.add_argument("--no-images", action="store_true", help='with "All": skip paragraphs with images')
+    group.add_argument("--no-tables", action="store_true", help='with "All": skip tables')
+    group.add_argument("--filter", default="", help="Text Filter")
+    group.add_argument("--filter-option", choices=FILTER_OPTIONS, default="Included")
+    group.add_argument("--regex", action="store_true", help="the Text Filter is a regular expression")
+    group.add_argument("--style-level", action="store_true",
+                       help="format the paragraph styles and drop the runs' direct formatting")
+
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per CPU core)")
+    parser.add_argument("--output", help="write the JSON Lines here instead of stdout")
+    return parser
+
+
+def plan_from_args(args) -> FormatPlan:
+    plan = FormatPlan()
+    if args.font:
+        plan.set_font(args.font)
+    if args.size:
+        plan.set_size(args.size)
+    if args.styles or args.bold or args.italic or args.underline:
+        plan.set_styles(args.bold, args.italic, args.underline)
+    if args.color:
+        plan.set_color(args.color)
+    if args.highlight:
+        plan.set_highlight(WORD_HIGHLIGHT_COLORS[args.highlight])
+    return plan
+
+
+def run_batch(args, out) -> int:
+    def write(record):
+        out.write(json.dumps(record, ensure_ascii=False) + "\n")
+        out.flush()
+
+    files = collect_docx_files(args.path, os.path.isdir(args.path), args.subfolders)
+    paragraph_filter = ParagraphFilter(args.filter, args.filter_option, args.regex)
+    job = FormatJob(plan_from_args(args), args.option, not args.no_headings, not args.no_images,
+                    not args.no_tables, paragraph_filter or None, args.style_level)
+    started = time.perf_counter()
+
+    changed = unchanged = locked = errors = 0
+    for entry in iter_format_files(files, job, args.workers):
+        if entry["locked"]:
+            locked += 1
+            write({"type": "locked", "path": entry["path"]})
+        elif entry["error"]:
+            errors += 1
+            write({"type": "error", "path": entry["path"], "error": entry["error"]})
+        else:
+            if entry["saved"]:
+                changed += 1
+            else:
+                unchanged += 1
+            write({"type": "file", "path": entry["path"], "changed": entry["saved"],
+                   "paragraphs": entry["paragraphs"], "runs_changed": entry["runs_changed"],
+                   "runs_unchanged": entry["runs"] - entry["runs_changed"],
+                   "styles_changed": entry["styles_changed"]})
+
+    seconds = time.perf_counter() - started
+    write({"type": "summary", "files": len(files), "changed": changed, "unchanged": unchanged,
+           "locked": locked, "errors": errors, "seconds": round(seconds, 3),
+           "files_per_sec": round(len(files) / seconds, 2) if seconds else None})
+    return 1 if locked or errors else 0
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if not os.path.exists(args.path):
+        print(f"Path not found: {args.path}", file=sys.stderr)
+        return 2
+    if not plan_from_args(args):
+        print("Nothing to apply: give --font, --size, --styles, --color and/or --highlight.", file=sys.stderr)
+        return 2
+    try:
+        ParagraphFilter(args.filter, args.filter_option, args.regex)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 2
+
+    if args.output:
+        out = open(args.output, "w", encoding="utf-8")
+    else:
+        out = sys.stdout
+        if hasattr(out, "reconfigure"):
+            out.reconfigure(encoding="utf-8")   # Windows consoles default to a code page
+    try:
+        return run_batch(args, out)
+    finally:
+        if args.output:
+            out.close()
+
+
+# Worker processes re-import this module (Windows spawn), so only the
+# main process parses arguments.
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())